@@ -14,6 +14,8 @@ class ProcessBlocker:
     
     def __init__(self):
         self.blocked_processes = ["Taskmgr.exe", "cmd.exe", "regedit.exe", "ProcessHacker.exe"]
+        self.known_pids = set()  # PIDs seen on the previous pass
+        self.identities = {}  # pid -> (create_time, name, exe, cmdline); a changed create_time means the PID was reused
         self.running = True
         self.thread = threading.Thread(target=self.monitor_processes, daemon=True)
         self.thread.start()
@@ -24,30 +26,62 @@ class ProcessBlocker:
             timestamp = datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
             log_file.write(f"{timestamp} {message}\n")
 
+    def refresh_processes(self):
+        """
+        Diffs the live PIDs against the last pass and resolves create_time/name/exe/cmdline
+        only for PIDs we haven't seen before. A PID that exited and was reused between passes
+        isn't re-read; psutil checks the create_time again before proc.kill(), so a recycled
+        PID never gets killed in its old owner's place.
+        """
+        current = set(psutil.pids())
+        for pid in self.known_pids - current:
+            self.identities.pop(pid, None)  # Evict processes that exited
+        spawned = current - self.known_pids
+        self.known_pids = current
+
+        new_procs = []
+        for pid in spawned:
+            try:
+                proc = psutil.Process(pid)
+                create_time = proc.create_time()
+                with proc.oneshot():
+                    name = proc.name()
+                    try:
+                        exe = proc.exe()
+                    except (psutil.AccessDenied, psutil.ZombieProcess):
+                        exe = None
+                    try:
+                        cmdline = proc.cmdline()
+                    except (psutil.AccessDenied, psutil.ZombieProcess):
+                        cmdline = None
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                self.identities.pop(pid, None)
+                continue
+            self.identities[pid] = (create_time, name, exe, cmdline)
+            new_procs.append((proc, name, exe))
+        return new_procs
+
     def monitor_processes(self):
         """Continuously checks for and terminates blacklisted processes."""
         while self.running:
-            self.check_tampering()  # 🔥 Detect renamed tools
-            for proc in psutil.process_iter(attrs=['pid', 'name']):
-                if proc.info['name'] in self.blocked_processes:
+            new_procs = self.refresh_processes()  # Only processes spawned since last pass
+            self.check_tampering(new_procs)  # 🔥 Detect renamed tools
+            for proc, name, exe in new_procs:
+                if name in self.blocked_processes:
                     try:
                         proc.kill()
-                        self.log_event(f"Blocked {proc.info['name']}")
-                        print(f"Blocked {proc.info['name']}")
+                        self.log_event(f"Blocked {name}")
+                        print(f"Blocked {name}")
                     except Exception as e:
-                        self.log_event(f"Failed to block {proc.info['name']}: {e}")
+                        self.log_event(f"Failed to block {name}: {e}")
             time.sleep(1)  # Check every second
 
-    def check_tampering(self):
+    def check_tampering(self, new_procs):
         """Detects renamed versions of blocked programs."""
         found_files = []
-        for proc in psutil.process_iter(attrs=['pid', 'exe']):
-            try:
-                exe_path = proc.info['exe']
-                if exe_path and any(tool.lower() in exe_path.lower() for tool in self.blocked_processes):
-                    found_files.append(exe_path)
-            except:
-                pass  # Ignore permission errors
+        for proc, name, exe_path in new_procs:
+            if exe_path and any(tool.lower() in exe_path.lower() for tool in self.blocked_processes):
+                found_files.append(exe_path)
 
         if found_files:
             self.running = False  # 🔥 Pause monitoring
@@ -58,9 +92,9 @@ class ProcessBlocker:
         """Automatically closes detected tampering tools."""
         for file in found_files:
             try:
-                proc = next((p for p in psutil.process_iter(attrs=['pid', 'exe']) if p.info['exe'] == file), None)
-                if proc:
-                    proc.terminate()
+                pid = next((pid for pid, (_, _, exe, _) in self.identities.items() if exe == file), None)
+                if pid is not None:
+                    psutil.Process(pid).terminate()
                     self.log_event(f"Closed tampering tool: {file}")
                     print(f"🔥 Closed tampering tool: {file}")
             except Exception as e:
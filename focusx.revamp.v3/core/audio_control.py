@@ -1,9 +1,5 @@
 # core/audio_control.py
 
-from ctypes import cast, POINTER
-from comtypes import CLSCTX_ALL
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-
 class AudioControl:
     """
     Manages system audio muting and unmuting.
@@ -13,15 +9,21 @@ class AudioControl:
         # We need a reference to the main app (primarily for logging/printing, not direct GUI interaction).
         self.app = app_instance 
         self.audio_interface = None # Will hold the IAudioEndpointVolume object
-
-        self._init_audio_control()
+        self._initialized = False # pycaw/comtypes are heavy, so they load on the first mute, not at startup.
 
     def _init_audio_control(self):
         """
         Initializes the pycaw audio control capabilities.
         It attempts to get the interface to control the default audio endpoint (speakers).
         """
+        self._initialized = True
         try:
+            # Imported here so machines without pycaw (anything but Windows, or a headless box)
+            # simply run without audio control.
+            from ctypes import cast, POINTER
+            from comtypes import CLSCTX_ALL
+            from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+
             # Get the default audio device (speakers).
             devices = AudioUtilities.GetSpeakers()
             # Activate the IAudioEndpointVolume interface for this device.
@@ -40,6 +42,8 @@ class AudioControl:
         Mutes the system's default audio output.
         Shhh! Time to silence the world and listen to your thoughts.
         """
+        if not self._initialized:
+            self._init_audio_control()
         if self.audio_interface:
             try:
                 # SetMute(1, None) mutes the audio.
@@ -55,6 +59,8 @@ class AudioControl:
         Unmutes the system's default audio output.
         Break time! Let the sounds of freedom (or notifications) roll in!
         """
+        if not self._initialized:
+            self._init_audio_control()
         if self.audio_interface:
             try:
                 # SetMute(0, None) unmutes the audio.
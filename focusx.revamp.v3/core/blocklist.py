@@ -0,0 +1,79 @@
+# core/blocklist.py
+
+import fnmatch
+import re
+
+HASH_PREFIX = 'sha256:'
+GLOB_CHARS = set('*?[')
+
+def _normalize(text):
+    # Windows paths and names are case-insensitive; compare everything folded and with '/'.
+    return text.replace('\\', '/').lower()
+
+class BlocklistMatcher:
+    """
+    A blocklist compiled once into lookup structures, so checking a process costs a
+    set lookup and one regex match no matter how many entries the list has.
+
+    Entry kinds (all case-insensitive):
+      - 'taskmgr.exe'               exact process or executable file name
+      - 'process*.exe'              glob against the name and the full executable path
+      - 'C:/Tools/Sysinternals/'    executable path prefix (any entry containing a slash)
+      - 'sha256:<hex digest>'       executable content hash, catches renamed copies
+    """
+    def __init__(self, entries=()):
+        self.entries = tuple(entries)
+        names, hashes, globs, prefixes = set(), set(), [], []
+
+        for entry in self.entries:
+            entry = entry.strip()
+            if not entry:
+                continue
+            if entry.lower().startswith(HASH_PREFIX):
+                hashes.add(entry[len(HASH_PREFIX):].lower())
+            elif GLOB_CHARS & set(entry):
+                globs.append(fnmatch.translate(_normalize(entry)))
+            elif '/' in entry or '\\' in entry:
+                prefixes.append(re.escape(_normalize(entry)))
+            else:
+                names.add(entry.lower())
+
+        self.names = frozenset(names)
+        self.hashes = frozenset(hashes)
+        # Every glob becomes one alternative of a single compiled pattern.
+        self._glob_re = re.compile('|'.join(f'(?:{g})' for g in globs)) if globs else None
+        self._prefix_re = re.compile('|'.join(prefixes)) if prefixes else None
+
+    def add_hashes(self, digests):
+        """Learns extra content hashes (e.g. fingerprints of the real blocked binaries)."""
+        # Swap in a new frozenset so readers on other threads never see a half-updated set.
+        self.hashes = self.hashes | {d.lower() for d in digests}
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def match(self, name, exe=None, sha256=None):
+        """
+        Returns a short reason string if the process is blocked, otherwise None.
+        `sha256` is the hex digest of the executable when the caller has one.
+        """
+        name = (name or '').lower()
+        exe = _normalize(exe) if exe else ''
+        exe_name = exe.rsplit('/', 1)[-1]
+
+        if name in self.names:
+            return f"name {name}"
+        if exe_name and exe_name in self.names:
+            return f"file {exe_name}"
+        if self._glob_re is not None:
+            if self._glob_re.match(name) or (exe and (self._glob_re.match(exe) or self._glob_re.match(exe_name))):
+                return f"pattern {exe or name}"
+        if self._prefix_re is not None and exe and self._prefix_re.match(exe):
+            return f"path {exe}"
+        if sha256 and sha256.lower() in self.hashes:
+            return f"hash {sha256.lower()}"
+        return None
+
+    def match_identity(self, identity, sha256=None):
+        """Convenience wrapper for a ProcessIdentity from core.process_watcher."""
+        return self.match(identity.name, identity.exe, sha256)
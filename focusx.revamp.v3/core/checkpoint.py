@@ -0,0 +1,76 @@
+# core/checkpoint.py
+
+import os
+import threading
+import time
+from core.storage import atomic_write_json, read_json
+
+class SessionCheckpoint:
+    """
+    The running session, saved where a respawned FocusX can pick it up: the phase, its
+    deadline and the session lengths, as a tiny atomically-replaced JSON file.
+
+    Writes go through the engine loop's single writer (EngineLoop.write), newest state wins,
+    so neither Tk nor the engine loop ever waits on the disk. A killed process loses nothing
+    (the OS already has the file); only fsync guards against power loss, and that is batched -
+    phase changes are made durable straight away, heartbeats at most once every
+    `fsync_interval` seconds.
+    """
+    def __init__(self, path, engine, fsync_interval=300.0):
+        self.path = path
+        self.engine = engine
+        self.fsync_interval = fsync_interval
+        self._latest = None # (state, durable) waiting to be written; None = delete the file
+        self._queued = False # A _flush is already waiting in the writer queue
+        self._last_fsync = 0.0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """The saved session dict, or None. Reads on the calling thread (one small file)."""
+        state = read_json(self.path)
+        return state if isinstance(state, dict) else None
+
+    def save(self, state, durable=False):
+        with self._lock:
+            # A durable save still waiting to be written stays durable when a heartbeat replaces it.
+            if self._queued and self._latest is not None:
+                durable = durable or self._latest[1]
+            self._latest = (state, durable)
+            self._queue_locked()
+
+    def clear(self):
+        with self._lock:
+            self._latest = None
+            self._queue_locked()
+
+    def close(self):
+        """Writes whatever is still pending, durably, before the app exits."""
+        with self._lock:
+            if self._latest is not None:
+                self._latest = (self._latest[0], True)
+                self._queue_locked()
+        self.engine.flush_writes()
+
+    def _queue_locked(self):
+        if not self._queued:
+            self._queued = True
+            self.engine.write(self._flush)
+
+    def _flush(self):
+        with self._lock:
+            latest = self._latest
+            self._queued = False
+        if latest is None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Could not remove {self.path}: {e}")
+            return
+
+        state, durable = latest
+        now = time.monotonic()
+        fsync = durable or now - self._last_fsync >= self.fsync_interval
+        if atomic_write_json(self.path, state, fsync=fsync) and fsync:
+            self._last_fsync = now
@@ -0,0 +1,225 @@
+# core/clock.py
+
+import math
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+
+class Clock:
+    """
+    A pluggable source of time, in seconds as a float.
+    Every part of FocusX that needs "now" asks one of these instead of calling
+    time.time() or datetime.now() directly, so the whole app ticks to the same beat.
+    """
+    # Whether time spent with the machine suspended (sleep/hibernate) is counted.
+    counts_suspend = False
+
+    def now(self):
+        raise NotImplementedError
+
+class MonotonicClock(Clock):
+    """
+    Never jumps when the wall clock is changed and stands still while the machine sleeps.
+    Use it when only 'awake' time should count, like a stopwatch you pause when you nap.
+    """
+    counts_suspend = False
+
+    def __init__(self):
+        # Bind the platform reader straight onto the instance so now() is a single call.
+        self.now = self._unbiased_reader() or time.monotonic
+
+    @staticmethod
+    def _unbiased_reader():
+        # On Windows time.monotonic() keeps running across sleep, so ask the kernel for
+        # the interrupt time with suspended periods removed (100 ns units).
+        if sys.platform != 'win32':
+            return None
+        try:
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            value = ctypes.c_ulonglong()
+            kernel32.QueryUnbiasedInterruptTime(ctypes.byref(value))
+        except Exception:
+            return None
+
+        def read():
+            kernel32.QueryUnbiasedInterruptTime(ctypes.byref(value))
+            return value.value / 10_000_000
+        return read
+
+class BootTimeClock(Clock):
+    """
+    Monotonic time since boot, *including* time spent suspended.
+    A 50 minute work session still ends 50 real minutes after it started, even if the
+    laptop lid was closed for 20 of them.
+    """
+    counts_suspend = True
+
+    def __init__(self):
+        reader = self._boottime_reader()
+        if reader is None:
+            # No suspend-aware source on this platform: degrade honestly to plain monotonic.
+            print("Suspend-inclusive clock unavailable, falling back to monotonic time.")
+            self.counts_suspend = False
+            reader = time.monotonic
+        self.now = reader
+
+    @staticmethod
+    def _boottime_reader():
+        if sys.platform.startswith('linux') and hasattr(time, 'CLOCK_BOOTTIME'):
+            return lambda: time.clock_gettime(time.CLOCK_BOOTTIME)
+        if sys.platform == 'darwin' and hasattr(time, 'CLOCK_MONOTONIC'):
+            # On macOS CLOCK_MONOTONIC keeps counting while asleep (unlike mach_absolute_time).
+            return lambda: time.clock_gettime(time.CLOCK_MONOTONIC)
+        if sys.platform == 'win32':
+            try:
+                import ctypes
+                get_tick_count = ctypes.windll.kernel32.GetTickCount64
+                get_tick_count.restype = ctypes.c_ulonglong
+                get_tick_count()
+            except Exception:
+                return None
+            return lambda: get_tick_count() / 1000
+        return None
+
+# The NTP correction NtpCorrectedClock applies: `offset` at `reference` on `reference_clock`,
+# growing by `drift` seconds per second of that clock.
+ClockCorrection = namedtuple('ClockCorrection', ['offset', 'server', 'drift', 'reference', 'reference_clock'])
+
+class NtpCorrectedClock(Clock):
+    """
+    Wall-clock time (a Unix timestamp) corrected by the NTP clock model.
+    NightMode feeds it the offset (and, once measured, the drift rate, so the correction
+    glides smoothly between syncs instead of jumping); everyone else just reads now().
+
+    The correction is one immutable ClockCorrection swapped in by a single assignment, so
+    a reader on another thread sees either the old model or the new one, never half of each.
+    """
+    counts_suspend = True
+
+    def __init__(self, offset=0.0):
+        self.correction = ClockCorrection(offset, None, 0.0, 0.0, None)
+
+    def set_offset(self, offset, server=None, drift=0.0, reference=0.0, reference_clock=None):
+        """
+        `offset` applies at `reference` on `reference_clock`; it then grows by `drift`
+        seconds per second of that clock. With no drift the offset is simply constant.
+        """
+        drift = drift if reference_clock is not None else 0.0
+        self.correction = ClockCorrection(offset, server, drift, reference, reference_clock)
+
+    @property
+    def offset(self):
+        return self.correction.offset
+
+    @property
+    def server(self):
+        return self.correction.server
+
+    def now(self):
+        correction = self.correction # Read once: everything below comes from the same model.
+        if correction.drift:
+            elapsed = correction.reference_clock() - correction.reference
+            return time.time() + correction.offset + correction.drift * elapsed
+        return time.time() + correction.offset
+
+class LocalTimeOfDay:
+    """
+    Turns a Unix timestamp into local hour/minute/second/weekday with plain arithmetic.
+    The UTC offset of each DST period is worked out once (with a datetime, bisecting to
+    both of its ends) and then reused for any timestamp inside it, so the per-second checks
+    never build datetime objects. The last few periods are kept, so a caller hopping back
+    and forth across a DST change doesn't redo the bisection on every hop.
+    Think of it as reading the clock face instead of the calendar.
+    """
+    PROBE_STEP = 7 * 86400 # Coarse steps when hunting for the DST transitions around a time...
+    HORIZON = 400 * 86400  # ...up to this far away (zones without DST just re-check yearly).
+    SECONDS_PER_DAY = 86400
+    MAX_PERIODS = 4 # DST periods remembered; a couple either side of now is all anyone asks about.
+
+    def __init__(self, tz):
+        self.tz = tz
+        self._periods = {} # period start -> (start, end, UTC offset), oldest first
+        self._current = (math.inf, -math.inf, 0) # The period that answered last (empty at first).
+
+    def _offset_at(self, timestamp):
+        return datetime.fromtimestamp(timestamp, self.tz).utcoffset().total_seconds()
+
+    def _edge(self, timestamp, offset, step):
+        # Walks from `timestamp` in `step`-sized hops until the offset changes, then bisects to
+        # the second. Forwards that's where the period ends (exclusive), backwards where it
+        # starts (inclusive); with no change within the horizon, the horizon itself.
+        inside = timestamp
+        outside = None
+        probe = timestamp
+        while abs(probe - timestamp) < self.HORIZON:
+            probe += step
+            if self._offset_at(probe) != offset:
+                outside = probe
+                break
+            inside = probe
+        if outside is None:
+            return timestamp + math.copysign(self.HORIZON, step)
+        while abs(outside - inside) > 1:
+            middle = (inside + outside) // 2
+            if self._offset_at(middle) == offset:
+                inside = middle
+            else:
+                outside = middle
+        return outside if step > 0 else inside
+
+    def _recompute(self, timestamp):
+        offset = self._offset_at(timestamp)
+        start = self._edge(timestamp, offset, -self.PROBE_STEP)
+        end = self._edge(timestamp, offset, self.PROBE_STEP)
+        period = (start, end, offset)
+        self._periods[start] = period
+        if len(self._periods) > self.MAX_PERIODS:
+            del self._periods[next(iter(self._periods))]
+        return period
+
+    def utc_offset(self, timestamp):
+        """Local UTC offset in seconds at `timestamp`."""
+        start, end, offset = self._current
+        if start <= timestamp < end:
+            return offset
+        for period in self._periods.values():
+            if period[0] <= timestamp < period[1]:
+                break
+        else:
+            period = self._recompute(timestamp)
+        self._current = period
+        return period[2]
+
+    @property
+    def next_transition(self):
+        """Timestamp at which the UTC offset last looked up stops being valid."""
+        return self._current[1]
+
+    def local_seconds(self, timestamp):
+        """The timestamp shifted onto the local wall clock (seconds since local 1970-01-01)."""
+        return timestamp + self.utc_offset(timestamp)
+
+    def seconds_of_day(self, timestamp):
+        """Seconds since local midnight (float)."""
+        return (timestamp + self.utc_offset(timestamp)) % self.SECONDS_PER_DAY
+
+    def hour(self, timestamp):
+        return int(self.seconds_of_day(timestamp) // 3600)
+
+    def hms(self, timestamp):
+        """(hour, minute, second) on the local wall clock."""
+        seconds = int(self.seconds_of_day(timestamp))
+        hour, seconds = divmod(seconds, 3600)
+        minute, second = divmod(seconds, 60)
+        return hour, minute, second
+
+    def weekday(self, timestamp):
+        """Local weekday, Monday == 0 (1970-01-01 was a Thursday)."""
+        days = (timestamp + self.utc_offset(timestamp)) // self.SECONDS_PER_DAY
+        return int(days + 3) % 7
+
+def create_session_clock(count_suspend_time):
+    """Picks the clock that measures work/break sessions, as configured in AppConfig."""
+    return BootTimeClock() if count_suspend_time else MonotonicClock()
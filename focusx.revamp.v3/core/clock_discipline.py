@@ -0,0 +1,113 @@
+# core/clock_discipline.py
+
+import math
+
+class ClockDiscipline:
+    """
+    A small model of how our local clock drifts away from true (NTP) time.
+
+    Each NTP sample is an (x = boot-clock reading, offset, round-trip delay) point; a least
+    squares line through the recent ones gives the offset at any moment plus the drift rate
+    (its slope). Samples that disagree wildly with the line are rejected as outliers, and
+    the model decides how long we can wait before asking the network again - from 64 s when
+    it knows nothing up to a day once the drift is pinned down.
+    """
+    MAX_SAMPLES = 16 # Sliding window; old samples no longer describe today's temperature/aging.
+    MIN_INTERVAL = 64
+    MAX_INTERVAL = 24 * 3600
+    MAX_DRIFT = 100e-6 # Worst plausible quartz drift (100 ppm), assumed until we can measure it.
+    WANDER = 1e-6 # The drift itself wanders a little (~1 ppm) even once measured.
+    OUTLIER_FACTOR = 3 # A residual this many times the predicted error is an outlier...
+    MIN_OUTLIER_TOLERANCE = 0.05 # ...but never flag anything closer than 50 ms.
+    STEP_REJECTS = 3 # This many outliers in a row means the clock was stepped: start over.
+
+    def __init__(self, error_budget, samples=(), interval=None):
+        self.error_budget = error_budget
+        self.samples = [tuple(sample) for sample in samples][-self.MAX_SAMPLES:]
+        self.interval = interval or self.MIN_INTERVAL
+        self._rejected = []
+        self._fit()
+
+    def _fit(self):
+        n = len(self.samples)
+        self.n = n
+        if n == 0:
+            self.x_mean = self.intercept = self.slope = 0.0
+            self.noise = self.slope_error = math.inf
+            return
+
+        xs = [s[0] for s in self.samples]
+        ys = [s[1] for s in self.samples]
+        delays = sorted(s[2] for s in self.samples)
+        self.x_mean = sum(xs) / n
+        y_mean = sum(ys) / n
+        sxx = sum((x - self.x_mean) ** 2 for x in xs)
+
+        if n >= 2 and sxx > 0:
+            self.slope = sum((x - self.x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / sxx
+        else:
+            self.slope = 0.0
+        self.intercept = y_mean # Offset at x_mean.
+
+        # Measurement noise: the scatter around the line, never less than half the typical delay.
+        residuals = [y - self.predict(x) for x, y in zip(xs, ys)]
+        rms = math.sqrt(sum(r * r for r in residuals) / (n - 2)) if n > 2 else 0.0
+        self.noise = max(rms, delays[n // 2] / 2)
+        self.slope_error = self.noise / math.sqrt(sxx) if n >= 2 and sxx > 0 else self.MAX_DRIFT
+
+    @property
+    def drift(self):
+        """Measured drift rate (seconds per second), or None until we have two samples."""
+        return self.slope if self.n >= 2 else None
+
+    def predict(self, x):
+        """Offset (seconds) the model expects at boot-clock reading x."""
+        return self.intercept + self.slope * (x - self.x_mean)
+
+    def error_at(self, x):
+        """Rough bound on how wrong predict(x) is."""
+        if self.n == 0:
+            return math.inf
+        return self.noise / math.sqrt(self.n) + (self.slope_error + self.WANDER) * abs(x - self.x_mean)
+
+    def add_sample(self, x, offset, delay):
+        """Feeds in one NTP measurement. Returns False if it was rejected as an outlier."""
+        if self.n >= 3:
+            residual = abs(offset - self.predict(x))
+            tolerance = max(self.OUTLIER_FACTOR * self.error_at(x) + delay / 2, self.MIN_OUTLIER_TOLERANCE)
+            if residual > tolerance:
+                self._rejected.append((x, offset, delay))
+                if len(self._rejected) < self.STEP_REJECTS:
+                    # Probably a bad sample: check back sooner rather than trusting it.
+                    self.interval = max(self.MIN_INTERVAL, self.interval / 2)
+                    return False
+                # Several outliers agreeing with each other: the clock really moved. Start over.
+                self.samples = self._rejected
+                self._rejected = []
+                self.interval = self.MIN_INTERVAL
+                self._fit()
+                return True
+
+        self._rejected = []
+        self.samples.append((x, offset, delay))
+        self.samples = self.samples[-self.MAX_SAMPLES:]
+        self._fit()
+        self.interval = self._next_interval(x)
+        return True
+
+    def _next_interval(self, x):
+        # Wait until the predicted error would reach the budget, growing at most 2x per sync
+        # so one lucky sample can't push us straight to a day of silence.
+        headroom = self.error_budget - self.error_at(x)
+        if headroom <= 0:
+            horizon = self.MIN_INTERVAL
+        else:
+            horizon = headroom / (self.slope_error + self.WANDER)
+        interval = min(horizon, self.interval * 2)
+        return min(max(interval, self.MIN_INTERVAL), self.MAX_INTERVAL)
+
+    def reset(self):
+        self.samples = []
+        self._rejected = []
+        self.interval = self.MIN_INTERVAL
+        self._fit()
@@ -1,5 +1,7 @@
 # core/config.py
 
+import os
+
 # --- Application-wide Configuration ---
 # Think of this as the main control panel for our FocusX app.
 # All the core settings that don't change during a session are stored here.
@@ -26,6 +28,35 @@ class AppConfig:
         'time.apple.com'
     ]
 
+    # Should time spent with the machine asleep count towards a work/break session?
+    # True: a closed laptop lid doesn't pause the Pomodoro (the original time.time() behaviour).
+    # False: only awake time counts, like pausing the stopwatch while you nap.
+    COUNT_SUSPEND_TIME = True
+
+    # All NTP servers are queried in parallel; the median offset of the first NTP_QUORUM
+    # answers is used, and the whole sync gives up after NTP_DEADLINE seconds.
+    NTP_QUORUM = 3
+    NTP_DEADLINE = 3.0
+
+    # NTP samples feed a drift model that is cached on disk and carried forward between syncs.
+    # We only go back to the network once its predicted error exceeds this many seconds;
+    # the model schedules the next sync anywhere from 64 seconds to 24 hours out.
+    NTP_MAX_PREDICTED_ERROR = 0.5
+
+    # Night lockdown calendar: windows per weekday (0 = Monday ... 6 = Sunday) as ("HH:MM", "HH:MM").
+    # A window whose end is at or before its start wraps past midnight, e.g. ("21:00", "06:00").
+    LOCKDOWN_WINDOWS = {day: [("00:00", "06:00")] for day in range(7)}
+
+    # Date-specific overrides: 'YYYY-MM-DD' -> the windows starting that day ([] = no lockdown).
+    LOCKDOWN_EXCEPTIONS = {}
+
+    # The lockdown boundary timer runs on a monotonic clock, which stands still while the machine
+    # sleeps and doesn't notice the wall clock being set. Suspends and clock changes are caught
+    # from the clocks themselves whenever FocusX wakes for anything else (a timer tick, a process
+    # starting, an NTP sync). On a machine where nothing at all wakes us, the boundary timer still
+    # re-checks at least this often (seconds) - a backstop, not a poll.
+    LOCKDOWN_RECHECK_INTERVAL = 15 * 60
+
     # Break activity messages.
     # Short, friendly reminders to make the most of break time, like little notes from a helpful friend!
     BREAK_ACTIVITIES = [
@@ -38,10 +69,75 @@ class AppConfig:
         "Just breathe. Seriously, deep breaths are like a mental reset button."
     ]
 
+    # Programs FocusX shuts down during work sessions (see core/blocklist.py for the syntax).
+    # Exact names, globs like 'procexp*.exe', path prefixes and 'sha256:<digest>' entries all work.
+    BLOCKED_PROCESSES = [
+        'taskmgr.exe',
+    ]
+
+    # Target for how quickly a blocked program is killed after it starts, in milliseconds.
+    # Slower kills are logged so the spawn-to-kill histogram can be checked against it.
+    KILL_LATENCY_BUDGET_MS = 50
+
+    # Process polling cadence (seconds) when no process-creation events are available.
+    # The interval backs off towards the ceiling while all is quiet and snaps back to the
+    # floor as soon as a blocked program is caught.
+    PROCESS_POLL_MIN_INTERVAL = 0.25
+    PROCESS_POLL_MAX_INTERVAL = 8.0
+
+    # Default session lengths in minutes (the GUI's sliders start here; the daemon uses them as-is).
+    DEFAULT_WORK_MINUTES = 50
+    DEFAULT_REST_MINUTES = 10
+
+    # How quickly the main window should be on screen after launch, in milliseconds.
+    # Only tkinter and the GUI load before the first paint; the engines (asyncio, psutil, pycaw,
+    # pynput...) load right after. Slower starts are logged; --profile-startup shows the timeline.
+    STARTUP_BUDGET_MS = 250
+
+    # A running session is checkpointed to disk so a respawned FocusX resumes where it left off.
+    # The checkpoint is refreshed every SESSION_CHECKPOINT_INTERVAL seconds (forced to disk at most
+    # every SESSION_CHECKPOINT_FSYNC_INTERVAL) and at every phase change; a checkpoint older than
+    # SESSION_RESUME_MAX_GAP seconds is stale (FocusX was off, not just restarted) and ignored.
+    SESSION_CHECKPOINT_INTERVAL = 30
+    SESSION_CHECKPOINT_FSYNC_INTERVAL = 300
+    SESSION_RESUME_MAX_GAP = 300
+
+    # Every finished work session and break is logged to DATA_DIR/history.bin. The log is compacted
+    # every HISTORY_COMPACT_INTERVAL_DAYS; records older than HISTORY_RETENTION_DAYS are pruned then
+    # (None keeps everything - at 32 bytes a phase, years of history are still well under a megabyte).
+    HISTORY_RETENTION_DAYS = None
+    HISTORY_COMPACT_INTERVAL_DAYS = 7
+
+    # UI updates posted from any thread are applied at most once per frame (milliseconds);
+    # repeated writes to the same label within a frame collapse into the latest one.
+    UI_FRAME_MS = 16
+
+    # Respawn policy of the persistence supervisor (core/supervisor.py), in seconds.
+    # A FocusX that ran at least SUPERVISOR_HEALTHY_UPTIME is restarted immediately; one that
+    # died sooner is crash-looping, so restarts back off from BACKOFF_MIN, doubling up to BACKOFF_MAX.
+    SUPERVISOR_HEALTHY_UPTIME = 30
+    SUPERVISOR_BACKOFF_MIN = 1
+    SUPERVISOR_BACKOFF_MAX = 300
+
+    # Whether local clients (focusctl.py stop) may end a running session. Off by default: the window
+    # refuses to close mid-session, and the control API shouldn't be a way around that.
+    CONTROL_ALLOW_STOP = False
+
     # Scheduled task name for persistence.
     # This is the secret handshake for our app to keep running even after reboots or accidental shutdowns.
     TASK_NAME = "FocusX_Hardcore_Mode"
 
+    # Which auto-start mechanism backs Hardcore Persistence: None picks the platform's own
+    # (Task Scheduler on Windows, a systemd user unit on Linux); 'fake' keeps it in memory for tests.
+    PERSISTENCE_BACKEND = None
+    PERSISTENCE_UNIT_NAME = "focusx-hardcore.service"
+
+    # Where FocusX keeps its small state files (caches, checkpoints, history).
+    DATA_DIR = os.path.join(
+        os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.local', 'share'),
+        'FocusX'
+    )
+
     # Default window dimensions.
     WINDOW_WIDTH = 500
     WINDOW_HEIGHT = 400
@@ -0,0 +1,233 @@
+# core/control.py
+#
+# The control protocol and its blocking client. Deliberately light (no asyncio) so a
+# launcher can ask "is FocusX already running?" without paying for the engine;
+# the server side lives in core/control_server.py.
+
+import argparse
+import os
+import socket
+import struct
+from collections import namedtuple
+from core.storage import read_json
+
+# --- Wire protocol ---
+# Every message is a 4-byte header (type, request id, payload length) plus a payload.
+# Commands are answered with a STATE frame carrying the same request id; pushed updates
+# to subscribers use request id 0. Everything is fixed-size big-endian struct data, so a
+# round trip is a couple of tiny reads and writes - no JSON, no third-party codec.
+HEADER = struct.Struct('!BBH')
+START_ARGS = struct.Struct('!HH') # work minutes, rest minutes (0 = configured default)
+MAX_MINUTES = 24 * 60 # Longest work or break a command line may ask for; well inside START_ARGS' 16 bits.
+STATE = struct.Struct('!BIHHd') # flags, remaining seconds, work minutes, rest minutes, lockdown end (0 = none)
+
+MSG_AUTH = 0x01 # payload: the endpoint token (loopback TCP only)
+MSG_START = 0x02 # payload: START_ARGS
+MSG_STOP = 0x03
+MSG_QUERY = 0x04
+MSG_SUBSCRIBE = 0x05 # after the reply, STATE frames are pushed on every change
+MSG_STATE = 0x80
+MSG_ERROR = 0xFF # payload: UTF-8 message
+
+FLAG_RUNNING = 0x01
+FLAG_WORK_SESSION = 0x02
+FLAG_LOCKDOWN = 0x04
+
+SessionState = namedtuple('SessionState', [
+    'running', 'work_session', 'lockdown', 'remaining', 'work_minutes', 'rest_minutes', 'lockdown_until'
+])
+
+# Exit code of a FocusX that found another engine already running (see core/supervisor.py).
+ALREADY_RUNNING_EXIT_CODE = 3
+
+class ControlError(Exception):
+    """The engine refused a command, or there is no engine to talk to."""
+
+def positive_minutes(text):
+    """argparse type for a work or break length: 1 to MAX_MINUTES whole minutes."""
+    minutes = int(text)
+    if minutes <= 0:
+        raise argparse.ArgumentTypeError(f"must be at least 1 minute, not {minutes}")
+    if minutes > MAX_MINUTES:
+        raise argparse.ArgumentTypeError(f"must be at most {MAX_MINUTES} minutes, not {minutes}")
+    return minutes
+
+def pack_state(state):
+    flags = (
+        (FLAG_RUNNING if state.running else 0)
+        | (FLAG_WORK_SESSION if state.work_session else 0)
+        | (FLAG_LOCKDOWN if state.lockdown else 0)
+    )
+    return STATE.pack(flags, state.remaining, state.work_minutes, state.rest_minutes, state.lockdown_until or 0.0)
+
+def unpack_state(payload):
+    flags, remaining, work_minutes, rest_minutes, lockdown_until = STATE.unpack(payload)
+    return SessionState(
+        bool(flags & FLAG_RUNNING), bool(flags & FLAG_WORK_SESSION), bool(flags & FLAG_LOCKDOWN),
+        remaining, work_minutes, rest_minutes, lockdown_until or None
+    )
+
+def frame(msg_type, request_id, payload=b''):
+    return HEADER.pack(msg_type, request_id, len(payload)) + payload
+
+def socket_path(data_dir):
+    return os.path.join(data_dir, 'control.sock')
+
+def endpoint_path(data_dir):
+    return os.path.join(data_dir, 'control.json')
+
+def uses_unix_socket():
+    return hasattr(socket, 'AF_UNIX')
+
+class ControlClient:
+    """
+    Blocking client for the control API, for CLIs and other front-ends.
+    Raises ControlError if no engine is running or it refuses a command.
+    """
+    def __init__(self, data_dir, timeout=2.0):
+        self.data_dir = data_dir
+        self.timeout = timeout
+        self._sock = None
+        self._next_id = 0
+
+    def connect(self):
+        try:
+            if uses_unix_socket():
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout)
+                sock.connect(socket_path(self.data_dir))
+                token = None
+            else:
+                endpoint = read_json(endpoint_path(self.data_dir))
+                if not endpoint:
+                    raise ControlError("FocusX is not running.")
+                sock = socket.create_connection(('127.0.0.1', endpoint['port']), self.timeout)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                token = bytes.fromhex(endpoint['token'])
+        except OSError:
+            raise ControlError("FocusX is not running.")
+        self._sock = sock
+        if token is not None:
+            self._request(MSG_AUTH, token)
+        return self
+
+    def abort(self):
+        """Unblocks a subscribe() running on another thread; it ends with ControlError."""
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def query(self):
+        return self._request(MSG_QUERY)
+
+    def start(self, work_minutes=0, rest_minutes=0):
+        return self._request(MSG_START, START_ARGS.pack(work_minutes or 0, rest_minutes or 0))
+
+    def stop(self):
+        return self._request(MSG_STOP)
+
+    def subscribe(self):
+        """Yields the current SessionState, then a new one every time it changes."""
+        yield self._request(MSG_SUBSCRIBE)
+        self._sock.settimeout(None)
+        while True:
+            _, payload = self._read_frame()
+            yield unpack_state(payload)
+
+    def _request(self, msg_type, payload=b''):
+        self._next_id = self._next_id % 255 + 1 # 0 is reserved for pushed updates.
+        self._sock.sendall(frame(msg_type, self._next_id, payload))
+        while True:
+            request_id, payload = self._read_frame()
+            if request_id == self._next_id:
+                return unpack_state(payload)
+
+    def _read_frame(self):
+        msg_type, request_id, length = HEADER.unpack(self._read_exactly(HEADER.size))
+        payload = self._read_exactly(length)
+        if msg_type == MSG_ERROR:
+            raise ControlError(payload.decode('utf-8', 'replace'))
+        return request_id, payload
+
+    def _read_exactly(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self._sock.recv(size - len(data))
+            if not chunk:
+                raise ControlError("FocusX closed the connection.")
+            data += chunk
+        return data
+
+class InstanceLock:
+    """
+    One engine per user, enforced by the OS: an exclusive lock on DATA_DIR/engine.lock,
+    held for the engine's whole life and released by the OS however it ends (crash included).
+    Unlike asking the control endpoint, taking the lock is atomic - two launches racing each
+    other (the logon task and a manual start) can't both win.
+    """
+    def __init__(self, data_dir):
+        self.path = os.path.join(data_dir, 'engine.lock')
+        self._file = None
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def acquire(self):
+        """Takes the lock without waiting. Returns False if another engine holds it."""
+        if self._file is not None:
+            return True
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        f = open(self.path, 'a+b')
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        f, self._file = self._file, None
+        if f is None:
+            return
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
+        f.close()
+
+def engine_running(data_dir):
+    """True if another FocusX engine is already answering on this machine's control endpoint."""
+    try:
+        with ControlClient(data_dir, timeout=0.5) as client:
+            client.query()
+        return True
+    except (ControlError, OSError):
+        return False
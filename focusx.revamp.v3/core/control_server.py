@@ -0,0 +1,218 @@
+# core/control_server.py
+
+import asyncio
+import os
+import secrets
+import socket
+import struct
+from core.control import (
+    HEADER, MSG_AUTH, MSG_ERROR, MSG_QUERY, MSG_START, MSG_STATE, MSG_STOP, MSG_SUBSCRIBE,
+    START_ARGS, SessionState, endpoint_path, frame, pack_state, socket_path, uses_unix_socket
+)
+from core.session_view import SessionView
+from core.storage import atomic_write_json
+
+class ControlServer(SessionView):
+    """
+    Serves the running engine to local front-ends (focusctl.py, another GUI, a tray icon)
+    over a Unix socket - or, where there are none (Windows), over loopback TCP guarded by
+    a per-run token in the user's data directory. One engine, any number of thin clients.
+
+    It is also a SessionView: plugged into the app's view group it hears about every phase
+    and lockdown change and pushes the new state to subscribers.
+    Connections are handled on the engine loop; commands that touch the Timer run on the
+    main loop, since that's where the Timer lives. So do state snapshots: the engine only
+    ever serves a copy taken there, never reads the Timer or the night calendar itself.
+    """
+    # A subscriber this far behind (bytes unsent) is dropped rather than buffered forever.
+    MAX_SUBSCRIBER_BACKLOG = 64 * 1024
+    # How long (seconds) a reply waits for a fresh snapshot before serving the last one.
+    SNAPSHOT_TIMEOUT = 1.0
+
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self.data_dir = self.app.config.DATA_DIR
+        self._server = None
+        self._token = None
+        self._subscribers = set()
+        # The last snapshot taken on the main loop; idle until the first one is in.
+        self._state = SessionState(
+            False, True, False, 0,
+            self.app.config.DEFAULT_WORK_MINUTES, self.app.config.DEFAULT_REST_MINUTES, None,
+        )
+
+    def start(self):
+        self.app.engine.spawn(self._listen())
+
+    async def _listen(self):
+        if not self._owns_endpoint():
+            print("Not serving the control API: this process doesn't hold the engine lock.")
+            return
+        os.makedirs(self.data_dir, exist_ok=True)
+        try:
+            if uses_unix_socket():
+                path = socket_path(self.data_dir)
+                if os.path.exists(path):
+                    os.remove(path) # Left behind by an engine that died; we hold the engine lock, so nobody else owns it.
+                self._server = await asyncio.start_unix_server(self._on_client, path)
+                os.chmod(path, 0o600)
+                print(f"Control API listening on {path}")
+            else:
+                self._token = secrets.token_bytes(16)
+                self._server = await asyncio.start_server(self._on_client, '127.0.0.1', 0)
+                port = self._server.sockets[0].getsockname()[1]
+                atomic_write_json(endpoint_path(self.data_dir), {'port': port, 'token': self._token.hex()})
+                print(f"Control API listening on 127.0.0.1:{port}")
+        except OSError as e:
+            print(f"Could not start the control API: {e}")
+
+    def close(self):
+        if self._server is not None:
+            self.app.engine.call_soon(self._server.close) # The server belongs to the engine loop.
+            self._server = None
+        if uses_unix_socket() and self._owns_endpoint():
+            try:
+                os.remove(socket_path(self.data_dir))
+            except OSError:
+                pass
+
+    def _owns_endpoint(self):
+        # Only the engine holding the instance lock may replace (or remove) the shared socket.
+        lock = getattr(self.app, 'instance_lock', None)
+        return lock is not None and lock.held
+
+    # --- SessionView hooks: anything that changes the state worth pushing. ---
+
+    def session_started(self):
+        self._publish()
+
+    def session_stopped(self):
+        self._publish()
+
+    def show_status(self, text):
+        self._publish() # Phase flips announce themselves with a new status line.
+
+    def show_lockdown(self, until):
+        self._publish()
+
+    def hide_lockdown(self):
+        self._publish()
+
+    def _publish(self):
+        if not self._subscribers:
+            return
+        # Snapshot once the current main-loop handler has finished updating the Timer.
+        self.app.ui.call(self._snapshot_and_push, key='control.publish')
+
+    def _snapshot_and_push(self):
+        payload = frame(MSG_STATE, 0, pack_state(self._snapshot()))
+        self.app.engine.call_soon(self._push, payload)
+
+    def _snapshot(self):
+        # Main loop only: that's where the Timer and the night calendar are consistent.
+        self._state = self.state()
+        return self._state
+
+    async def _current_state(self):
+        """A snapshot taken on the main loop now, or the last one if it doesn't answer in time."""
+        try:
+            return await asyncio.wait_for(self._on_main_loop(self._snapshot), self.SNAPSHOT_TIMEOUT)
+        except asyncio.TimeoutError:
+            return self._state
+
+    def _push(self, payload):
+        for writer in tuple(self._subscribers):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > self.MAX_SUBSCRIBER_BACKLOG:
+                self._subscribers.discard(writer)
+                writer.close()
+                continue
+            writer.write(payload)
+
+    def state(self):
+        """The session as it stands. Main loop only; the engine uses _current_state()."""
+        timer = self.app.timer
+        night_mode = self.app.night_mode
+        return SessionState(
+            timer.is_running,
+            timer.is_work_session,
+            night_mode.lockdown_active,
+            timer.remaining_seconds(),
+            timer.work_duration // 60,
+            timer.rest_duration // 60,
+            night_mode.next_transition_time() if night_mode.lockdown_active else None,
+        )
+
+    # --- Connections ---
+
+    async def _on_client(self, reader, writer):
+        sock = writer.get_extra_info('socket')
+        if sock is not None and sock.family != getattr(socket, 'AF_UNIX', None):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        authenticated = self._token is None
+        try:
+            while True:
+                msg_type, request_id, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+                payload = await reader.readexactly(length) if length else b''
+                if not authenticated:
+                    if msg_type != MSG_AUTH or not secrets.compare_digest(payload, self._token):
+                        writer.write(frame(MSG_ERROR, request_id, b'not authenticated'))
+                        break
+                    authenticated = True
+                    writer.write(frame(MSG_STATE, request_id, pack_state(await self._current_state())))
+                    continue
+                writer.write(await self._handle(msg_type, request_id, payload, writer))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass # Client hung up.
+        except Exception as e:
+            print(f"Control connection failed: {e}")
+        finally:
+            self._subscribers.discard(writer)
+            writer.close()
+
+    async def _handle(self, msg_type, request_id, payload, writer):
+        try:
+            if msg_type == MSG_START:
+                work_minutes, rest_minutes = START_ARGS.unpack(payload)
+                refusal = await self._on_main_loop(
+                    self.app.timer.start_timer, work_minutes or None, rest_minutes or None, quiet=True
+                )
+                if refusal:
+                    return frame(MSG_ERROR, request_id, refusal.encode())
+            elif msg_type == MSG_STOP:
+                refusal = await self._on_main_loop(self._stop_session)
+                if refusal:
+                    return frame(MSG_ERROR, request_id, refusal.encode())
+            elif msg_type == MSG_SUBSCRIBE:
+                self._subscribers.add(writer)
+            elif msg_type not in (MSG_QUERY, MSG_AUTH):
+                return frame(MSG_ERROR, request_id, f"unknown message type {msg_type:#x}".encode())
+        except (struct.error, ValueError) as e:
+            return frame(MSG_ERROR, request_id, str(e).encode())
+        return frame(MSG_STATE, request_id, pack_state(await self._current_state()))
+
+    def _stop_session(self):
+        # Main loop. Like the window, the control API can't end a session that's under way -
+        # that's the whole point of Hardcore Mode - unless the config explicitly allows it.
+        if self.app.timer.is_running and not self.app.config.CONTROL_ALLOW_STOP:
+            return "There's no stopping now! The session can't be stopped remotely."
+        self.app.timer.stop_timer()
+        return None
+
+    async def _on_main_loop(self, callback, *args, **kwargs):
+        """Runs callback on the main loop (where the Timer lives) and returns its result."""
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+
+        def run():
+            result = None
+            try:
+                result = callback(*args, **kwargs)
+            finally:
+                loop.call_soon_threadsafe(self._resolve, done, result)
+        self.app.ui.call(run)
+        return await done
+
+    @staticmethod
+    def _resolve(future, result):
+        if not future.done(): # The waiter may have given up (see _current_state).
+            future.set_result(result)
@@ -0,0 +1,192 @@
+# core/event_loop.py
+
+import asyncio
+import os
+import selectors
+import threading
+from collections import deque
+
+class EngineLoop:
+    """
+    The single asyncio event loop that runs all of FocusX's background work: NTP syncs,
+    process watching, periodic jobs. Everything that used to be "one more daemon thread
+    with a sleep loop" is now a coroutine or a reader callback here.
+
+    The loop lives on one daemon thread and sleeps in the OS selector when there is
+    nothing to do, so an idle FocusX has no wakeups at all. Tk stays on the main thread;
+    results travel back through call_in_tk(), which hands them to the app's UiDispatcher.
+
+    Anyone who wants to notice things that happened while nothing ran - a suspend, a clock
+    being set - can add a wake hook: a cheap check run whenever the loop wakes up from an idle
+    wait, for whatever reason. The hooks ride along on wakeups that happen anyway.
+
+    It is also the app's single writer: state files and logs queued with write() are written
+    one at a time, in order, on the loop's worker threads - no module keeps a writer thread of its own.
+    """
+    # How long stop() lets queued writes finish before the loop is torn down, in seconds.
+    WRITE_DRAIN_TIMEOUT = 2.0
+
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self._wake_hooks = () # Immutable tuple, swapped on change, so the selector reads it without a lock.
+        # A selector loop on every platform, so each wakeup passes through _WakeSelector.
+        self.loop = asyncio.SelectorEventLoop(_WakeSelector(self._on_wake))
+        self._writes = deque() # (func, args) waiting for the writer; engine loop only
+        self._writer = None # The task draining _writes, while there is one
+        self._thread = threading.Thread(target=self._run, name="focusx-engine", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def in_engine_thread(self):
+        return threading.current_thread() is self._thread
+
+    def spawn(self, coroutine):
+        """
+        Schedules a coroutine on the engine loop from any thread.
+        Returns a concurrent.futures.Future; calling .cancel() on it cancels the task.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def call_soon(self, callback, *args):
+        """Runs a plain callback on the engine loop, from any thread."""
+        if self.in_engine_thread():
+            self.loop.call_soon(callback, *args)
+        else:
+            self.loop.call_soon_threadsafe(callback, *args)
+
+    def add_wake_hook(self, hook):
+        """
+        Runs hook() on the engine thread every time the loop wakes from an idle wait.
+        Keep it to a few clock reads: it runs on every wakeup. Safe from any thread.
+        """
+        self._wake_hooks = self._wake_hooks + (hook,)
+
+    def _on_wake(self):
+        for hook in self._wake_hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"Wake hook {getattr(hook, '__qualname__', hook)} failed: {e}")
+
+    def call_in_tk(self, callback, *args, key=None):
+        """Hands a callback to the Tk main thread; never touch widgets from the engine loop directly."""
+        self.app.ui.call(callback, *args, key=key)
+
+    def write(self, func, *args):
+        """
+        Queues a blocking write (a state file, a log append) from any thread. Writes run one at
+        a time, in the order they were queued, off the loop thread - so they never race each other.
+        """
+        self.call_soon(self._queue_write, func, args)
+
+    def flush_writes(self, timeout=5.0):
+        """
+        Blocks until every write queued so far has finished; returns False on timeout.
+        Never call it on the engine thread (it would wait on itself).
+        """
+        if not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self.write(done.set)
+        return done.wait(timeout)
+
+    def _queue_write(self, func, args):
+        self._writes.append((func, args))
+        if self._writer is None:
+            self._writer = self.loop.create_task(self._drain_writes())
+
+    async def _drain_writes(self):
+        try:
+            while self._writes:
+                func, args = self._writes.popleft()
+                try:
+                    await asyncio.to_thread(func, *args)
+                except Exception as e:
+                    print(f"Background write {getattr(func, '__qualname__', func)} failed: {e}")
+        finally:
+            self._writer = None
+
+    def stop(self, timeout=1.0):
+        """Cancels every task still running (sync loops, pollers, servers) and stops the loop."""
+        if not self._thread.is_alive():
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+        self._thread.join(timeout + self.WRITE_DRAIN_TIMEOUT)
+
+    async def _shutdown(self):
+        if self._writer is not None:
+            # Let queued writes land before everything is cancelled.
+            await asyncio.wait({self._writer}, timeout=self.WRITE_DRAIN_TIMEOUT)
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.loop.stop()
+
+class _WakeSelector(selectors.DefaultSelector):
+    """The platform's default selector, reporting every return from a wait that could block."""
+    def __init__(self, on_wake):
+        super().__init__()
+        self._on_wake = on_wake
+
+    def select(self, timeout=None):
+        events = super().select(timeout)
+        if timeout is None or timeout > 0: # A zero timeout is the loop staying busy, not waking.
+            self._on_wake()
+        return events
+
+class _AfterHandle:
+    """One pending EngineRoot.after() call; cancelling it is safe from any thread."""
+    def __init__(self, callback, args):
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self._timer = None
+
+    def arm(self, loop, delay):
+        if not self.cancelled:
+            self._timer = loop.call_later(delay, self._fire)
+
+    def _fire(self):
+        if not self.cancelled:
+            self.callback(*self.args)
+
+    def cancel(self):
+        self.cancelled = True
+        if self._timer is not None:
+            self._timer.cancel()
+
+class EngineRoot:
+    """
+    Stands in for the Tk root when there is no GUI (see daemon.py). It offers the slice of
+    the Tk API the engines rely on - after(), after_cancel(), mainloop(), quit() - served
+    by the engine loop, which then doubles as the app's main loop.
+    """
+    threadsafe_after = True # Unlike Tk's, our after() may be called from any thread.
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._done = threading.Event()
+
+    def after(self, ms, callback, *args):
+        handle = _AfterHandle(callback, args)
+        self.engine.call_soon(handle.arm, self.engine.loop, ms / 1000)
+        return handle
+
+    def after_cancel(self, handle):
+        # Flag first so a timer that is already due can't fire; drop the loop timer afterwards.
+        handle.cancelled = True
+        self.engine.call_soon(handle.cancel)
+
+    def mainloop(self):
+        """Blocks the calling thread until quit(); the work itself happens on the engine loop."""
+        # POSIX signals interrupt a blocking wait; Windows only delivers Ctrl+C between waits.
+        timeout = 1.0 if os.name == 'nt' else None
+        while not self._done.wait(timeout):
+            pass
+
+    def quit(self):
+        self._done.set()
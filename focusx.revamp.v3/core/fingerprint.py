@@ -0,0 +1,190 @@
+# core/fingerprint.py
+
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from core.storage import atomic_write_json, read_json
+
+# What we know about one executable file's content.
+Fingerprint = namedtuple('Fingerprint', ['path', 'sha256', 'size', 'mtime'])
+
+class FingerprintCache:
+    """
+    SHA-256 fingerprints of executables, so a blocked tool is recognised by its content
+    even after it has been renamed or copied somewhere else.
+
+    Entries are keyed by (path, inode, size, mtime): as long as a file is untouched it is
+    hashed exactly once, ever - the cache is persisted to disk between runs.
+    Hashing runs on a small bounded worker pool, so callers never wait on disk I/O.
+
+    The cache is capped at MAX_ENTRIES (oldest out first), entries for deleted files are pruned
+    every PRUNE_INTERVAL, and new digests reach the disk in batches - at most once every
+    SAVE_INTERVAL seconds, plus a final flush on shutdown() - rather than one rewrite per file.
+    """
+    CHUNK_SIZE = 1024 * 1024
+    MAX_ENTRIES = 4096
+    SAVE_INTERVAL = 30.0
+    PRUNE_INTERVAL = 3600.0
+    # Queued hashes of binaries in the OS's own directories beyond this are dropped: those are
+    # installed, not dropped in by a user. Anything else - a renamed copy in Downloads, say -
+    # is always queued, however busy a build keeps us.
+    MAX_PENDING = 64
+
+    def __init__(self, cache_path, max_workers=2):
+        self.cache_path = cache_path
+        self._entries = {} # key -> sha256 hex digest, oldest first
+        self._by_path = {} # normalized path -> its current key in _entries
+        self._pending = {} # key -> Future
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock() # One rewrite at a time: they all share cache_path's .tmp file.
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._last_prune = time.monotonic() - self.PRUNE_INTERVAL # Due at the first save: the loaded cache may name deleted files.
+        self._system_dirs = self._system_directories()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='focusx-hash')
+        self._load()
+
+    @staticmethod
+    def _key(path):
+        # Raises OSError if the file is gone; callers treat that as "no fingerprint".
+        st = os.stat(path)
+        return f"{os.path.normcase(os.path.abspath(path))}|{st.st_ino}|{st.st_size}|{st.st_mtime_ns}", st
+
+    def lookup(self, path):
+        """Returns the cached hex digest for `path`, or None. Never hashes; only a stat()."""
+        if not path:
+            return None
+        try:
+            key, _ = self._key(path)
+        except OSError:
+            return None
+        return self._entries.get(key)
+
+    def fingerprint(self, path):
+        """Hashes `path` (or reuses the cached digest) on the calling thread."""
+        key, st = self._key(path)
+        digest = self._entries.get(key)
+        if digest is None:
+            digest = self._hash_file(path)
+            with self._lock:
+                self._insert_locked(key, digest)
+            self._maybe_save()
+        return Fingerprint(path, digest, st.st_size, st.st_mtime_ns)
+
+    def fingerprint_async(self, path, callback=None):
+        """
+        Schedules `path` for hashing on the worker pool and returns a Future, or None if the
+        queue is full or the file is gone. `callback(fingerprint)` runs on a worker thread.
+        """
+        try:
+            key, _ = self._key(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                if len(self._pending) >= self.MAX_PENDING and self._is_system_binary(key):
+                    return None
+                future = self._executor.submit(self._fingerprint_job, key, path)
+                self._pending[key] = future
+
+        if callback is not None:
+            def deliver(done):
+                # Hashes still queued at shutdown are cancelled: nothing to deliver.
+                if not done.cancelled() and done.exception() is None and done.result() is not None:
+                    callback(done.result())
+            future.add_done_callback(deliver)
+        return future
+
+    def _fingerprint_job(self, key, path):
+        try:
+            return self.fingerprint(path)
+        except OSError as e:
+            print(f"Could not fingerprint {path}: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _hash_file(self, path):
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    @staticmethod
+    def _path_of(key):
+        return key.split('|', 1)[0]
+
+    @staticmethod
+    def _system_directories():
+        if os.name == 'nt':
+            names = ('SystemRoot', 'ProgramFiles', 'ProgramFiles(x86)', 'ProgramW6432')
+            dirs = [os.environ.get(name) for name in names]
+        else:
+            dirs = ['/usr', '/bin', '/sbin', '/lib', '/lib64']
+        return tuple(os.path.join(os.path.normcase(os.path.abspath(d)), '') for d in dirs if d)
+
+    def _is_system_binary(self, key):
+        return self._path_of(key).startswith(self._system_dirs)
+
+    def _insert_locked(self, key, digest):
+        # A file that changed on disk leaves an entry under its old key; drop it.
+        path = self._path_of(key)
+        old_key = self._by_path.get(path)
+        if old_key is not None and old_key != key:
+            self._entries.pop(old_key, None)
+        self._entries[key] = digest
+        self._by_path[path] = key
+        while len(self._entries) > self.MAX_ENTRIES:
+            evicted = next(iter(self._entries))
+            del self._entries[evicted]
+            self._by_path.pop(self._path_of(evicted), None)
+        self._dirty = True
+
+    def _maybe_save(self, force=False):
+        # Worker threads (or shutdown) only. Batches digests into one rewrite per SAVE_INTERVAL.
+        with self._save_lock:
+            now = time.monotonic()
+            with self._lock:
+                if not self._dirty or (not force and now - self._last_save < self.SAVE_INTERVAL):
+                    return
+                prune = now - self._last_prune >= self.PRUNE_INTERVAL
+            if prune:
+                self._prune_missing()
+                self._last_prune = now
+            with self._lock:
+                entries = dict(self._entries)
+                self._dirty = False
+                self._last_save = now
+            atomic_write_json(self.cache_path, entries)
+
+    def _prune_missing(self):
+        # Digests of binaries that were deleted since will never be looked up again.
+        with self._lock:
+            paths = list(self._by_path)
+        missing = [path for path in paths if not os.path.exists(path)]
+        if not missing:
+            return
+        with self._lock:
+            for path in missing:
+                key = self._by_path.pop(path, None)
+                if key is not None:
+                    self._entries.pop(key, None)
+            self._dirty = True
+
+    def _load(self):
+        for key, digest in read_json(self.cache_path, {}).items():
+            self._insert_locked(key, digest)
+        self._dirty = False
+
+    def shutdown(self):
+        """Stops hashing and writes out any digests that haven't been saved yet."""
+        # Queued hashes are dropped, but one already running gets to finish (and maybe save) first.
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._maybe_save(force=True)
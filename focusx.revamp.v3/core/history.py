@@ -0,0 +1,236 @@
+# core/history.py
+
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+from core.storage import atomic_write_json, read_json
+
+# File layout: an 8-byte header, then nothing but fixed-size records in the order phases ended.
+# Record i lives at HEADER.size + i * RECORD.size, so finding one is arithmetic, not parsing.
+HEADER = struct.Struct('<6sH') # magic, record size
+MAGIC = b'FXHIST'
+RECORD = struct.Struct('<ddIIHHBB2x') # 32 bytes
+
+PHASE_WORK = 0
+PHASE_BREAK = 1
+
+OUTCOME_COMPLETED = 0 # The phase ran to its deadline.
+OUTCOME_STOPPED = 1 # The user stopped the session part-way through.
+
+# One finished phase. start/end are wall-clock Unix times; durations are whole seconds.
+# interruptions counts the crashes/restarts FocusX resumed the phase across.
+HistoryRecord = namedtuple('HistoryRecord', [
+    'start', 'end', 'planned', 'actual', 'interruptions', 'kills', 'phase', 'outcome',
+])
+
+# Totals for one day, as shown by `focusctl.py stats`.
+DaySummary = namedtuple('DaySummary', [
+    'day', 'focus_seconds', 'break_seconds', 'completed', 'stopped', 'interruptions', 'kills',
+])
+
+def day_of(timestamp):
+    """The local calendar day ('YYYY-MM-DD') a wall-clock timestamp falls on."""
+    return time.strftime('%Y-%m-%d', time.localtime(timestamp))
+
+def _valid(record):
+    return record.phase in (PHASE_WORK, PHASE_BREAK) and record.end >= record.start > 0
+
+def _read_records(path, first=0, last=None):
+    """
+    The whole records from index `first` up to (not including) `last`, read through a
+    memory map of the file.
+    A torn record at the end (FocusX died mid-append) is ignored.
+    """
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                magic, record_size = HEADER.unpack_from(view)
+                if magic != MAGIC or record_size != RECORD.size:
+                    print(f"Ignoring session history {path}: unknown format.")
+                    return []
+                count = (size - HEADER.size) // RECORD.size
+                if last is not None:
+                    count = min(count, last)
+                if first >= count:
+                    return []
+                # Only the requested records are paged in, then unpacked in a single C-level pass.
+                start = HEADER.size + first * RECORD.size
+                end = HEADER.size + count * RECORD.size
+                return [HistoryRecord._make(fields) for fields in RECORD.iter_unpack(view[start:end])]
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError) as e:
+        print(f"Could not read session history {path}: {e}")
+        return []
+
+class SessionHistory:
+    """
+    Append-only log of every finished work session and break: when it ran, how long it was
+    meant to be versus how long it really lasted, how often it was interrupted and how many
+    blocked programs got killed.
+
+    The log is a flat file of 32-byte records - no database, nothing to parse - so years of
+    history map into memory and unpack in milliseconds. A small JSON index next to it remembers
+    which records belong to which day, and is brought up to date from the tail of the log when
+    it falls behind - in memory by anyone, on disk only by the engine's writer. Now and then the log is compacted: torn or corrupt records are dropped,
+    records past the retention window are pruned and the rest are sorted by start time.
+
+    Appends and compaction go through the engine loop's single writer (EngineLoop.write), so
+    they never overlap; reads can come from anywhere. Only the engine that writes the log may
+    append to or compact it: readers such as focusctl.py pass engine=None.
+    """
+    def __init__(self, path, engine=None, retention_days=None, compact_interval_days=7):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.engine = engine
+        self.retention_days = retention_days
+        self.compact_interval = compact_interval_days * 86400
+        self._index_lock = threading.Lock()
+        self._index_queued = False # A _save_index is already waiting in the writer queue
+        if self.engine is not None:
+            self.engine.write(self._maybe_compact)
+
+    def append(self, record):
+        """Queues one HistoryRecord for the end of the log; never blocks the caller."""
+        self.engine.write(self._append, record)
+
+    def close(self):
+        """Finishes the pending writes."""
+        if self.engine is not None:
+            self.engine.flush_writes()
+
+    def records(self, day=None):
+        """Every recorded phase, or just those that started on `day` ('YYYY-MM-DD')."""
+        if day is None:
+            return [record for record in _read_records(self.path) if _valid(record)]
+        span = self.index().get(day)
+        if span is None:
+            return []
+        first, last = span
+        return [
+            record for record in _read_records(self.path, first, last)
+            if _valid(record) and day_of(record.start) == day
+        ]
+
+    def days(self):
+        """The days with any history, oldest first."""
+        return sorted(self.index())
+
+    def summary(self, day):
+        """A DaySummary of everything that started on `day`."""
+        focus = rest = completed = stopped = interruptions = kills = 0
+        for record in self.records(day):
+            if record.phase == PHASE_WORK:
+                focus += record.actual
+                if record.outcome == OUTCOME_COMPLETED:
+                    completed += 1
+                else:
+                    stopped += 1
+            else:
+                rest += record.actual
+            interruptions += record.interruptions
+            kills += record.kills
+        return DaySummary(day, focus, rest, completed, stopped, interruptions, kills)
+
+    def index(self):
+        """
+        {day: [first, last]} - the record range (last exclusive) holding that day's phases.
+        Only records appended since the saved index was written get read. The caught-up index
+        is saved by the engine's writer; readers without an engine keep it in memory, so they
+        never race the writer's compaction for the .idx file.
+        """
+        state, changed = self._build_index()
+        if changed and self.engine is not None:
+            with self._index_lock:
+                queue, self._index_queued = not self._index_queued, True
+            if queue:
+                self.engine.write(self._save_index)
+        return state.get('days', {})
+
+    def _build_index(self):
+        # The saved index brought up to date with the log, and whether that took any reading.
+        state = read_json(self.index_path) or {}
+        days = state.get('days', {})
+        indexed = state.get('records', 0)
+        tail = _read_records(self.path, indexed)
+        if not tail and indexed and indexed > self._record_count():
+            # The log shrank under the index (compacted, or replaced by hand): start over.
+            days, indexed, tail = {}, 0, _read_records(self.path)
+        if not tail:
+            return state, False
+        for position, record in enumerate(tail, indexed):
+            if not _valid(record):
+                continue
+            span = days.setdefault(day_of(record.start), [position, position + 1])
+            span[0] = min(span[0], position)
+            span[1] = max(span[1], position + 1)
+        state.update(days=days, records=indexed + len(tail))
+        return state, True
+
+    def _save_index(self):
+        # Writer only. Rebuilt here rather than passed in: a compaction may have run since it was asked for.
+        with self._index_lock:
+            self._index_queued = False
+        state, changed = self._build_index()
+        if changed:
+            atomic_write_json(self.index_path, state)
+
+    def _record_count(self):
+        try:
+            return max(0, (os.path.getsize(self.path) - HEADER.size) // RECORD.size)
+        except OSError:
+            return 0
+
+    def _append(self, record):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'ab') as f:
+                if f.tell() == 0:
+                    f.write(HEADER.pack(MAGIC, RECORD.size))
+                f.write(RECORD.pack(*record))
+        except (OSError, struct.error) as e:
+            print(f"Could not record session history: {e}")
+
+    def _maybe_compact(self):
+        # A torn tail has to go before the next append, or every later record would be misaligned.
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        torn = size >= HEADER.size and (size - HEADER.size) % RECORD.size
+        state = read_json(self.index_path) or {}
+        if torn or time.time() - state.get('compacted_at', 0) >= self.compact_interval:
+            self.compact()
+
+    def compact(self):
+        """
+        Rewrites the log without torn or corrupt records and without anything older than the
+        retention window, sorted by start time, then rebuilds the day index.
+        Call through the engine's writer (or before any appends) - it replaces the file.
+        """
+        records = self.records()
+        if self.retention_days is not None:
+            cutoff = time.time() - self.retention_days * 86400
+            records = [record for record in records if record.end >= cutoff]
+        records.sort(key=lambda record: record.start)
+
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, RECORD.size))
+                f.write(b''.join(RECORD.pack(*record) for record in records))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            # On Windows a reader holding the map open blocks the replace; try again next time.
+            print(f"Could not compact session history: {e}")
+            return
+        atomic_write_json(self.index_path, {'records': 0, 'days': {}, 'compacted_at': time.time()})
+        self._save_index()
@@ -1,7 +1,5 @@
 # core/input_blocker.py
 
-from pynput.mouse import Listener as MouseListener
-from pynput.keyboard import Listener as KeyboardListener
 import time # For potential future delays in blocking/unblocking
 
 class InputBlocker:
@@ -25,6 +23,14 @@ class InputBlocker:
         if self.is_blocking:
             return # Input is already blocked, no need to re-block.
 
+        # pynput needs a desktop session; a headless daemon may not have one.
+        try:
+            from pynput.mouse import Listener as MouseListener
+            from pynput.keyboard import Listener as KeyboardListener
+        except Exception as e:
+            print(f"Input blocking unavailable: {e}")
+            return
+
         self.is_blocking = True
         print("Blocking mouse and keyboard input...")
 
@@ -0,0 +1,48 @@
+# core/jobs.py
+
+import asyncio
+
+class JobRunner:
+    """
+    Runs blocking chores (subprocesses, file writes) on a worker thread via the engine loop,
+    then hands the outcome back on the app's main loop, where it's safe to update the view.
+    Like sending an errand runner out instead of leaving the front desk unattended.
+
+    Jobs are named and at most one job per name runs at a time, so a double-click can't
+    start two installs. submit() and the completion callbacks both belong to the main loop.
+    """
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self._running = {} # name -> description, for whoever wants to show progress
+
+    def is_running(self, name):
+        return name in self._running
+
+    def description(self, name):
+        return self._running.get(name)
+
+    def submit(self, name, description, func, *args, on_done=None):
+        """
+        Starts func(*args) in the background unless a job called `name` is already running.
+        on_done(result, error) runs on the main loop afterwards; error is the exception or None.
+        Returns False if the job was already running.
+        """
+        if name in self._running:
+            return False
+        self._running[name] = description
+        self.app.engine.spawn(self._run(name, func, args, on_done))
+        return True
+
+    async def _run(self, name, func, args, on_done):
+        try:
+            result, error = await asyncio.to_thread(func, *args), None
+        except Exception as e:
+            result, error = None, e
+        self.app.ui.call(self._finish, name, on_done, result, error)
+
+    def _finish(self, name, on_done, result, error):
+        self._running.pop(name, None)
+        if on_done is not None:
+            on_done(result, error)
+        elif error is not None:
+            print(f"Background job '{name}' failed: {error}")
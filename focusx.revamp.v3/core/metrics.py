@@ -0,0 +1,140 @@
+# core/metrics.py
+
+import bisect
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+class Gauge:
+    """A single current value (e.g. a polling interval) that anyone can read at any time."""
+    def __init__(self, name, value=None):
+        self.name = name
+        self.value = value
+
+    def set(self, value):
+        self.value = value
+
+    def snapshot(self):
+        return {'name': self.name, 'value': self.value}
+
+class Counter:
+    """A running count (updates posted, updates dropped) that any thread can bump."""
+    def __init__(self, name):
+        self.name = name
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def increment(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return {'name': self.name, 'value': self.value}
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram, cheap enough to record from hot paths.
+    Percentiles are reported as the upper edge of the bucket they fall in, which is
+    plenty to answer "is p99 under 50 ms?" without keeping every sample around.
+    """
+    # Bucket upper edges in milliseconds; anything slower lands in the overflow bucket.
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self, name):
+        self.name = name
+        self._counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self._total = 0
+        self._sum_ms = 0.0
+        self._max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        ms = max(0.0, seconds * 1000)
+        index = bisect.bisect_left(self.BUCKETS_MS, ms)
+        with self._lock:
+            self._counts[index] += 1
+            self._total += 1
+            self._sum_ms += ms
+            if ms > self._max_ms:
+                self._max_ms = ms
+
+    @property
+    def count(self):
+        return self._total
+
+    def percentile(self, p):
+        """Upper bucket edge (ms) below which `p` percent of samples fall; None if empty."""
+        with self._lock:
+            if not self._total:
+                return None
+            rank = self._total * p / 100
+            seen = 0
+            for index, bucket_count in enumerate(self._counts):
+                seen += bucket_count
+                if seen >= rank:
+                    return self.BUCKETS_MS[index] if index < len(self.BUCKETS_MS) else self._max_ms
+        return self._max_ms
+
+    def snapshot(self):
+        """A plain dict of the current state, ready for logging or sending to a client."""
+        with self._lock:
+            buckets = {f"le_{edge}ms": count for edge, count in zip(self.BUCKETS_MS, self._counts)}
+            buckets['overflow'] = self._counts[-1]
+            count, total_ms, max_ms = self._total, self._sum_ms, self._max_ms
+        return {
+            'name': self.name,
+            'count': count,
+            'mean_ms': total_ms / count if count else None,
+            'max_ms': max_ms,
+            'p50_ms': self.percentile(50),
+            'p99_ms': self.percentile(99),
+            'buckets': buckets,
+        }
+
+    def summary(self):
+        snap = self.snapshot()
+        if not snap['count']:
+            return f"{self.name}: no samples"
+        return (f"{self.name}: n={snap['count']} mean={snap['mean_ms']:.1f}ms "
+                f"p50<={snap['p50_ms']}ms p99<={snap['p99_ms']}ms max={snap['max_ms']:.1f}ms")
+
+class StartupTimeline:
+    """
+    Where startup time goes: named phases with their start, duration and the top-level
+    modules each one imported. Cheap enough to leave on all the time; main.py prints
+    it (and saves it) with --profile-startup.
+    """
+    def __init__(self, origin=None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.phases = [] # (label, start_ms, duration_ms, new top-level modules)
+
+    @contextmanager
+    def phase(self, label):
+        before = set(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(label, start, time.perf_counter(), set(sys.modules) - before)
+
+    def add(self, label, start, end, modules=()):
+        top_level = sorted({name for name in modules if '.' not in name and not name.startswith('_')})
+        self.phases.append((label, (start - self.origin) * 1000, (end - start) * 1000, top_level))
+
+    def mark(self, label):
+        """A zero-length milestone, e.g. "first paint"."""
+        now = time.perf_counter()
+        self.add(label, now, now)
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.origin) * 1000
+
+    def report(self):
+        lines = [f"{'start ms':>9} {'took ms':>8}  phase"]
+        for label, start_ms, duration_ms, modules in self.phases:
+            line = f"{start_ms:9.1f} {duration_ms:8.1f}  {label}"
+            if modules:
+                line += f"  [imports: {', '.join(modules)}]"
+            lines.append(line)
+        return "\n".join(lines)
@@ -1,57 +1,220 @@
 # core/night_mode.py
 
-import threading
+import asyncio
+import bisect
+import math
+import os
 import time
-from datetime import datetime
-import ntplib
-import socket
+from datetime import date, datetime
 from tzlocal import get_localzone # External library for local timezone
+from core.clock import BootTimeClock, LocalTimeOfDay
+from core.ntp import NtpOffsetCache, median_delay, median_offset, query_servers
+
+SECONDS_PER_DAY = 86400
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+class LockdownCalendar:
+    """
+    When lockdown is on, as a compiled calendar.
+
+    Windows are ("HH:MM", "HH:MM") pairs per weekday (0 = Monday); an end at or before
+    the start wraps past midnight into the next day. Exceptions replace the windows that
+    start on a specific date ({'2026-12-31': []} gives you New Year's Eve off).
+    A time that isn't a real "HH:MM" (hours 0-23, minutes 0-59) is a ValueError when the
+    calendar is built, not a surprise at 3 a.m.
+
+    Every day's windows are merged and stored as two sorted arrays (starts, ends), so
+    "am I in lockdown?" and "when is the next boundary?" are bisections, not scans.
+    All times are *local seconds*: a Unix timestamp plus the local UTC offset.
+    """
+    SEARCH_DAYS = 400 # How far ahead next_boundary() looks before giving up.
+
+    def __init__(self, weekly_windows, exceptions=None):
+        self._weekly = [self._compile(weekly_windows.get(day, ())) for day in range(7)]
+        self._exceptions = {
+            date.fromisoformat(day).toordinal() - EPOCH_ORDINAL: self._compile(windows)
+            for day, windows in (exceptions or {}).items()
+        }
+
+    @staticmethod
+    def _parse(hhmm):
+        try:
+            hours, minutes = (int(part) for part in hhmm.split(':'))
+        except (AttributeError, ValueError):
+            raise ValueError(f"Lockdown time {hhmm!r} is not in HH:MM form.") from None
+        if not (0 <= hours <= 23 and 0 <= minutes <= 59):
+            raise ValueError(f"Lockdown time {hhmm!r} is out of range: hours go 00-23, minutes 00-59.")
+        return hours * 3600 + minutes * 60
+
+    @classmethod
+    def _compile(cls, windows):
+        intervals = []
+        for start_text, end_text in windows:
+            start, end = cls._parse(start_text), cls._parse(end_text)
+            if end <= start:
+                end += SECONDS_PER_DAY # Wraps past midnight.
+            intervals.append((start, end))
+        intervals.sort()
+
+        starts, ends = [], []
+        for start, end in intervals:
+            if ends and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end) # Overlapping or touching: merge.
+            else:
+                starts.append(start)
+                ends.append(end)
+        return starts, ends
+
+    def _day(self, epoch_day):
+        compiled = self._exceptions.get(epoch_day)
+        if compiled is None:
+            compiled = self._weekly[(epoch_day + 3) % 7] # 1970-01-01 was a Thursday.
+        return compiled
+
+    def _containing_end(self, local_seconds):
+        """End of the window containing local_seconds, or None. Looks at today and yesterday's spill."""
+        epoch_day = int(local_seconds // SECONDS_PER_DAY)
+        for day in (epoch_day, epoch_day - 1):
+            starts, ends = self._day(day)
+            offset = local_seconds - day * SECONDS_PER_DAY
+            index = bisect.bisect_right(starts, offset) - 1
+            if index >= 0 and offset < ends[index]:
+                return day * SECONDS_PER_DAY + ends[index]
+        return None
+
+    def is_locked(self, local_seconds):
+        return self._containing_end(local_seconds) is not None
+
+    def next_boundary(self, local_seconds):
+        """Local seconds at which the lockdown state next flips, or None if it never does."""
+        end = self._containing_end(local_seconds)
+        if end is not None:
+            # Follow windows that chain into each other (e.g. a wrap meeting the next day's window),
+            # as far as the forward search would look; a calendar locked all the time never flips.
+            horizon = local_seconds + self.SEARCH_DAYS * SECONDS_PER_DAY
+            while end < horizon:
+                following = self._containing_end(end)
+                if following is None or following <= end:
+                    return end
+                end = following
+            return None
+
+        epoch_day = int(local_seconds // SECONDS_PER_DAY)
+        for day in range(epoch_day, epoch_day + self.SEARCH_DAYS):
+            starts, _ = self._day(day)
+            offset = local_seconds - day * SECONDS_PER_DAY
+            index = bisect.bisect_right(starts, offset)
+            if index < len(starts):
+                return day * SECONDS_PER_DAY + starts[index]
+        return None
 
 class NightMode:
     """
     Manages the night-time blocking feature, encouraging rest during late hours.
-    It synchronizes time with NTP servers and displays a full-screen overlay
-    if the current time falls within defined "rest hours."
+    It synchronizes time with NTP servers and has the view display a full-screen
+    rest screen if the current time falls within defined "rest hours."
     This is like your digital night guard, making sure you get your beauty sleep!
     """
+    # What seconds_until_next_transition() reports when the calendar has no boundary ahead at all.
+    IDLE_RECHECK = SECONDS_PER_DAY
+
+    # A wall-clock vs monotonic skew change larger than this means the clock was set (or we slept).
+    CLOCK_JUMP_TOLERANCE = 2.0
+
     def __init__(self, app_instance):
         # Reference to the main application instance to interact with GUI,
         # input blocker, and configuration.
         self.app = app_instance 
 
         self.ntp_servers = self.app.config.NTP_SERVERS
+        self.clock = self.app.wall_clock # Shared NTP-corrected clock; we keep its offset fresh.
         self.time_offset = 0 # Offset in seconds from NTP server to local system time
         self.local_timezone = get_localzone() # Automatically detects local timezone
+        # Cheap hour/minute lookups: the UTC offset is only recomputed at DST transitions.
+        self.time_of_day = LocalTimeOfDay(self.local_timezone)
+        self.calendar = LockdownCalendar(self.app.config.LOCKDOWN_WINDOWS, self.app.config.LOCKDOWN_EXCEPTIONS)
 
-        self.night_overlay_window = None # Tkinter Toplevel window for the overlay
+        self.lockdown_active = False # Whether the rest screen is up and input blocked
+        self._transition_id = None # root.after() handle armed for the next lockdown boundary
+        self._armed_skew = None # wall clock minus session clock when that timer was armed
+
+        # The last good offset survives restarts, so we can trust the clock from the first frame.
+        self.offset_cache = NtpOffsetCache(
+            os.path.join(self.app.config.DATA_DIR, 'ntp_offset.json'),
+            BootTimeClock(),
+            self.app.config.NTP_MAX_PREDICTED_ERROR
+        )
+        self._boot_skew = None # wall clock minus boot clock; only moves when the clock is stepped
+        self._sync_wakeup = None # asyncio.Event on the engine loop; set to sync ahead of schedule
+        self._wake_skews = None # (boot - monotonic, wall - boot) at the engine's last wakeup
+        self._apply_cached_offset()
 
         # Start time synchronization and continuous monitoring.
-        # These are launched in background threads to avoid freezing the GUI.
-        self.sync_time()
+        # The refresh runs on the engine loop, so the window never waits on the network;
+        # until it lands we use the cached (or system) time and re-arm the lockdown timer once it does.
         self.start_time_monitoring()
 
-    def sync_time(self):
+    def _apply_cached_offset(self):
+        """
+        Hands the clock model (offset plus drift) to the shared wall clock, so the correction
+        glides smoothly between syncs. Returns True if there was a model to apply.
+        """
+        model = self.offset_cache.model()
+        if model is None:
+            return False
+        offset, drift, reference = model
+        self.time_offset = offset
+        self.clock.set_offset(
+            offset, self.offset_cache.server, drift, reference, self.offset_cache.boot_clock.now
+        )
+        return True
+
+    async def refresh_time(self, force=False):
+        """
+        Re-syncs with NTP only when it's worth it: while the cached offset's predicted error
+        stays under NTP_MAX_PREDICTED_ERROR we just carry it forward and skip the network.
+        """
+        error = self.offset_cache.predicted_error()
+        if not force and error < self.app.config.NTP_MAX_PREDICTED_ERROR:
+            self._apply_cached_offset()
+            self._request_rearm()
+            print(f"Cached time offset still good (±{error:.3f}s), skipping NTP sync.")
+            return
+        await self.sync_time()
+
+    async def sync_time(self):
         """
         Synchronizes the application's time with a reliable NTP server.
         This ensures our internal clock is highly accurate and resistant to
         local system time tampering, just like setting your watch by the atomic clock!
         """
         print("Attempting to synchronize time with NTP servers...")
-        for server in self.ntp_servers:
-            try:
-                ntp_client = ntplib.NTPClient()
-                # Request time from the NTP server with a timeout.
-                response = ntp_client.request(server, timeout=5)
-                # Calculate the offset between server time and local time.
-                self.time_offset = response.offset
-                print(f"Time synchronized with {server}, offset: {self.time_offset:.2f} seconds.")
-                return # Successfully synced, no need to try other servers.
-            except (ntplib.NTPException, socket.gaierror, socket.timeout) as e:
-                # If a server fails, it's like a bad Wi-Fi signal, just try the next one!
-                print(f"Failed to sync with {server}: {e}. Trying next server...")
-                continue
-        print("Warning: Could not sync with any time server. Using system time. Time might be slightly off.")
-        self.time_offset = 0 # Reset offset if no sync achieved.
+        # Ask every server at once; the quorum's median wins and the deadline caps the wait.
+        samples = await query_servers(
+            self.ntp_servers,
+            quorum=self.app.config.NTP_QUORUM,
+            deadline=self.app.config.NTP_DEADLINE
+        )
+        if samples:
+            offset = median_offset(samples)
+            servers = ", ".join(sample.server for sample in samples)
+            # The sample feeds the drift model; the clock follows the model, not the raw sample.
+            if not self.offset_cache.record(offset, median_delay(samples), servers):
+                print(f"Rejected outlier offset {offset:.3f}s from {servers}; keeping the model.")
+            self._apply_cached_offset()
+            drift = self.offset_cache.drift
+            drift_text = f", drift {drift * 1e6:.1f} ppm" if drift is not None else ""
+            print(f"Time synchronized with {servers}, offset: {self.time_offset:.2f} seconds{drift_text}. "
+                  f"Next sync in {self.offset_cache.next_sync_interval():.0f}s.")
+            self._request_rearm()
+            return
+        if self._apply_cached_offset():
+            print("Warning: Could not sync with any time server. Using the cached offset.")
+        else:
+            print("Warning: Could not sync with any time server. Using system time. Time might be slightly off.")
+            self.time_offset = 0 # Reset offset if no sync achieved.
+            self.clock.set_offset(0)
+        self._request_rearm()
 
     def get_accurate_time(self):
         """
@@ -59,108 +222,169 @@ class NightMode:
         This ensures all time-based features (like night mode) use the most reliable time source.
         It's like having a universal time zone converter built right into the app!
         """
-        current_time = datetime.now(self.local_timezone)
-        if self.time_offset:
-            # Apply the offset to the current timestamp to get adjusted time.
-            current_time = current_time.fromtimestamp(time.time() + self.time_offset)
-        return current_time
+        # The shared clock already includes the NTP offset, so one conversion does it.
+        # Hot paths use self.clock.now() with self.time_of_day instead of building datetimes.
+        return datetime.fromtimestamp(self.clock.now(), self.local_timezone)
 
-    def is_night_time(self):
+    def is_night_time(self, timestamp=None):
         """
-        Checks if the current accurate time falls within the defined "night hours" (12 AM to 6 AM).
+        Checks if the current accurate time falls within a lockdown window of the calendar.
         This acts as a gentle guardian, reminding you it's time to rest.
         """
-        current_time = self.get_accurate_time()
-        return 0 <= current_time.hour < 6 # Returns True if hour is between 0 (midnight) and 5 (inclusive).
+        if timestamp is None:
+            timestamp = self.clock.now()
+        return self.calendar.is_locked(self.time_of_day.local_seconds(timestamp))
+
+    def next_transition_time(self, timestamp=None):
+        """Timestamp at which lockdown next starts or ends, or None if the calendar never changes."""
+        if timestamp is None:
+            timestamp = self.clock.now()
+        boundary = self.calendar.next_boundary(self.time_of_day.local_seconds(timestamp))
+        if boundary is None:
+            return None
+        # Back from local seconds to a timestamp, using the UTC offset in force at the boundary.
+        guess = boundary - self.time_of_day.utc_offset(timestamp)
+        return boundary - self.time_of_day.utc_offset(guess)
 
-    def create_night_overlay(self):
+    def seconds_until_next_transition(self, timestamp=None):
         """
-        Creates a full-screen, uncloseable black overlay for night-time blocking.
+        Seconds from now until lockdown next starts (if it's day) or ends (if it's night).
+        Computed through timestamps so DST changes in between are accounted for.
+        """
+        if timestamp is None:
+            timestamp = self.clock.now()
+        boundary = self.next_transition_time(timestamp)
+        if boundary is None:
+            return self.IDLE_RECHECK
+        return max(0.0, boundary - timestamp)
+
+    def start_lockdown(self):
+        """
+        Enters night lockdown: the view puts up its rest screen and all input is blocked.
         This visually enforces the "get rest" message, like pulling down a digital blackout curtain.
         """
-        if self.night_overlay_window:
-            return # If the overlay is already active, do nothing.
-            
-        self.night_overlay_window = tk.Toplevel(self.app.root)
-        # Set attributes for full-screen, always-on-top, and no window decorations (like close button).
-        self.night_overlay_window.attributes('-fullscreen', True, '-topmost', True, '-toolwindow', True)
-        self.night_overlay_window.configure(bg='black')
-        
-        # Prevent manual closing of the overlay window.
-        self.night_overlay_window.protocol("WM_DELETE_WINDOW", lambda: None)
-
-        # Message label: informing the user why the screen is blocked.
-        message = tk.Label(
-            self.night_overlay_window,
-            text="It's late night hours (12 AM - 6 AM).\nPlease get some rest.",
-            font=('Arial', 28, 'bold'), # Larger and bolder for clear visibility.
-            fg='white',
-            bg='black',
-            justify='center',
-            wraplength=800 # Wraps text to fit within a certain width.
-        )
-        message.pack(expand=True)
-        
-        # Time display label: showing current time on the overlay.
-        time_label = tk.Label(
-            self.night_overlay_window,
-            font=('Arial', 22),
-            fg='white',
-            bg='black'
-        )
-        time_label.pack(pady=30)
-        
-        def update_time_display():
-            """Internal function to continuously update the time shown on the overlay."""
-            if self.night_overlay_window and self.night_overlay_window.winfo_exists():
-                current_time = self.get_accurate_time()
-                time_label.config(text=f"Current time: {current_time.strftime('%I:%M:%S %p')}")
-                # Schedule this function to run again after 1 second.
-                self.night_overlay_window.after(1000, update_time_display)
-        
-        update_time_display() # Start the time update loop.
-        self.app.input_blocker.block_input() # Block all user input when night overlay is active.
-        print("Night-time overlay created and input blocked.")
-
-    def remove_night_overlay(self):
-        """
-        Removes the night-time blocking overlay and unblocks user input.
+        if self.lockdown_active:
+            return # Already locked down, do nothing.
+        self.lockdown_active = True
+        self.app.view.show_lockdown(self.next_transition_time())
+        self.app.input_blocker.block_input() # Block all user input while lockdown is active.
+        print("Night lockdown started and input blocked.")
+
+    def end_lockdown(self):
+        """
+        Leaves night lockdown and unblocks user input.
         This signifies the end of the enforced rest period, like a new dawn!
         """
-        if self.night_overlay_window:
-            self.night_overlay_window.destroy() # Close the overlay window.
-            self.night_overlay_window = None # Clear the reference.
-            self.app.input_blocker.unblock_input() # Unblock user input.
-            print("Night-time overlay removed and input unblocked.")
+        if not self.lockdown_active:
+            return
+        self.lockdown_active = False
+        self.app.view.hide_lockdown()
+        self.app.input_blocker.unblock_input() # Unblock user input.
+        print("Night lockdown ended and input unblocked.")
 
     def start_time_monitoring(self):
         """
-        Starts background threads for continuous time monitoring and periodic NTP synchronization.
-        This ensures the night mode feature is always active and accurate in the background.
-        It's like having two vigilant sentinels: one watching the clock, the other adjusting it.
-        """
-        def monitor_time_loop():
-            """Loop to continuously check if it's night time."""
-            while True:
-                if self.is_night_time():
-                    # If it's night time and overlay isn't active, create it.
-                    if not self.night_overlay_window:
-                        # Use self.app.root.after(0, ...) to ensure GUI updates happen on the main thread.
-                        self.app.root.after(0, self.create_night_overlay)
-                else:
-                    # If it's not night time and overlay is active, remove it.
-                    if self.night_overlay_window:
-                        self.app.root.after(0, self.remove_night_overlay)
-                time.sleep(30)  # Check every 30 seconds for efficiency.
-
-        def periodic_sync_loop():
-            """Loop to periodically re-synchronize time with NTP servers."""
-            while True:
-                time.sleep(3600)  # Sync every hour – because time doesn't wait for anyone!
-                self.sync_time()
-        
-        # Start both monitoring loops in daemon threads so they exit when the main app exits.
-        threading.Thread(target=monitor_time_loop, daemon=True).start()
-        threading.Thread(target=periodic_sync_loop, daemon=True).start()
-        print("Time monitoring and periodic sync started.")
+        Arms the lockdown boundary timer and starts the periodic NTP synchronization task.
+        One main-loop timer is armed for the exact instant the next lockdown starts or ends,
+        like setting an alarm instead of checking the clock all night. A suspend or a clock
+        change is noticed the next time the engine wakes for anything (see _on_engine_wake);
+        LOCKDOWN_RECHECK_INTERVAL only backs that up on a machine where nothing wakes us at all.
+        """
+        # Apply the current state and arm the first boundary on the main loop.
+        self.app.root.after(0, self._on_transition)
+        self.app.engine.add_wake_hook(self._on_engine_wake)
+        self.app.engine.spawn(self._periodic_sync())
+        print("Night lockdown scheduled and periodic sync started.")
+
+    async def _periodic_sync(self):
+        """Re-synchronizes with NTP as often as the drift model asks (64 s - 24 h), or when woken early."""
+        self._sync_wakeup = asyncio.Event()
+        while True:
+            try:
+                await self.refresh_time()
+            except Exception as e:
+                print(f"Time refresh failed: {e}")
+            try:
+                await asyncio.wait_for(self._sync_wakeup.wait(), self.offset_cache.next_sync_interval())
+            except asyncio.TimeoutError:
+                pass
+            self._sync_wakeup.clear()
+
+    def _discard_drift_model(self):
+        # Engine loop only: the offset cache is owned by the sync task.
+        self.offset_cache.invalidate()
+        if self._sync_wakeup is not None:
+            self._sync_wakeup.set()
+
+    def _on_transition(self):
+        """
+        Runs on the main loop at a lockdown boundary (or a recheck before one):
+        apply the state the calendar says we should be in, and arm the next wakeup.
+        """
+        self._detect_clock_jump() # Everything is re-armed below anyway; this keeps the skews and drift model honest.
+        now = self.clock.now()
+        if self.is_night_time(now):
+            self.start_lockdown()
+        else:
+            self.end_lockdown()
+        self._arm_next_transition(now)
+
+    def _arm_next_transition(self, timestamp=None):
+        if self._transition_id is not None:
+            self.app.root.after_cancel(self._transition_id)
+        # Capped by a long backstop, in case a suspend or a clock step goes by without any wakeup.
+        delay = min(self.seconds_until_next_transition(timestamp), self.app.config.LOCKDOWN_RECHECK_INTERVAL)
+        # Round up so we land just after the boundary; an early wakeup would simply re-arm.
+        delay_ms = max(1, math.ceil(delay * 1000))
+        self._armed_skew = self.clock.now() - self.app.session_clock.now()
+        self._transition_id = self.app.root.after(delay_ms, self._on_transition)
+
+    def _request_rearm(self):
+        # The offset (or wall clock) moved, so the armed boundary may now be early or late.
+        # Safe to call from any thread; the actual re-arm happens on the main loop.
+        if self._transition_id is not None:
+            self.app.ui.call(self._on_transition, key='night_mode.transition')
+
+    def check_clock_jump(self):
+        """
+        Cheap check (two clock reads) for the wall clock being set or the machine having slept
+        since the boundary timer was armed; re-arms if so. The Timer calls it on every tick so a
+        jump mid-session is acted on at once; otherwise _on_engine_wake catches it.
+        """
+        if self._detect_clock_jump():
+            self._request_rearm()
+
+    def _on_engine_wake(self):
+        """
+        Engine thread, every time the engine loop wakes up: three clock reads to see whether the
+        machine slept (the boot clock ran on while the monotonic clock stood still) or the wall
+        clock was set (it moved against the boot clock). Either way the boundary timer is stale,
+        so the main loop re-checks the calendar and re-arms it.
+        """
+        boot = self.offset_cache.boot_clock.now()
+        skews = (boot - time.monotonic(), time.time() - boot)
+        previous, self._wake_skews = self._wake_skews, skews
+        if previous is None:
+            return
+        if any(abs(now - before) > self.CLOCK_JUMP_TOLERANCE for now, before in zip(skews, previous)):
+            self._request_rearm()
+
+    def _detect_clock_jump(self):
+        """True if the wall clock jumped against the session clock since the timer was armed."""
+        if self._armed_skew is None:
+            return False
+        jumped = False
+        skew = self.clock.now() - self.app.session_clock.now()
+        if abs(skew - self._armed_skew) > self.CLOCK_JUMP_TOLERANCE:
+            print("Clock jump detected, re-arming night lockdown timer.")
+            self._armed_skew = skew
+            jumped = True
 
+        # Against the suspend-inclusive boot clock only a real clock step moves the skew;
+        # then the drift model's samples are meaningless and we measure again from scratch.
+        boot_skew = time.time() - self.offset_cache.boot_clock.now()
+        if self._boot_skew is not None and abs(boot_skew - self._boot_skew) > self.CLOCK_JUMP_TOLERANCE:
+            print("System clock was stepped, discarding the NTP drift model.")
+            self.app.engine.call_soon(self._discard_drift_model)
+        self._boot_skew = boot_skew
+        return jumped
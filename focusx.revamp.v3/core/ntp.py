@@ -0,0 +1,262 @@
+# core/ntp.py
+
+import asyncio
+import os
+import socket
+import statistics
+import struct
+import time
+from collections import namedtuple
+from core.clock_discipline import ClockDiscipline
+from core.storage import atomic_write_json, read_json
+
+NTP_PORT = 123
+NTP_EPOCH_DELTA = 2208988800 # Seconds between 1900-01-01 (NTP epoch) and 1970-01-01 (Unix epoch).
+NTP_PACKET = struct.Struct('!B B b b 11I') # Header fields followed by the 32-bit words of the body.
+CLIENT_REQUEST_HEADER = 0x1b # LI = 0, version = 3, mode = 3 (client)
+MODE_SERVER = 4
+
+# One successful answer: how far our clock is off, the round-trip delay, and who said so.
+NtpSample = namedtuple('NtpSample', ['server', 'offset', 'delay'])
+
+def _to_ntp(timestamp):
+    ntp_time = timestamp + NTP_EPOCH_DELTA
+    seconds = int(ntp_time)
+    return seconds, int((ntp_time - seconds) * 2**32)
+
+def _from_ntp(seconds, fraction):
+    return seconds - NTP_EPOCH_DELTA + fraction / 2**32
+
+def _parse_server(server):
+    # Accepts 'host' or 'host:port' so a stand-in responder can live on 127.0.0.1:<any port>.
+    host, sep, port = server.rpartition(':')
+    if sep and port.isdigit() and host:
+        return host, int(port)
+    return server, NTP_PORT
+
+def _build_request(t1):
+    """A client request stamped with transmit time t1, plus the stamp a genuine reply must echo."""
+    tx_stamp = _to_ntp(t1)
+    request = bytearray(NTP_PACKET.size)
+    request[0] = CLIENT_REQUEST_HEADER
+    struct.pack_into('!II', request, 40, *tx_stamp)
+    return bytes(request), tx_stamp
+
+def _parse_reply(data, tx_stamp, t1, t4, server):
+    """
+    Turns a reply into an NtpSample, or None if it doesn't answer our request.
+    Raises ValueError for a genuine but unusable reply (kiss-of-death, wrong mode).
+    """
+    if len(data) < NTP_PACKET.size:
+        return None
+    fields = NTP_PACKET.unpack_from(data)
+    mode, stratum = fields[0] & 0x7, fields[1]
+    if fields[9:11] != tx_stamp:
+        return None # A stale or spoofed reply that doesn't answer our request.
+    if mode != MODE_SERVER or stratum == 0:
+        raise ValueError(f"unusable reply (mode {mode}, stratum {stratum})")
+    t2 = _from_ntp(*fields[11:13])
+    t3 = _from_ntp(*fields[13:15])
+    offset = ((t2 - t1) + (t3 - t4)) / 2
+    delay = (t4 - t1) - (t3 - t2)
+    return NtpSample(server, offset, delay)
+
+class _SntpProtocol(asyncio.DatagramProtocol):
+    """One request, one awaited answer; everything else that arrives on the socket is ignored."""
+    def __init__(self, server, loop):
+        self.server = server
+        self.result = loop.create_future()
+        self._transport = None
+        self._tx_stamp = None
+        self._t1 = None
+
+    def connection_made(self, transport):
+        self._transport = transport
+        self._t1 = time.time()
+        request, self._tx_stamp = _build_request(self._t1)
+        transport.sendto(request)
+
+    def datagram_received(self, data, addr):
+        if self.result.done():
+            return
+        try:
+            sample = _parse_reply(data, self._tx_stamp, self._t1, time.time(), self.server)
+        except ValueError as e:
+            self.result.set_exception(e)
+            return
+        if sample is not None:
+            self.result.set_result(sample)
+
+    def error_received(self, exc):
+        if not self.result.done():
+            self.result.set_exception(exc)
+
+async def query_server(server, timeout):
+    """
+    Sends a single SNTP request over a raw UDP socket and returns an NtpSample.
+    Raises OSError, asyncio.TimeoutError or ValueError on failure.
+    """
+    loop = asyncio.get_running_loop()
+    host, port = _parse_server(server)
+    family, sock_type, proto, _, address = (await loop.getaddrinfo(host, port, type=socket.SOCK_DGRAM))[0]
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: _SntpProtocol(server, loop), remote_addr=address, family=family, proto=proto
+    )
+    try:
+        return await asyncio.wait_for(protocol.result, timeout)
+    finally:
+        transport.close()
+
+async def query_servers(servers, quorum=3, deadline=3.0):
+    """
+    Asks every server at once and returns the samples from the first `quorum` to answer,
+    or however many answered before `deadline` seconds ran out (possibly none).
+    The whole call never takes longer than the deadline, however many servers are dead;
+    queries still outstanding at that point are cancelled.
+    """
+    pending = {asyncio.ensure_future(query_server(server, deadline)) for server in servers}
+    samples = []
+    loop = asyncio.get_running_loop()
+    finish_by = loop.time() + deadline
+    try:
+        while pending and len(samples) < quorum:
+            remaining = finish_by - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    samples.append(task.result())
+                except (OSError, ValueError, asyncio.TimeoutError) as e:
+                    print(f"NTP query failed: {e}")
+    finally:
+        for task in pending:
+            # Whatever is left - still running, or finished after our last look - is settled
+            # here, so its error is retrieved instead of logged as "never retrieved".
+            task.cancel()
+            task.add_done_callback(_discard_result)
+    return samples[:quorum] if len(samples) > quorum else samples
+
+def _discard_result(task):
+    if not task.cancelled():
+        task.exception()
+
+def median_offset(samples):
+    """Median offset of the samples: one confused server can't drag the clock around."""
+    return statistics.median(sample.offset for sample in samples)
+
+def median_delay(samples):
+    return statistics.median(sample.delay for sample in samples)
+
+class NtpOffsetCache:
+    """
+    The NTP clock model, saved to disk so a restart can trust the clock instantly
+    instead of waiting on the network.
+
+    It keeps the recent samples of a ClockDiscipline (offset vs boot-clock time), the
+    server they came from and the boot they were measured in. From those it predicts
+    today's offset and how far off that prediction might be - if the answer is
+    "not much", there's no need to ask the network again.
+    """
+    REBOOT_ERROR = 1.0 # Extra uncertainty when the samples predate the last reboot.
+    BOOT_MATCH_TOLERANCE = 300 # Boot epochs closer than this are taken to be the same boot.
+
+    def __init__(self, path, boot_clock, error_budget):
+        self.path = path
+        self.boot_clock = boot_clock # Suspend-inclusive, so drift during sleep is accounted for.
+        state = read_json(path) or {}
+        self.server = state.get('server')
+        self.boot_epoch = state.get('boot_epoch')
+        self.synced_wall = state.get('synced_wall')
+        self.discipline = ClockDiscipline(error_budget, state.get('samples', ()), state.get('interval'))
+
+    def _same_boot(self, boot_now):
+        if self.boot_epoch is None or not self.discipline.samples:
+            return False
+        return (
+            boot_now >= self.discipline.samples[-1][0]
+            and abs((time.time() - boot_now) - self.boot_epoch) < self.BOOT_MATCH_TOLERANCE
+        )
+
+    def model(self):
+        """
+        (offset, drift, boot-clock reference) describing the clock right now, or None with no
+        usable samples. The offset at a later boot-clock reading b is offset + drift * (b - reference).
+        """
+        if not self.discipline.samples:
+            return None
+        boot_now = self.boot_clock.now()
+        drift = self.discipline.drift or 0.0
+        if self._same_boot(boot_now):
+            return self.discipline.predict(boot_now), drift, boot_now
+        # Different boot: the boot clock restarted, so carry the last offset forward by wall time.
+        elapsed = max(0.0, time.time() - self.synced_wall)
+        return self.discipline.samples[-1][1] + drift * elapsed, drift, boot_now
+
+    def predicted_offset(self):
+        """The model's offset for right now, or None with no usable cache."""
+        model = self.model()
+        return model[0] if model else None
+
+    def predicted_error(self):
+        """Rough bound (seconds) on how wrong predicted_offset() is; infinite with no cache."""
+        if not self.discipline.samples:
+            return float('inf')
+        boot_now = self.boot_clock.now()
+        if self._same_boot(boot_now):
+            return self.discipline.error_at(boot_now)
+        elapsed = max(0.0, time.time() - self.synced_wall)
+        drift_error = self.discipline.slope_error + self.discipline.WANDER
+        return self.discipline.noise + drift_error * elapsed + self.REBOOT_ERROR
+
+    @property
+    def drift(self):
+        return self.discipline.drift
+
+    def next_sync_interval(self):
+        """
+        How long (seconds) from now the model says we can go before the next NTP query.
+        The stored interval counts from the last sync, not from now, so after a skipped sync
+        only what's left of it is waited out - and never past the moment predicted_error()
+        reaches the error budget. Never less than the model's minimum interval, so a network
+        that stays down isn't hammered.
+        """
+        discipline = self.discipline
+        if not discipline.samples:
+            return discipline.MIN_INTERVAL
+        boot_now = self.boot_clock.now()
+        if self._same_boot(boot_now):
+            since_sync = boot_now - discipline.samples[-1][0]
+        else:
+            since_sync = time.time() - self.synced_wall
+        headroom = discipline.error_budget - self.predicted_error()
+        to_budget = headroom / (discipline.slope_error + discipline.WANDER) if headroom > 0 else 0.0
+        remaining = discipline.interval - since_sync
+        wait = min(remaining, to_budget) if remaining > 0 else to_budget
+        return max(wait, discipline.MIN_INTERVAL)
+
+    def record(self, offset, delay, server):
+        """Feeds a fresh sync result into the model and saves it. Returns False for an outlier."""
+        boot_now = self.boot_clock.now()
+        if not self._same_boot(boot_now):
+            self.discipline.reset() # Samples from another boot don't share our boot clock's origin.
+        accepted = self.discipline.add_sample(boot_now, offset, delay)
+        self.server = server
+        self.boot_epoch = time.time() - boot_now
+        self.synced_wall = time.time()
+        atomic_write_json(self.path, {
+            'server': self.server,
+            'boot_epoch': self.boot_epoch,
+            'synced_wall': self.synced_wall,
+            'interval': self.discipline.interval,
+            'samples': self.discipline.samples,
+        })
+        return accepted
+
+    def invalidate(self):
+        """Forget every measurement (e.g. after the system clock was stepped under us)."""
+        self.discipline.reset()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
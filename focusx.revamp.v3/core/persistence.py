@@ -0,0 +1,189 @@
+# core/persistence.py
+
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+
+class PersistenceError(Exception):
+    """Installing or removing the auto-start entry failed; the message says why."""
+
+class PersistenceBackend:
+    """
+    Where "Hardcore Persistence" lives on this OS: something that starts the FocusX wrapper at
+    logon. The Scheduler only talks to this interface, so the same code path drives Windows'
+    Task Scheduler, a systemd user unit on Linux, or an in-memory fake in tests.
+
+    exists(), install() and remove() may block (they usually run a system tool), so callers
+    keep them off the Tk thread.
+    """
+    name = "base"
+    description = "auto-start entry"
+    requires_admin = False
+
+    @staticmethod
+    def is_supported():
+        return False
+
+    def exists(self):
+        raise NotImplementedError
+
+    def install(self, command):
+        """Registers `command` (an argv list) to run at logon. Returns the tool's output."""
+        raise NotImplementedError
+
+    def remove(self):
+        raise NotImplementedError
+
+def _run(args):
+    try:
+        process = subprocess.run(args, capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise PersistenceError((e.stderr or e.stdout or str(e)).strip())
+    except OSError as e:
+        raise PersistenceError(str(e))
+    return f"Output: {process.stdout.strip()}\nErrors: {process.stderr.strip()}"
+
+class SchtasksBackend(PersistenceBackend):
+    """Windows Task Scheduler: an ONLOGON task with highest privileges (needs Administrator)."""
+    name = "schtasks"
+    description = "scheduled task"
+    requires_admin = True
+
+    def __init__(self, task_name):
+        self.task_name = task_name
+
+    @staticmethod
+    def is_supported():
+        return os.name == 'nt'
+
+    def exists(self):
+        try:
+            result = subprocess.run(
+                ['schtasks', '/query', '/tn', self.task_name],
+                capture_output=True, text=True, check=False
+            )
+            return self.task_name.lower() in result.stdout.lower()
+        except Exception as e:
+            print(f"Error checking task scheduler: {e}")
+            return False
+
+    def install(self, command):
+        return _run([
+            'schtasks', '/CREATE',
+            '/TN', self.task_name,
+            '/TR', subprocess.list2cmdline(command),
+            '/SC', 'ONLOGON',
+            '/RL', 'HIGHEST',
+            '/F'
+        ])
+
+    def remove(self):
+        return _run(['schtasks', '/DELETE', '/TN', self.task_name, '/F'])
+
+class SystemdUserBackend(PersistenceBackend):
+    """
+    Linux stand-in: a systemd *user* unit started with the user's session.
+    Checking for it is a file lookup, not a subprocess; systemctl only runs on enable/disable.
+    """
+    name = "systemd"
+    description = "systemd user unit"
+
+    def __init__(self, unit_name, unit_dir=None):
+        self.unit_name = unit_name
+        self.unit_dir = unit_dir or os.path.join(
+            os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config'),
+            'systemd', 'user'
+        )
+
+    @property
+    def unit_path(self):
+        return os.path.join(self.unit_dir, self.unit_name)
+
+    @staticmethod
+    def is_supported():
+        return sys.platform.startswith('linux') and shutil.which('systemctl') is not None
+
+    def exists(self):
+        return os.path.exists(self.unit_path)
+
+    def install(self, command):
+        unit = (
+            "[Unit]\n"
+            "Description=FocusX Hardcore Persistence\n\n"
+            "[Service]\n"
+            f"ExecStart={shlex.join(command)}\n"
+            "Restart=always\n\n"
+            "[Install]\n"
+            "WantedBy=default.target\n"
+        )
+        try:
+            os.makedirs(self.unit_dir, exist_ok=True)
+            with open(self.unit_path, 'w') as f:
+                f.write(unit)
+        except OSError as e:
+            raise PersistenceError(str(e))
+        _run(['systemctl', '--user', 'daemon-reload'])
+        return _run(['systemctl', '--user', 'enable', self.unit_name])
+
+    def remove(self):
+        output = _run(['systemctl', '--user', 'disable', self.unit_name])
+        try:
+            os.remove(self.unit_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            raise PersistenceError(str(e))
+        _run(['systemctl', '--user', 'daemon-reload'])
+        return output
+
+class FakePersistenceBackend(PersistenceBackend):
+    """
+    In-memory backend for tests and demos; counts calls so caching can be checked, and can
+    pretend to be a slow task service (`latency` seconds per call).
+    """
+    name = "fake"
+    description = "fake auto-start entry"
+
+    def __init__(self, installed=False, latency=0.0):
+        self.installed = installed
+        self.latency = latency
+        self.command = None
+        self.calls = {'exists': 0, 'install': 0, 'remove': 0}
+
+    @staticmethod
+    def is_supported():
+        return True
+
+    def exists(self):
+        self.calls['exists'] += 1
+        time.sleep(self.latency)
+        return self.installed
+
+    def install(self, command):
+        self.calls['install'] += 1
+        time.sleep(self.latency)
+        self.installed, self.command = True, command
+        return "Output: installed\nErrors: "
+
+    def remove(self):
+        self.calls['remove'] += 1
+        time.sleep(self.latency)
+        self.installed = False
+        return "Output: removed\nErrors: "
+
+def create_persistence_backend(config):
+    """
+    The backend named by config.PERSISTENCE_BACKEND ('schtasks', 'systemd' or 'fake'), or the
+    platform's native one when it's None. Returns None if this platform has no backend.
+    """
+    choice = config.PERSISTENCE_BACKEND
+    if choice == 'fake':
+        return FakePersistenceBackend()
+    if choice in (None, 'schtasks') and SchtasksBackend.is_supported():
+        return SchtasksBackend(config.TASK_NAME)
+    if choice in (None, 'systemd') and SystemdUserBackend.is_supported():
+        return SystemdUserBackend(config.PERSISTENCE_UNIT_NAME)
+    return None
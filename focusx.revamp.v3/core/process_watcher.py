@@ -0,0 +1,447 @@
+# core/process_watcher.py
+
+import asyncio
+import os
+import socket
+import struct
+import sys
+import threading
+from collections import namedtuple
+import psutil
+from core.metrics import Gauge
+
+# --- Linux proc connector constants (see <linux/connector.h> and <linux/cn_proc.h>) ---
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_EXIT = 0x80000000
+NLMSG_DONE = 3
+
+NLMSG_HEADER = struct.Struct('=IHHII')       # len, type, flags, seq, pid
+CN_MSG_HEADER = struct.Struct('=IIIIHH')     # idx, val, seq, ack, len, flags
+PROC_EVENT_HEADER = struct.Struct('=IIQ')    # what, cpu, timestamp_ns
+EXEC_EVENT = struct.Struct('=ii')            # process_pid, process_tgid (exit events start the same way)
+
+# Everything we care to know about a process, resolved once per (pid, create_time).
+ProcessIdentity = namedtuple('ProcessIdentity', ['pid', 'create_time', 'name', 'exe', 'cmdline'])
+
+class ProcessIdentityCache:
+    """
+    Remembers who each live process is, keyed by (pid, create_time) so a recycled PID
+    is never mistaken for the process that used to own it.
+    Name, exe and cmdline are read once, when a process is first seen, and dropped
+    again when the watcher reports that it exited.
+    Not thread-safe: only the engine loop's thread may use it.
+    """
+    # Upper bound for event sources that can't report exits; beyond it we prune dead PIDs.
+    MAX_ENTRIES = 4096
+
+    def __init__(self):
+        self._identities = {} # pid -> ProcessIdentity
+
+    def __len__(self):
+        return len(self._identities)
+
+    def resolve(self, pid):
+        """Returns the ProcessIdentity for a live PID, or None if it is already gone."""
+        try:
+            proc = psutil.Process(pid)
+            create_time = proc.create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            self._identities.pop(pid, None)
+            return None
+
+        cached = self._identities.get(pid)
+        if cached is not None and cached.create_time == create_time:
+            return cached
+
+        try:
+            with proc.oneshot():
+                name = proc.name()
+                exe = self._read(proc.exe)
+                cmdline = self._read(proc.cmdline)
+        except psutil.NoSuchProcess:
+            self._identities.pop(pid, None)
+            return None
+
+        identity = ProcessIdentity(pid, create_time, name, exe, cmdline)
+        if len(self._identities) >= self.MAX_ENTRIES:
+            self.retain(psutil.pids())
+        self._identities[pid] = identity
+        return identity
+
+    @staticmethod
+    def _read(getter):
+        # exe/cmdline of system processes are often off-limits; the name is enough then.
+        try:
+            return getter()
+        except (psutil.AccessDenied, psutil.ZombieProcess, OSError):
+            return None
+
+    def evict(self, pids):
+        for pid in pids:
+            self._identities.pop(pid, None)
+
+    def retain(self, live_pids):
+        live_pids = set(live_pids)
+        self.evict([pid for pid in self._identities if pid not in live_pids])
+
+class ProcessWatcher:
+    """
+    Reports newly spawned processes to a callback, one PID at a time.
+    Consumers only ever look at *new* processes instead of re-walking the whole
+    process table - like a doorman who checks arrivals rather than re-counting the room.
+
+    Watchers run on the shared engine loop (core/event_loop.py): the callback is always
+    invoked on that loop's thread and receives the PID. start() and stop() may be called
+    from any thread. Consumers look the PID up in `identities`, which the watcher prunes
+    as processes exit.
+    """
+    name = "base"
+
+    def __init__(self, on_spawn, loop, identities=None):
+        self.on_spawn = on_spawn
+        self.loop = loop
+        self.identities = identities if identities is not None else ProcessIdentityCache()
+        self._active = False
+
+    def start(self):
+        if self._active:
+            return
+        self._active = True
+        try:
+            self._open()
+        except Exception:
+            self._active = False
+            raise
+        self._attach()
+
+    def stop(self):
+        if not self._active:
+            return
+        self._active = False
+        self._detach()
+
+    @property
+    def is_active(self):
+        return self._active
+
+    def _open(self):
+        """Acquire the event source on the calling thread, raising if it's unavailable."""
+        pass
+
+    def _attach(self):
+        """Start delivering events on the engine loop."""
+        raise NotImplementedError
+
+    def _detach(self):
+        """Stop delivering events and release the source."""
+        pass
+
+    def notify_activity(self):
+        """Tells the watcher a blocked program just showed up. Event sources are already instant."""
+        pass
+
+    def _emit(self, pid):
+        try:
+            self.on_spawn(pid)
+        except Exception as e:
+            # A misbehaving consumer must never take the watcher down with it.
+            print(f"Process watcher callback failed for PID {pid}: {e}")
+
+class NetlinkProcessWatcher(ProcessWatcher):
+    """
+    Linux event source built on the kernel proc connector.
+    The kernel pushes an exec event the instant a program starts and the engine loop's
+    selector wakes us right then, so there is no polling and no extra thread.
+    Needs root (CAP_NET_ADMIN) to subscribe.
+    """
+    name = "netlink"
+
+    def __init__(self, on_spawn, loop, identities=None):
+        super().__init__(on_spawn, loop, identities)
+        self._sock = None
+
+    @staticmethod
+    def is_supported():
+        return sys.platform.startswith('linux') and hasattr(socket, 'AF_NETLINK')
+
+    def _open(self):
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        try:
+            sock.bind((os.getpid(), CN_IDX_PROC))
+            sock.send(self._control_message(PROC_CN_MCAST_LISTEN))
+        except OSError:
+            sock.close()
+            raise
+        sock.setblocking(False)
+        self._sock = sock
+
+    def _attach(self):
+        self.loop.call_soon_threadsafe(self.loop.add_reader, self._sock.fileno(), self._on_readable, self._sock)
+
+    def _detach(self):
+        sock, self._sock = self._sock, None
+        if sock is None:
+            return
+
+        def close():
+            self.loop.remove_reader(sock.fileno())
+            try:
+                sock.send(self._control_message(PROC_CN_MCAST_IGNORE))
+            except OSError:
+                pass
+            sock.close()
+        self.loop.call_soon_threadsafe(close)
+
+    @staticmethod
+    def _control_message(op):
+        payload = struct.pack('=I', op)
+        cn_msg = CN_MSG_HEADER.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0) + payload
+        header = NLMSG_HEADER.pack(NLMSG_HEADER.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid())
+        return header + cn_msg
+
+    def _on_readable(self, sock):
+        # Drain everything queued since the selector woke us.
+        while self._active:
+            try:
+                data = sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                print(f"Netlink process events failed: {e}")
+                return
+            for what, pid in self.parse_events(data):
+                if what == PROC_EVENT_EXEC:
+                    self._emit(pid)
+                else:
+                    self.identities.evict((pid,))
+
+    @staticmethod
+    def parse_events(data):
+        """
+        Yields (PROC_EVENT_EXEC or PROC_EVENT_EXIT, pid) for every whole process in a
+        netlink datagram; per-thread events are skipped.
+        """
+        offset = 0
+        while offset + NLMSG_HEADER.size <= len(data):
+            msg_len = NLMSG_HEADER.unpack_from(data, offset)[0]
+            if msg_len < NLMSG_HEADER.size or offset + msg_len > len(data):
+                return # Corrupt or truncated: nothing after this can be trusted.
+            event_offset = offset + NLMSG_HEADER.size + CN_MSG_HEADER.size
+            if event_offset + PROC_EVENT_HEADER.size + EXEC_EVENT.size <= offset + msg_len:
+                what = PROC_EVENT_HEADER.unpack_from(data, event_offset)[0]
+                if what in (PROC_EVENT_EXEC, PROC_EVENT_EXIT):
+                    pid, tgid = EXEC_EVENT.unpack_from(data, event_offset + PROC_EVENT_HEADER.size)
+                    if pid == tgid: # Ignore individual threads of an existing process.
+                        yield what, tgid
+            offset += (msg_len + 3) & ~3 # Netlink messages are 4-byte aligned.
+
+class WmiProcessWatcher(ProcessWatcher):
+    """
+    Windows event source using WMI's Win32_ProcessStartTrace (kernel ETW under the hood).
+    Requires pywin32 and Administrator rights, which Hardcore Mode already asks for.
+    COM's NextEvent() can only block, so this one source keeps a small thread of its own;
+    every event is still handed to the engine loop, like all the others.
+
+    Subscribing can take seconds, so start() doesn't wait for it: the outcome is reported on
+    the engine loop - a line in the log once events flow, or on_failure(watcher, error) if
+    the subscription is refused (e.g. no admin), so the owner can fall back to polling.
+    """
+    name = "wmi"
+
+    # How long NextEvent blocks before re-checking the stop flag, in milliseconds.
+    WAIT_MS = 1000
+
+    @staticmethod
+    def is_supported():
+        if os.name != 'nt':
+            return False
+        try:
+            import win32com.client # noqa: F401 - only probing availability
+        except ImportError:
+            return False
+        return True
+
+    def __init__(self, on_spawn, loop, identities=None, on_failure=None):
+        super().__init__(on_spawn, loop, identities)
+        self.on_failure = on_failure
+
+    def _attach(self):
+        # COM objects are apartment-bound, so the subscription is made on the event thread itself.
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _on_ready(self):
+        print(f"Process watcher using {self.name} events.")
+
+    def _on_failed(self, error):
+        print(f"Could not start {self.name} process events: {error}.")
+        if self.on_failure is not None:
+            self.on_failure(self, error)
+
+    def _run(self):
+        import pythoncom
+        import win32com.client
+        pythoncom.CoInitialize()
+        try:
+            try:
+                events = win32com.client.GetObject("winmgmts:").ExecNotificationQuery(
+                    "SELECT ProcessID FROM Win32_ProcessStartTrace"
+                )
+            except Exception as e:
+                self._active = False
+                self.loop.call_soon_threadsafe(self._on_failed, e)
+                return
+            self.loop.call_soon_threadsafe(self._on_ready)
+
+            while self._active:
+                try:
+                    event = events.NextEvent(self.WAIT_MS)
+                except pythoncom.com_error:
+                    continue # Timed out waiting; loop to re-check the stop flag.
+                self.loop.call_soon_threadsafe(self._emit, int(event.ProcessID))
+        finally:
+            pythoncom.CoUninitialize()
+
+class PollingProcessWatcher(ProcessWatcher):
+    """
+    Portable fallback: diffs the live processes, keyed by (pid, create_time), with an adaptive cadence.
+    Only processes that weren't there last pass are reported, and PIDs that vanished are
+    evicted from `identities`. On a stable system a pass costs one PID listing and two set
+    differences; the creation time is read for new PIDs only, and nothing else.
+    A PID that exited and was reused between two passes (Windows recycles PIDs eagerly) looks
+    unchanged here, so it isn't re-reported; the (pid, create_time) checks in
+    ProcessIdentityCache.resolve() and before every kill keep such a PID from being taken for
+    the process that used to own it.
+
+    While nothing happens the interval doubles after every quiet pass, up to
+    `max_interval`; notify_activity() snaps it straight back to `min_interval`.
+    Quiet desk, slow patrol; someone reaching for Task Manager, fast patrol.
+
+    `pid_source` returns an iterable of live PIDs and `create_time_source(pid)` its creation
+    time (None if it's gone or off-limits); tests can swap in a fake spawner.
+    """
+    name = "polling"
+    BACKOFF_FACTOR = 2
+
+    def __init__(self, on_spawn, loop, min_interval=0.25, max_interval=8.0, pid_source=None, identities=None,
+                 create_time_source=None):
+        super().__init__(on_spawn, loop, identities)
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.cadence = Gauge("process_poll_interval_s", min_interval)
+        self.pid_source = pid_source or psutil.pids
+        self.create_time_source = create_time_source or self._read_create_time
+        self._known = {} # pid -> create_time (None for the baseline and for PIDs already gone)
+        self._future = None
+        self._wakeup = None # asyncio.Event, created on the engine loop
+        self._activity = False
+
+    @property
+    def interval(self):
+        return self.cadence.value
+
+    def _open(self):
+        # Everything alive right now is the baseline; consumers scan it separately if needed.
+        self._known = dict.fromkeys(self.pid_source())
+        self.cadence.set(self.min_interval)
+
+    def _attach(self):
+        self._future = asyncio.run_coroutine_threadsafe(self._run(), self.loop)
+
+    def _detach(self):
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+
+    def notify_activity(self):
+        # Safe from any thread (including our own callback): reset cadence and poll now.
+        self._activity = True
+        self.cadence.set(self.min_interval)
+        self.loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    @staticmethod
+    def _read_create_time(pid):
+        try:
+            return psutil.Process(pid).create_time()
+        except psutil.Error:
+            return None
+
+    def poll_once(self):
+        """Runs one diff pass and returns the new PIDs (also reported to the callback)."""
+        current = set(self.pid_source())
+        known = self._known
+        exited_pids = known.keys() - current
+        new_pids = current - known.keys()
+
+        for pid in exited_pids:
+            del known[pid]
+        spawned = set()
+        for pid in new_pids:
+            create_time = self.create_time_source(pid)
+            known[pid] = create_time
+            if create_time is not None: # Already gone (or off-limits): nothing to report.
+                spawned.add(pid)
+
+        if exited_pids:
+            self.identities.evict(exited_pids)
+        for pid in spawned:
+            self._emit(pid)
+        return spawned
+
+    def _next_interval(self):
+        if self._activity:
+            self._activity = False
+            return self.min_interval
+        return min(self.cadence.value * self.BACKOFF_FACTOR, self.max_interval)
+
+    async def _run(self):
+        self._wakeup = asyncio.Event()
+        # The identity cache is the engine loop's, so it is pruned here rather than in _open().
+        self.identities.retain(self._known)
+        while self._active:
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"Process poll failed: {e}")
+            self.cadence.set(self._next_interval())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.cadence.value)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+def create_process_watcher(on_spawn, loop, min_interval=0.25, max_interval=8.0, identities=None, on_failure=None):
+    """
+    Returns a started watcher using the best event source this machine allows,
+    falling back to adaptive PID-set polling when no event source can be opened.
+    A source that finishes starting in the background (WMI) reports a late failure through
+    on_failure(watcher, error) on the engine loop; create_polling_watcher() is the fallback.
+    """
+    if NetlinkProcessWatcher.is_supported():
+        watcher = NetlinkProcessWatcher(on_spawn, loop, identities)
+        try:
+            watcher.start()
+            print(f"Process watcher using {watcher.name} events.")
+            return watcher
+        except Exception as e:
+            print(f"Could not start {watcher.name} process events: {e}. Trying next source...")
+    if WmiProcessWatcher.is_supported():
+        watcher = WmiProcessWatcher(on_spawn, loop, identities, on_failure)
+        watcher.start()
+        return watcher
+    return create_polling_watcher(on_spawn, loop, min_interval, max_interval, identities)
+
+def create_polling_watcher(on_spawn, loop, min_interval=0.25, max_interval=8.0, identities=None):
+    """Returns a started PollingProcessWatcher, the source that works everywhere."""
+    watcher = PollingProcessWatcher(on_spawn, loop, min_interval, max_interval, identities=identities)
+    watcher.start()
+    print(f"Process watcher polling every {min_interval:g}-{max_interval:g}s.")
+    return watcher
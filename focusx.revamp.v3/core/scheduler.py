@@ -2,15 +2,27 @@
 
 import os
 import sys
-import subprocess
-import ctypes
-import time
+from core.jobs import JobRunner
+from core.persistence import PersistenceError, create_persistence_backend
 
 class Scheduler:
+    """
+    Hardcore Persistence: registers the FocusX wrapper to start at logon through a pluggable
+    PersistenceBackend (Task Scheduler, systemd, or a fake in tests).
+
+    Whether persistence is on is cached. Asking the OS means spawning e.g. `schtasks /query`,
+    hundreds of milliseconds each, so the answer is fetched in the background, kept until we
+    change it ourselves, and the button updates when it arrives. Enabling and disabling run
+    as background jobs too, with the button showing progress - the Tk thread never waits,
+    however slow the OS task service is.
+    """
     def __init__(self, app_instance):
         self.app = app_instance
         self.task_name = self.app.config.TASK_NAME
         self.script_path = os.path.abspath(sys.argv[0])
+        self.backend = create_persistence_backend(self.app.config)
+        self._enabled = None # Cached persistence state; None = not known yet.
+        self.jobs = JobRunner(self.app)
         
         # Determine the path to pythonw.exe (console-less Python interpreter)
         # This is crucial for launching the wrapper and the main app silently.
@@ -37,191 +49,188 @@ class Scheduler:
             return os.getuid() == 0
 
     def _check_admin_and_prompt_persistence(self):
-        if os.name != 'nt':
-            self.app.gui.show_warning("Platform Warning", "Hardcore persistence features (Task Scheduler) are only supported on Windows.")
+        if self.backend is None:
+            self.app.view.show_warning("Platform Warning", "Hardcore persistence features are not supported on this platform.")
             return
 
-        if not self._is_admin():
-            self.app.gui.show_warning(
+        if self.backend.requires_admin and not self._is_admin():
+            self.app.view.show_warning(
                 "Administrator Rights Required",
                 "To enable 'Hardcore Persistence' (auto-start and respawn),\n"
                 "please run this application as Administrator at least once.\n"
-                "This allows FocusX to set up a critical scheduled task for you."
+                f"This allows FocusX to set up a critical {self.backend.description} for you."
             )
-            if hasattr(self.app.gui, 'persistence_button'):
-                self.app.gui.persistence_button.config(state='disabled')
+            self.app.view.set_persistence_available(False)
         else:
-            if hasattr(self.app.gui, 'persistence_button'):
-                self.app.gui.persistence_button.config(state='normal')
+            self.app.view.set_persistence_available(True)
             self._update_persistence_button_text()
 
-    def _task_scheduler_exists(self):
-        if os.name != 'nt':
-            return False
-        
-        try:
-            result = subprocess.run(
-                ['schtasks', '/query', '/tn', self.task_name],
-                capture_output=True, text=True, check=False
-            )
-            return self.task_name.lower() in result.stdout.lower()
-        except Exception as e:
-            print(f"Error checking task scheduler: {e}")
-            return False
+    def persistence_enabled(self):
+        """Cached persistence state: True/False, or None until the first background check lands."""
+        return self._enabled
+
+    def refresh_persistence_state(self):
+        """Re-reads the state from the OS in the background; the view is updated when it arrives."""
+        if self.backend is None:
+            return
+        self.jobs.submit('refresh', "Checking persistence...", self.backend.exists, on_done=self._on_refreshed)
+
+    def invalidate_persistence_state(self):
+        self._enabled = None
+        self.refresh_persistence_state()
+
+    def _on_refreshed(self, enabled, error):
+        if error is not None:
+            print(f"Error checking persistence state: {error}")
+        elif not self.jobs.is_running('toggle'): # An install/remove in flight will report the truth.
+            self._set_persistence_state(enabled)
+
+    def _set_persistence_state(self, enabled):
+        self._enabled = enabled
+        self.app.view.show_persistence(enabled)
 
     def _add_to_task_scheduler(self):
-        if os.name != 'nt':
-            self.app.gui.show_warning("Platform Not Supported", "Task Scheduler is a Windows-specific feature.")
+        if self.backend is None:
+            self.app.view.show_warning("Platform Not Supported", "Hardcore persistence is not supported on this platform.")
             return
 
-        if not self._is_admin():
-            self.app.gui.show_error(
+        if self.backend.requires_admin and not self._is_admin():
+            self.app.view.show_error(
                 "Permission Denied",
                 "Please run FocusX as Administrator to set up 'Hardcore Persistence'.\n"
-                "This is necessary to create the scheduled task."
+                f"This is necessary to create the {self.backend.description}."
             )
             return
 
-        if self._task_scheduler_exists():
-            self.app.gui.show_info("Persistence Already On", "FocusX 'Hardcore Persistence' is already enabled!")
+        if self._enabled:
+            self.app.view.show_info("Persistence Already On", "FocusX 'Hardcore Persistence' is already enabled!")
             self._update_persistence_button_text()
             return
 
-        try:
-            wrapper_script_path = os.path.join(os.path.dirname(self.script_path), "focusx_wrapper.py")
-            self._create_wrapper_script(wrapper_script_path)
-
-            # Use the silent Python executable (pythonw.exe) to launch the wrapper script.
-            action_command_wrapper = f'"{self.python_executable_silent}" "{wrapper_script_path}"'
-            
-            command = [
-                'schtasks', '/CREATE',
-                '/TN', self.task_name,
-                '/TR', action_command_wrapper,
-                '/SC', 'ONLOGON',
-                '/RL', 'HIGHEST',
-                '/F'
-            ]
-
-            process = subprocess.run(command, capture_output=True, text=True, check=True)
-            self.app.gui.show_info(
+        self._submit_toggle("Enabling Hardcore Persistence...", self._install, self._on_installed)
+
+    def _install(self):
+        # Job thread: write the wrapper and register it. Use the silent Python executable
+        # (pythonw.exe) to launch the wrapper script.
+        wrapper_script_path = os.path.join(os.path.dirname(self.script_path), "focusx_wrapper.py")
+        self._create_wrapper_script(wrapper_script_path)
+        return self.backend.install([self.python_executable_silent, wrapper_script_path])
+
+    def _on_installed(self, output, error):
+        if error is None:
+            self._set_persistence_state(True) # We just made it so; no need to ask the OS.
+            self.app.view.show_info(
                 "Persistence Enabled!",
                 f"FocusX 'Hardcore Persistence' has been enabled!\n"
                 f"It will now auto-start when you log in and attempt to respawn if terminated.\n"
-                f"Output: {process.stdout.strip()}\nErrors: {process.stderr.strip()}"
+                f"{output}"
             )
-            self._update_persistence_button_text()
-        except subprocess.CalledProcessError as e:
-            self.app.gui.show_error(
+            return
+        self.invalidate_persistence_state() # A half-done install: find out what's really there.
+        if isinstance(error, PersistenceError):
+            self.app.view.show_error(
                 "Error Enabling Persistence",
-                f"Failed to add to Task Scheduler. Make sure you have administrator rights.\n"
-                f"Error: {e.stderr.strip()}"
+                f"Failed to create the {self.backend.description}. Make sure you have the required rights.\n"
+                f"Error: {error}"
             )
-        except Exception as e:
-            self.app.gui.show_error(
+        else:
+            self.app.view.show_error(
                 "Unexpected Error",
-                f"An unexpected error occurred while setting up persistence: {e}"
+                f"An unexpected error occurred while setting up persistence: {error}"
             )
 
     def _create_wrapper_script(self, path):
         # Pass the silent Python executable path to the wrapper script as well.
-        wrapper_content = f"""import subprocess
-import time
-import sys
-import os
-import win32process
+        # The wrapper is just a launcher for core/supervisor.py, which does the actual babysitting.
+        wrapper_content = f"""import sys
 
+app_dir = r"{os.path.dirname(self.script_path)}"
 main_app_path = r"{self.script_path}"
 python_exe = r"{self.python_executable_silent}" # Use the silent executable here
 
-def is_focusx_running():
-    try:
-        output = subprocess.check_output(
-            ['wmic', 'process', 'where', 'name="python.exe"', 'get', 'commandline', '/format:list'],
-            text=True
-        )
-        return main_app_path.lower() in output.lower()
-    except subprocess.CalledProcessError:
-        return False
-    except Exception as e:
-        return False
-
-def launch_focusx():
-    try:
-        # The wrapper should also use the silent executable when launching the main app.
-        subprocess.Popen([python_exe, main_app_path], 
-                         creationflags=subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP,
-                         close_fds=True)
-    except Exception as e:
-        pass
+sys.path.insert(0, app_dir)
+from core.config import AppConfig
+from core.supervisor import Supervisor
 
 if __name__ == "__main__":
-    time.sleep(10) 
-    while True:
-        if not is_focusx_running():
-            launch_focusx()
-        time.sleep(5)
+    Supervisor(
+        [python_exe, main_app_path],
+        AppConfig.DATA_DIR,
+        healthy_uptime=AppConfig.SUPERVISOR_HEALTHY_UPTIME,
+        backoff_min=AppConfig.SUPERVISOR_BACKOFF_MIN,
+        backoff_max=AppConfig.SUPERVISOR_BACKOFF_MAX,
+    ).run()
 """
         try:
             with open(path, 'w') as f:
                 f.write(wrapper_content)
             print(f"Wrapper script created at: {path}")
-        except Exception as e:
-            self.app.gui.show_error("Error Creating Wrapper", f"Could not create wrapper script: {e}")
-            raise
+        except OSError as e:
+            # Runs on a job thread, so report through the job's result rather than the view.
+            raise PersistenceError(f"Could not create wrapper script: {e}")
 
     def _remove_from_task_scheduler(self):
-        if os.name != 'nt':
-            self.app.gui.show_warning("Platform Not Supported", "Task Scheduler is a Windows-specific feature.")
+        if self.backend is None:
+            self.app.view.show_warning("Platform Not Supported", "Hardcore persistence is not supported on this platform.")
             return
 
-        if not self._is_admin():
-            self.app.gui.show_error(
+        if self.backend.requires_admin and not self._is_admin():
+            self.app.view.show_error(
                 "Permission Denied",
                 "Please run FocusX as Administrator to remove 'Hardcore Persistence'.\n"
-                "This is necessary to delete the scheduled task."
+                f"This is necessary to delete the {self.backend.description}."
             )
             return
 
-        if not self._task_scheduler_exists():
-            self.app.gui.show_info("Persistence Already Off", "FocusX 'Hardcore Persistence' is not enabled.")
+        if self._enabled is False:
+            self.app.view.show_info("Persistence Already Off", "FocusX 'Hardcore Persistence' is not enabled.")
             self._update_persistence_button_text()
             return
 
-        try:
-            process = subprocess.run(
-                ['schtasks', '/DELETE', '/TN', self.task_name, '/F'],
-                capture_output=True, text=True, check=True
-            )
-            self.app.gui.show_info(
+        self._submit_toggle("Disabling Hardcore Persistence...", self.backend.remove, self._on_removed)
+
+    def _on_removed(self, output, error):
+        if error is None:
+            self._set_persistence_state(False)
+            self.app.view.show_info(
                 "Persistence Disabled!",
                 f"FocusX 'Hardcore Persistence' has been disabled.\n"
                 f"It will no longer auto-start or respawn.\n"
-                f"Output: {process.stdout.strip()}\nErrors: {process.stderr.strip()}"
+                f"{output}"
             )
-            self._update_persistence_button_text()
-        except subprocess.CalledProcessError as e:
-            self.app.gui.show_error(
+            return
+        self.invalidate_persistence_state()
+        if isinstance(error, PersistenceError):
+            self.app.view.show_error(
                 "Error Disabling Persistence",
-                f"Failed to remove from Task Scheduler. Make sure you have administrator rights.\n"
-                f"Error: {e.stderr.strip()}"
+                f"Failed to remove the {self.backend.description}. Make sure you have the required rights.\n"
+                f"Error: {error}"
             )
-        except Exception as e:
-            self.app.gui.show_error(
+        else:
+            self.app.view.show_error(
                 "Unexpected Error",
-                f"An unexpected error occurred while disabling persistence: {e}"
+                f"An unexpected error occurred while disabling persistence: {error}"
             )
 
+    def _submit_toggle(self, description, func, on_done):
+        if self.jobs.submit('toggle', description, func, on_done=on_done):
+            self.app.view.show_persistence_busy(description)
+
     def _toggle_persistence(self):
-        if self._task_scheduler_exists():
+        if self.jobs.is_running('toggle'):
+            return # Already on it; the button says so.
+        if self._enabled is None:
+            # Still finding out; the button will show the real state in a moment.
+            self.refresh_persistence_state()
+        elif self._enabled:
             self._remove_from_task_scheduler()
         else:
             self._add_to_task_scheduler()
 
     def _update_persistence_button_text(self):
-        if hasattr(self.app.gui, 'persistence_button'):
-            if self._task_scheduler_exists():
-                self.app.gui.persistence_button.config(text="Disable Hardcore Persistence", bg=self.app.config.COLORS['danger'])
-            else:
-                self.app.gui.persistence_button.config(text="Enable Hardcore Persistence", bg=self.app.config.COLORS['primary'])
-
+        if self.jobs.is_running('toggle'):
+            self.app.view.show_persistence_busy(self.jobs.description('toggle'))
+        elif self._enabled is None:
+            self.refresh_persistence_state()
+        else:
+            self.app.view.show_persistence(self._enabled)
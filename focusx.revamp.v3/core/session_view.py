@@ -0,0 +1,154 @@
+# core/session_view.py
+
+class SessionView:
+    """
+    Everything the engines (Timer, NightMode, Scheduler) have to show a human, as hooks.
+    The engines only ever talk to `app.view`; the Tk GUI is one implementation and the
+    headless daemon's ConsoleView is another, so core/ never needs a window to run.
+
+    Hooks are called on the app's main loop (the Tk thread, or the engine loop when
+    headless). Every hook has a harmless default, so a view overrides only what it shows.
+    """
+    def is_watching(self):
+        """Is anyone looking at the countdown? If not, the Timer skips per-second ticks."""
+        return False
+
+    def show_time(self, text):
+        pass
+
+    def show_status(self, text):
+        pass
+
+    def session_started(self):
+        """A session began: lock whatever controls could interfere with it."""
+        pass
+
+    def session_stopped(self):
+        pass
+
+    def show_break_overlay(self):
+        pass
+
+    def hide_break_overlay(self):
+        pass
+
+    def show_lockdown(self, until):
+        """Night lockdown began; `until` is the timestamp it ends at, or None if unknown."""
+        pass
+
+    def hide_lockdown(self):
+        pass
+
+    def set_persistence_available(self, available):
+        pass
+
+    def show_persistence(self, enabled):
+        pass
+
+    def show_persistence_busy(self, description):
+        """Persistence is being changed in the background; show_persistence() follows when done."""
+        pass
+
+    def show_info(self, title, message):
+        print(f"{title}: {message}")
+
+    def show_warning(self, title, message):
+        print(f"Warning - {title}: {message}")
+
+    def show_error(self, title, message):
+        print(f"Error - {title}: {message}")
+
+    def show_yesno(self, title, message):
+        """Nobody to ask, so the answer is no."""
+        return False
+
+class ConsoleView(SessionView):
+    """
+    The headless daemon's view: status changes and messages go to stdout, nothing else.
+    There's no clock face to repaint, so the Timer only wakes at phase boundaries.
+    """
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self._last_status = None
+
+    def show_status(self, text):
+        if text != self._last_status:
+            self._last_status = text
+            print(f"[FocusX] {text}")
+
+    def show_lockdown(self, until):
+        if until is not None:
+            hour, minute, _ = self.app.night_mode.time_of_day.hms(until)
+            print(f"[FocusX] Lockdown until {hour:02d}:{minute:02d}.")
+        else:
+            print("[FocusX] Lockdown started.")
+
+    def hide_lockdown(self):
+        print("[FocusX] Lockdown over.")
+
+class ViewGroup(SessionView):
+    """
+    Several views watching the same session (e.g. the GUI plus remote control clients).
+    Hooks go to every view in order; questions are answered by the first one.
+    """
+    def __init__(self, *views):
+        self.views = views
+
+    def is_watching(self):
+        return any(view.is_watching() for view in self.views)
+
+    def show_time(self, text):
+        for view in self.views:
+            view.show_time(text)
+
+    def show_status(self, text):
+        for view in self.views:
+            view.show_status(text)
+
+    def session_started(self):
+        for view in self.views:
+            view.session_started()
+
+    def session_stopped(self):
+        for view in self.views:
+            view.session_stopped()
+
+    def show_break_overlay(self):
+        for view in self.views:
+            view.show_break_overlay()
+
+    def hide_break_overlay(self):
+        for view in self.views:
+            view.hide_break_overlay()
+
+    def show_lockdown(self, until):
+        for view in self.views:
+            view.show_lockdown(until)
+
+    def hide_lockdown(self):
+        for view in self.views:
+            view.hide_lockdown()
+
+    def set_persistence_available(self, available):
+        for view in self.views:
+            view.set_persistence_available(available)
+
+    def show_persistence(self, enabled):
+        for view in self.views:
+            view.show_persistence(enabled)
+
+    def show_persistence_busy(self, description):
+        for view in self.views:
+            view.show_persistence_busy(description)
+
+    def show_info(self, title, message):
+        self.views[0].show_info(title, message)
+
+    def show_warning(self, title, message):
+        self.views[0].show_warning(title, message)
+
+    def show_error(self, title, message):
+        self.views[0].show_error(title, message)
+
+    def show_yesno(self, title, message):
+        return self.views[0].show_yesno(title, message)
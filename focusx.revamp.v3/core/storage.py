@@ -0,0 +1,38 @@
+# core/storage.py
+
+import json
+import os
+
+def read_json(path, default=None):
+    """
+    Loads a small JSON state file, returning `default` if it's missing or unreadable.
+    A corrupt cache is never worth crashing over; we just start fresh.
+    """
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable state file {path}: {e}")
+        return default
+
+def atomic_write_json(path, data, fsync=False):
+    """
+    Writes JSON to a temp file and renames it over `path`, so readers (and a FocusX that
+    was killed mid-write) only ever see the old file or the complete new one.
+    Returns True on success.
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return True
+    except OSError as e:
+        print(f"Could not save {path}: {e}")
+        return False
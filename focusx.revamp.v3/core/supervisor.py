@@ -0,0 +1,117 @@
+# core/supervisor.py
+
+import os
+import select
+import subprocess
+import threading
+import time
+from core.control import ALREADY_RUNNING_EXIT_CODE, ControlClient, ControlError
+from core.metrics import Counter, LatencyHistogram
+
+class Supervisor:
+    """
+    Keeps FocusX alive: launches it as a child and blocks on the child itself (a pidfd on
+    Linux, the process handle on Windows, waitpid elsewhere) until it exits - then starts
+    it again straight away. No polling, no `wmic`, no subprocesses while all is well;
+    the supervisor sleeps in the kernel until there's actually something to do.
+
+    A child that dies young is crash-looping, so respawns back off exponentially from
+    `backoff_min` up to `backoff_max` seconds; one healthy run (`healthy_uptime` seconds)
+    resets the backoff. If FocusX reports that an engine is already running (started by
+    hand, say), the supervisor attaches to that engine's control socket instead and
+    respawns the moment the connection drops.
+    """
+    def __init__(self, command, data_dir, healthy_uptime=30.0, backoff_min=1.0, backoff_max=300.0):
+        self.command = command
+        self.data_dir = data_dir
+        self.healthy_uptime = healthy_uptime
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+
+        self.restarts = Counter("supervisor_restarts")
+        self.respawn_latency = LatencyHistogram("exit_to_respawn")
+        self._crashes = 0 # Consecutive short-lived runs.
+        self._stopped = threading.Event()
+        self._wake_read, self._wake_write = os.pipe() # Lets stop() interrupt a pidfd wait.
+        self._client = None
+        self.process = None
+
+    def run(self):
+        """Supervises until stop() is called. Blocks the calling thread."""
+        exited_at = None
+        while not self._stopped.is_set():
+            started_at = time.monotonic()
+            try:
+                self.process = self._launch()
+            except OSError as e:
+                print(f"Could not launch FocusX: {e}")
+                if self._stopped.wait(self._respawn_delay(0.0)):
+                    break
+                continue
+            if exited_at is not None:
+                self.restarts.increment()
+                self.respawn_latency.record(time.monotonic() - exited_at)
+
+            returncode = self._wait(self.process)
+            if returncode is None:
+                break # stop() was called while the child was running.
+            if returncode == ALREADY_RUNNING_EXIT_CODE:
+                self._wait_for_engine_exit()
+            exited_at = time.monotonic()
+
+            uptime = exited_at - started_at
+            delay = self._respawn_delay(uptime)
+            print(f"FocusX exited with code {returncode} after {uptime:.1f}s; restarting in {delay:.1f}s.")
+            if delay and self._stopped.wait(delay):
+                break
+
+    def stop(self):
+        """Stops supervising (from any thread). The running child, if any, is left alone."""
+        self._stopped.set()
+        os.write(self._wake_write, b'x')
+        client = self._client
+        if client is not None:
+            client.abort()
+
+    def _launch(self):
+        if os.name == 'nt':
+            flags = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+            return subprocess.Popen(self.command, creationflags=flags, close_fds=True)
+        return subprocess.Popen(self.command, start_new_session=True, close_fds=True)
+
+    def _wait(self, process):
+        """Blocks until the child exits and returns its exit code, or None if stopped first."""
+        if hasattr(os, 'pidfd_open'):
+            try:
+                pidfd = os.pidfd_open(process.pid)
+            except OSError:
+                pidfd = None # Old kernel: fall through to a plain blocking wait.
+            if pidfd is not None:
+                try:
+                    ready, _, _ = select.select([pidfd, self._wake_read], [], [])
+                finally:
+                    os.close(pidfd)
+                if pidfd not in ready:
+                    return None
+        # Reaps the child (instant after a pidfd wakeup); on Windows, waits on the process handle.
+        returncode = process.wait()
+        return None if self._stopped.is_set() else returncode
+
+    def _wait_for_engine_exit(self):
+        # Another engine owns the session; its control socket closes when it dies.
+        try:
+            with ControlClient(self.data_dir) as client:
+                self._client = client
+                for _ in client.subscribe():
+                    pass
+        except (ControlError, OSError):
+            pass
+        finally:
+            self._client = None
+
+    def _respawn_delay(self, uptime):
+        if uptime >= self.healthy_uptime:
+            self._crashes = 0
+            return 0.0
+        self._crashes += 1
+        return min(self.backoff_min * 2 ** (self._crashes - 1), self.backoff_max)
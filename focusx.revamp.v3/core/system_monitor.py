@@ -0,0 +1,136 @@
+# core/system_monitor.py
+
+import threading
+import psutil
+from core.process_watcher import ProcessIdentityCache, create_polling_watcher, create_process_watcher
+
+class MonitorConsumer:
+    """
+    Plugin interface for anything that wants to know about processes.
+    Subclass it (or just provide the same methods) and register with SystemMonitor;
+    override only the hooks you need. Hooks run on the engine loop's thread,
+    so keep them quick and never touch Tk from them.
+    """
+    def on_snapshot(self, identities):
+        """Called once, shortly after register(), with every process alive at that moment."""
+        pass
+
+    def on_process_started(self, identity):
+        """Called for each new process, already resolved to a ProcessIdentity."""
+        pass
+
+class SystemMonitor:
+    """
+    The one and only process watcher in FocusX.
+    Instead of every feature running its own thread and its own walk over the process
+    table, a single watcher resolves each new process once and fans it out to all
+    registered consumers - one lookout shouting to the whole crew.
+
+    The watcher only runs while at least one consumer is registered.
+    register()/unregister() may be called from any thread (the timer calls them from Tk);
+    everything that resolves processes - the snapshot, spawn events and the identity cache
+    behind them - belongs to the engine loop's thread alone.
+    """
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self.identities = ProcessIdentityCache()
+        self._consumers = () # Immutable tuple, swapped on change, so fan-out needs no lock.
+        self._watcher = None
+        self._lock = threading.Lock()
+
+    def register(self, consumer):
+        with self._lock:
+            if consumer in self._consumers:
+                return
+            self._consumers = self._consumers + (consumer,)
+            self._ensure_watcher()
+        # Reading every process's name/exe/cmdline can take a while; never do it on the caller's (Tk) thread.
+        self.app.engine.call_soon(self._send_snapshot, consumer)
+
+    def unregister(self, consumer):
+        with self._lock:
+            if consumer not in self._consumers:
+                return
+            self._consumers = tuple(c for c in self._consumers if c is not consumer)
+            if not self._consumers and self._watcher is not None:
+                self._watcher.stop()
+                self._watcher = None
+
+    def snapshot(self):
+        """
+        Identities of every live process; resolved through the shared cache, so it's cheap after the first call.
+        Engine loop thread only: the cache isn't locked.
+        """
+        identities = []
+        for pid in psutil.pids():
+            identity = self.identities.resolve(pid)
+            if identity is not None:
+                identities.append(identity)
+        return identities
+
+    def notify_activity(self):
+        """A consumer caught something: tighten the watcher's cadence if it polls."""
+        watcher = self._watcher
+        if watcher is not None:
+            watcher.notify_activity()
+
+    def poll_cadence(self):
+        """Current polling interval in seconds, or None when driven by process events (or idle)."""
+        cadence = getattr(self._watcher, 'cadence', None)
+        return cadence.value if cadence is not None else None
+
+    @property
+    def watcher_name(self):
+        return self._watcher.name if self._watcher is not None else None
+
+    def _ensure_watcher(self):
+        if self._watcher is not None:
+            return
+        self._watcher = create_process_watcher(
+            self._on_spawn,
+            self.app.engine.loop,
+            self.app.config.PROCESS_POLL_MIN_INTERVAL,
+            self.app.config.PROCESS_POLL_MAX_INTERVAL,
+            identities=self.identities,
+            on_failure=self._on_watcher_failed,
+        )
+
+    def _on_watcher_failed(self, watcher, error):
+        # Engine loop: an event source that started in the background gave up. Poll instead.
+        with self._lock:
+            if self._watcher is not watcher:
+                return # Already stopped (or replaced) in the meantime.
+            self._watcher = create_polling_watcher(
+                self._on_spawn,
+                self.app.engine.loop,
+                self.app.config.PROCESS_POLL_MIN_INTERVAL,
+                self.app.config.PROCESS_POLL_MAX_INTERVAL,
+                identities=self.identities,
+            )
+            consumers = self._consumers
+        # Whatever started while the event source was failing was never reported: rescan.
+        for consumer in consumers:
+            self._send_snapshot(consumer)
+
+    def _send_snapshot(self, consumer):
+        if consumer not in self._consumers:
+            return # Unregistered again before the engine got to it.
+        self._deliver(consumer.on_snapshot, self.snapshot())
+
+    def _on_spawn(self, pid):
+        consumers = self._consumers
+        if not consumers:
+            return
+        identity = self.identities.resolve(pid)
+        if identity is None:
+            return
+        for consumer in consumers:
+            self._deliver(consumer.on_process_started, identity)
+
+    @staticmethod
+    def _deliver(hook, payload):
+        try:
+            hook(payload)
+        except Exception as e:
+            # One broken consumer must not starve the others.
+            print(f"System monitor consumer {hook.__qualname__} failed: {e}")
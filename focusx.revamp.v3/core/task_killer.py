@@ -1,67 +1,156 @@
+
 import os
-import threading
+import shutil
 import time
 import psutil # Robust process management
+from core.blocklist import BlocklistMatcher
+from core.fingerprint import FingerprintCache
+from core.metrics import Counter, LatencyHistogram
+from core.system_monitor import MonitorConsumer
 
-class TaskKiller:
+class TaskKiller(MonitorConsumer):
+    """
+    Kill policy and tamper check for work sessions, plugged into the shared SystemMonitor.
+    """
     def __init__(self, app_instance):
         self.app = app_instance
+        self.monitor = self.app.system_monitor
         self._task_manager_monitor_active = False
-        self._task_manager_thread = None
+
+        # Content fingerprints catch blocked tools that were renamed or copied elsewhere.
+        self.fingerprints = FingerprintCache(os.path.join(self.app.config.DATA_DIR, 'fingerprints.json'))
+        self._learned_hashes = set() # SHA-256 of the genuine blocked binaries we've seen.
+        self._seeded = False
+
+        # How long blocked programs got to live: from process creation to our kill() call.
+        self.kill_latency = LatencyHistogram("spawn_to_kill")
+        self.kills = Counter("blocked_kills") # Read by the timer for the session history.
+        self.kill_budget = self.app.config.KILL_LATENCY_BUDGET_MS / 1000
+        self.set_blocklist(self.app.config.BLOCKED_PROCESSES)
 
     def start_task_manager_monitoring(self):
-        # Only activate for Windows.
-        if os.name != 'nt':
+        # Nothing to enforce, nothing to watch. Otherwise run on any OS: the process watcher
+        # picks the best event source it can (netlink, WMI) and falls back to polling.
+        if not self.blocklist:
             return
 
         # Return if monitoring is already active.
         if self._task_manager_monitor_active:
             return
 
-        # Set flag and start monitoring thread.
+        # Set flag and subscribe: the monitor hands us a snapshot of what's already open,
+        # then every new process as it starts.
         self._task_manager_monitor_active = True
-        self._task_manager_thread = threading.Thread(target=self._monitor_task_manager_loop, daemon=True)
-        self._task_manager_thread.start()
+        self._seed_fingerprints()
+        self.monitor.register(self)
 
     def stop_task_manager_monitoring(self):
         # Return if not currently monitoring.
         if not self._task_manager_monitor_active:
             return
 
-        # Signal thread to stop.
+        # Unsubscribe; the monitor stops its watcher once nobody is listening.
         self._task_manager_monitor_active = False
-        if self._task_manager_thread and self._task_manager_thread.is_alive():
+        self.monitor.unregister(self)
+        if self.kill_latency.count:
+            print(self.kill_latency.summary())
+
+    def set_blocklist(self, entries):
+        # Compile once per change; the engine loop picks up the new matcher atomically.
+        blocklist = BlocklistMatcher(entries)
+        blocklist.add_hashes(self._learned_hashes)
+        self.blocklist = blocklist
+        self._seeded = False
+
+    def poll_cadence(self):
+        """Current polling interval in seconds, or None when driven by process events."""
+        return self.monitor.poll_cadence()
+
+    def _seed_fingerprints(self):
+        # Fingerprint the real blocked binaries we can find (Taskmgr.exe lives on the PATH),
+        # in the background, so their renamed copies are recognised later.
+        if self._seeded:
+            return
+        self._seeded = True
+        for name in self.blocklist.names:
+            path = shutil.which(name)
+            if path:
+                self.fingerprints.fingerprint_async(path, self._learn_fingerprint)
+
+    def _learn_fingerprint(self, fingerprint):
+        if fingerprint.sha256 not in self._learned_hashes:
+            self._learned_hashes.add(fingerprint.sha256)
+            self.blocklist.add_hashes((fingerprint.sha256,))
+
+    def _is_enforcing(self):
+        return self._task_manager_monitor_active and self.app.timer.is_running and self.app.timer.is_work_session
+
+    def on_snapshot(self, identities):
+        # Tools opened before the work session began.
+        blocklist = self.blocklist
+        for identity in identities:
+            if blocklist.match_identity(identity, self.fingerprints.lookup(identity.exe)):
+                self._kill_identity(identity, record_latency=False)
+                self._remember_binary(identity.exe)
+
+    def on_process_started(self, identity):
+        # Called by the monitor for each new process: O(new processes), not O(all processes).
+        # This is the kill pipeline's hot path - it runs right on the engine loop the moment
+        # the spawn event arrives, with no queue hop or poll tick in between.
+        if not self._is_enforcing():
+            return
+
+        blocklist = self.blocklist
+        if blocklist.match_identity(identity, self.fingerprints.lookup(identity.exe)):
+            self._kill_identity(identity)
+            self._remember_binary(identity.exe)
+        elif blocklist.hashes and identity.exe:
+            # Unknown binary: hash it off-thread and decide once the digest is in.
+            self.fingerprints.fingerprint_async(
+                identity.exe, lambda fingerprint: self._on_fingerprint(identity, fingerprint)
+            )
+
+    def _on_fingerprint(self, identity, fingerprint):
+        # Runs on a hashing worker once a new process's executable has been fingerprinted.
+        if self._is_enforcing() and fingerprint.sha256 in self.blocklist.hashes:
+            self._kill_identity(identity)
+
+    def _remember_binary(self, exe):
+        # A process that matched by name/path tells us where a genuine blocked binary lives.
+        if exe:
+            self.fingerprints.fingerprint_async(exe, self._learn_fingerprint)
+
+    def _kill_identity(self, identity, record_latency=True):
+        try:
+            proc = psutil.Process(identity.pid)
+            # Make sure the PID wasn't recycled by an innocent process in the meantime.
+            if proc.create_time() == identity.create_time:
+                self._kill(proc)
+                self.kills.increment()
+                if record_latency:
+                    self._record_kill_latency(identity)
+                # Someone is actively trying: tighten a polling watcher's cadence.
+                self.monitor.notify_activity()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            # Already gone, or not ours to touch.
             pass
 
-    def _monitor_task_manager_loop(self):
-        # Monitors and terminates Task Manager during work sessions.
-        while self._task_manager_monitor_active and self.app.timer.is_running and self.app.timer.is_work_session:
-            try:
-                # Iterate processes, requesting pid and name.
-                for proc in psutil.process_iter(['pid', 'name']):
-                    # Check for Task Manager (case-insensitive).
-                    if proc.info['name'].lower() == 'taskmgr.exe':
-                        # Task Manager found, attempt termination.
-                        try:
-                            proc.kill() # Terminate process.
-                        except psutil.AccessDenied:
-                            # Insufficient privileges.
-                            pass
-                        except psutil.NoSuchProcess:
-                            # Process already terminated.
-                            pass
-                        except Exception:
-                            # Catch other termination errors.
-                            pass
-                        break # Exit inner loop once handled.
-            except psutil.NoSuchProcess:
-                # Process terminated during iteration.
-                pass
-            except Exception:
-                # Catch general iteration errors.
-                pass
-
-            # Check every 1 second.
-            time.sleep(1)
-
-        self._task_manager_monitor_active = False # Ensure flag is false.
+    def _record_kill_latency(self, identity):
+        latency = time.time() - identity.create_time
+        self.kill_latency.record(latency)
+        if latency > self.kill_budget:
+            print(f"Slow kill: {identity.name} (PID {identity.pid}) lived {latency * 1000:.0f} ms, "
+                  f"budget is {self.kill_budget * 1000:.0f} ms.")
+
+    def _kill(self, proc):
+        try:
+            proc.kill() # Terminate process.
+        except psutil.AccessDenied:
+            # Insufficient privileges.
+            pass
+        except psutil.NoSuchProcess:
+            # Process already terminated.
+            pass
+        except Exception:
+            # Catch other termination errors.
+            pass
@@ -1,10 +1,19 @@
 # core/timer.py
 
-import threading
+import math
+import os
 import time
-from tkinter import messagebox
+from core.checkpoint import SessionCheckpoint
+from core.history import HistoryRecord, OUTCOME_COMPLETED, OUTCOME_STOPPED, PHASE_BREAK, PHASE_WORK
 
 class Timer:
+    """
+    Drives the work/break cycle without any dedicated thread.
+    Each phase keeps one absolute deadline, and exactly one wakeup is armed on the
+    app's main loop (Tk, or the engine loop when headless) for the moment the
+    displayed second changes. Everything user-facing goes through app.view.
+    It's like an alarm clock that only rings when there's actually something new to show.
+    """
     def __init__(self, app_instance):
         self.app = app_instance 
         self.is_running = False
@@ -13,107 +22,298 @@ class Timer:
         self.work_duration = 0 
         self.rest_duration = 0
 
-    def start_timer(self):
+        # Sessions are measured on the app's session clock (monotonic, optionally suspend-aware),
+        # so changing the wall clock can't shorten or stretch a phase.
+        self.clock = self.app.session_clock
+        self._deadline = None # Absolute self.clock.now() value at which the current phase ends.
+        self._tick_id = None # Handle of the single pending root.after() wakeup.
+
+        # The running session on disk, so a FocusX that crashed or was killed resumes it on respawn.
+        self.checkpoint = SessionCheckpoint(
+            os.path.join(self.app.config.DATA_DIR, 'session.json'),
+            self.app.engine,
+            self.app.config.SESSION_CHECKPOINT_FSYNC_INTERVAL,
+        )
+        self._heartbeat_id = None
+
+        # What the session history needs to know about the phase in progress.
+        self._phase_planned = 0 # Full length of the phase, in seconds.
+        self._phase_started_wall = None # Wall-clock time the phase began.
+        self._phase_kills_base = 0 # task_killer.kills.value when the phase began (minus kills carried over).
+        self._phase_interruptions = 0 # Crashes/restarts this phase was resumed across.
+
+    def start_timer(self, work_minutes=None, rest_minutes=None, quiet=False):
+        """
+        Starts a work session. Returns None, or the reason it refused - shown in a dialog
+        unless `quiet` (remote callers report it themselves rather than block Tk in a modal).
+        """
         if self.is_running:
-            self.app.gui.show_info("Already Running", "A session is already in progress. Stay focused!")
-            return
+            return self._refuse(self.app.view.show_info, "Already Running",
+                                "A session is already in progress. Stay focused!", quiet)
+        if self.app.night_mode.is_night_time():
+            return self._refuse(self.app.view.show_info, "Lockdown Active",
+                                "It's lockdown time according to your calendar. Go get some rest!", quiet)
 
-        self.work_duration = self.app.gui.work_duration_minutes.get() * 60
-        self.rest_duration = self.app.gui.rest_duration_minutes.get() * 60
+        if work_minutes is None:
+            work_minutes = self.app.config.DEFAULT_WORK_MINUTES
+        if rest_minutes is None:
+            rest_minutes = self.app.config.DEFAULT_REST_MINUTES
+        if work_minutes <= 0 or rest_minutes <= 0:
+            # A zero-length phase would flip straight into the next one, forever.
+            return self._refuse(self.app.view.show_warning, "Invalid Session",
+                                "Work and break lengths must be at least one minute.", quiet)
+        self.work_duration = work_minutes * 60
+        self.rest_duration = rest_minutes * 60
 
-        self.app.gui.time_var.set(f"{self.app.gui.work_duration_minutes.get():02d}:00")
-        self.app.gui.status_var.set("Work Session Starting! 🔥")
-        
-        self.app.gui.work_slider.config(state='disabled')
-        self.app.gui.rest_slider.config(state='disabled')
-        self.app.gui.start_button.config(state='disabled')
-        if hasattr(self.app.gui, 'persistence_button'):
-            self.app.gui.persistence_button.config(state='disabled')
+        self.app.view.show_time(f"{work_minutes:02d}:00")
+        self.app.view.show_status("Work Session Starting! 🔥")
+        self.app.view.session_started()
 
         self.is_running = True
         self.is_work_session = True
         
-        threading.Thread(target=self._run_timer, daemon=True).start()
+        self._start_phase()
+        return None
+
+    @staticmethod
+    def _refuse(show, title, message, quiet):
+        if not quiet:
+            show(title, message)
+        return message
 
     def stop_timer(self):
         if not self.is_running:
             return
 
         self.is_running = False
-        self.app.root.after(0, self._cleanup)
-
-    def _run_timer(self):
-        while self.is_running:
-            if self.is_work_session:
-                self.app.gui.status_var.set("Work Session in Progress! 🔥")
-                self.app.input_blocker.unblock_input()
-                self.app.audio_control.unmute_audio()
-                if self.app.gui.overlay:
-                    self.app.gui.overlay.destroy()
-                    self.app.gui.overlay = None
-                
-                self.app.task_killer.start_task_manager_monitoring()
-
-                # Pass the total duration of the work session
-                self.countdown(self.work_duration)
-
-            else:
-                self.app.gui.status_var.set("Break Time! 🎉 Relax and Recharge!")
-                self.app.gui.create_overlay()
-                self.app.input_blocker.block_input()
-                self.app.audio_control.mute_audio()
-                
-                self.app.task_killer.stop_task_manager_monitoring()
-
-                # Pass the total duration of the rest session
-                self.countdown(self.rest_duration)
-            
-            # Only switch session type if the timer is still running (i.e., not stopped externally)
-            if self.is_running:
-                self.is_work_session = not self.is_work_session
-            else:
-                break # Loop exits if is_running becomes False (e.g., app is closed forcefully)
-
-    def countdown(self, total_session_duration):
+        self.app.ui.call(self._cleanup, key='timer.cleanup')
+
+    def remaining_seconds(self):
+        """Whole seconds left in the current phase (0 when idle), rounded up like the display."""
+        if not self.is_running or self._deadline is None:
+            return 0
+        return max(0, math.ceil(self._deadline - self.clock.now()))
+
+    def restore_session(self):
         """
-        Counts down the specified total duration, updating the GUI every second.
-        This version is more accurate as it bases calculations on the initial start time.
-        It's like having a reliable stopwatch that always measures from zero, preventing drift.
+        Picks up the session a previous FocusX left in its checkpoint, with the time that was
+        really left - phases that ran out while we were down are skipped over.
+        Returns True if a session was resumed. Call once every engine is up.
         """
-        start_time = time.time()
-        while self.is_running: # Loop as long as the app is active
-            elapsed_time = time.time() - start_time
-            current_duration_left = int(total_session_duration - elapsed_time)
-            
-            if current_duration_left <= 0:
-                self.app.root.after(0, self.app.gui.time_var.set, "00:00") # Ensure it shows 00:00
-                break # Exit the loop if time is up or negative
-
-            minutes, seconds = divmod(current_duration_left, 60)
-            
-            # Update GUI on the main thread for smooth animation.
-            self.app.root.after(0, self.app.gui.time_var.set, f"{minutes:02d}:{seconds:02d}")
-            
-            time.sleep(1) # Wait for approximately one second
+        state = self.checkpoint.load()
+        if state is None or self.is_running:
+            return False
+
+        try:
+            work_duration = int(state['work_duration'])
+            rest_duration = int(state['rest_duration'])
+            is_work_session = bool(state['work_session'])
+            saved_at = float(state['saved_at'])
+            gap = time.time() - saved_at
+            saved_remaining = float(state['wall_deadline']) - saved_at
+            remaining = self._checkpoint_remaining(state)
+            kills = int(state.get('kills', 0))
+            interruptions = int(state.get('interruptions', 0)) + 1
+        except (KeyError, TypeError, ValueError):
+            print("Ignoring malformed session checkpoint.")
+            self.checkpoint.clear()
+            return False
+
+        if work_duration <= 0 or rest_duration <= 0:
+            self.checkpoint.clear()
+            return False
+        # A long silence means FocusX was switched off, not respawned: don't resurrect that session.
+        # Nor during a lockdown, which takes over; the session would have ended anyway.
+        # Either way it was stopped where the checkpoint last saw it, and the history says so.
+        if not 0 <= gap <= self.app.config.SESSION_RESUME_MAX_GAP or self.app.night_mode.is_night_time():
+            planned = work_duration if is_work_session else rest_duration
+            actual = round(min(max(planned - saved_remaining, 0), planned))
+            self.app.history.append(HistoryRecord(
+                saved_at - actual, saved_at, planned, actual, interruptions - 1, kills,
+                PHASE_WORK if is_work_session else PHASE_BREAK, OUTCOME_STOPPED,
+            ))
+            self.checkpoint.clear()
+            return False
+
+        now = time.time()
+        while remaining <= 0:
+            # This phase ran out while we were down; it still goes in the history. Phases that
+            # began after the crash were interrupted once - by FocusX not running at all.
+            planned = work_duration if is_work_session else rest_duration
+            phase_end = now + remaining
+            self.app.history.append(HistoryRecord(
+                phase_end - planned, phase_end, planned, planned, interruptions, kills,
+                PHASE_WORK if is_work_session else PHASE_BREAK, OUTCOME_COMPLETED,
+            ))
+            kills, interruptions = 0, 1
+            is_work_session = not is_work_session
+            remaining += work_duration if is_work_session else rest_duration
+
+        print(f"Resuming {'work session' if is_work_session else 'break'} with {math.ceil(remaining)} s left.")
+        self.work_duration = work_duration
+        self.rest_duration = rest_duration
+        self.is_work_session = is_work_session
+        self.is_running = True
+        self.app.view.session_started()
+        self._start_phase(remaining, kills, interruptions)
+        return True
+
+    def _checkpoint_remaining(self, state):
+        """Seconds left in the checkpointed phase, measured on the best clock still comparable."""
+        # The session-clock deadline is immune to wall-clock changes, but only means something
+        # while that clock still has the same origin (same clock type, same boot, no missed suspend).
+        session_epoch = time.time() - self.clock.now()
+        if (state.get('clock') == type(self.clock).__name__
+                and abs(session_epoch - float(state['session_epoch'])) < 5):
+            return float(state['deadline']) - self.clock.now()
+        return float(state['wall_deadline']) - time.time()
+
+    def _start_phase(self, remaining=None, kills=0, interruptions=0):
+        """
+        Applies the side effects of the current phase and arms its deadline
+        (a full phase, or just `remaining` seconds of it when resuming, carrying over the
+        kills and interruptions it had already collected).
+        """
+        if self.is_work_session:
+            self.app.view.show_status("Work Session in Progress! 🔥")
+            self.app.input_blocker.unblock_input()
+            self.app.audio_control.unmute_audio()
+            self.app.view.hide_break_overlay()
+
+            self.app.task_killer.start_task_manager_monitoring()
+            duration = self.work_duration
+        else:
+            self.app.view.show_status("Break Time! 🎉 Relax and Recharge!")
+            self.app.view.show_break_overlay()
+            self.app.input_blocker.block_input()
+            self.app.audio_control.mute_audio()
+
+            self.app.task_killer.stop_task_manager_monitoring()
+            duration = self.rest_duration
+
+        self._phase_planned = duration
+        if remaining is None:
+            remaining = duration
+        self._phase_started_wall = time.time() - (duration - remaining)
+        self._phase_kills_base = self.app.task_killer.kills.value - kills
+        self._phase_interruptions = interruptions
+        self._deadline = self.clock.now() + remaining
+        self._save_checkpoint(durable=True)
+        self._tick()
+        if self._heartbeat_id is None:
+            self._heartbeat()
+
+    def _tick(self):
+        """
+        Runs on the main loop once per displayed second.
+        Updates the clock face, flips the phase when the deadline passes and
+        arms the next wakeup aligned to the next second boundary.
+        """
+        self._tick_id = None
+        if not self.is_running:
+            return
+
+        # Piggyback on our wakeup to notice wall-clock jumps for the night lockdown timer.
+        self.app.night_mode.check_clock_jump()
+
+        remaining = self._deadline - self.clock.now()
+        if remaining <= 0:
+            self.app.view.show_time("00:00") # Ensure it shows 00:00
+            self._record_phase(OUTCOME_COMPLETED)
+            self.is_work_session = not self.is_work_session
+            self._start_phase()
+            return
+
+        if not self.app.view.is_watching():
+            # Nobody can see the clock face: sleep straight through to the deadline.
+            self._schedule(remaining)
+            return
+
+        seconds_left = math.ceil(remaining)
+        minutes, seconds = divmod(seconds_left, 60)
+        self.app.view.show_time(f"{minutes:02d}:{seconds:02d}")
+
+        # The display next changes when 'remaining' drops below seconds_left - 1.
+        self._schedule(remaining - (seconds_left - 1))
+
+    def _schedule(self, delay_seconds):
+        # Round up so we wake just after the boundary, never just before it.
+        delay_ms = max(1, math.ceil(delay_seconds * 1000))
+        self._tick_id = self.app.root.after(delay_ms, self._tick)
+
+    def _cancel_tick(self):
+        if self._tick_id is not None:
+            self.app.root.after_cancel(self._tick_id)
+            self._tick_id = None
+
+    def _record_phase(self, outcome):
+        """Appends the phase that just ended to the session history."""
+        # Measured on the session clock, so a wall-clock change can't distort the duration.
+        actual = max(0, round(self.clock.now() - (self._deadline - self._phase_planned)))
+        self.app.history.append(HistoryRecord(
+            self._phase_started_wall, self._phase_started_wall + actual, self._phase_planned, actual,
+            self._phase_interruptions, self._phase_kills(),
+            PHASE_WORK if self.is_work_session else PHASE_BREAK, outcome,
+        ))
+
+    def _phase_kills(self):
+        return self.app.task_killer.kills.value - self._phase_kills_base
+
+    def _save_checkpoint(self, durable=False):
+        now = self.clock.now()
+        wall_now = time.time()
+        self.checkpoint.save({
+            'work_session': self.is_work_session,
+            'work_duration': self.work_duration,
+            'rest_duration': self.rest_duration,
+            'deadline': self._deadline,
+            'wall_deadline': wall_now + (self._deadline - now),
+            'session_epoch': wall_now - now,
+            'clock': type(self.clock).__name__,
+            'kills': self._phase_kills(),
+            'interruptions': self._phase_interruptions,
+            'saved_at': wall_now,
+        }, durable)
+
+    def _heartbeat(self):
+        # Keeps the checkpoint fresh so a respawn can tell "just crashed" from "was switched off".
+        self._heartbeat_id = None
+        if not self.is_running:
+            return
+        self._save_checkpoint()
+        self._heartbeat_id = self.app.root.after(
+            self.app.config.SESSION_CHECKPOINT_INTERVAL * 1000, self._heartbeat
+        )
+
+    def refresh_display(self):
+        """
+        Repaints straight away instead of waiting for the (possibly distant) wakeup that was
+        armed while nobody was watching - e.g. when the window comes back from the taskbar.
+        """
+        if not self.is_running:
+            return
+        self._cancel_tick()
+        self._tick()
 
     def _cleanup(self):
-        if self.app.gui.overlay:
-            self.app.gui.overlay.destroy()
-            self.app.gui.overlay = None
+        self._cancel_tick()
+        if self._heartbeat_id is not None:
+            self.app.root.after_cancel(self._heartbeat_id)
+            self._heartbeat_id = None
+        if self._deadline is not None:
+            self._record_phase(OUTCOME_STOPPED)
+        self._deadline = None
+        self.checkpoint.clear() # Stopped on purpose: nothing to resume.
+
+        self.app.view.hide_break_overlay()
         self.app.input_blocker.unblock_input()
         self.app.audio_control.unmute_audio()
         self.app.task_killer.stop_task_manager_monitoring()
         
-        self.app.gui.time_var.set(f"{self.app.gui.work_duration_minutes.get():02d}:00")
-        self.app.gui.status_var.set("Ready to focus!")
+        self.app.view.show_time(f"{self.work_duration // 60:02d}:00")
+        self.app.view.show_status("Ready to focus!")
         
         self.is_work_session = True
         self.is_running = False
 
-        self.app.gui.work_slider.config(state='normal')
-        self.app.gui.rest_slider.config(state='normal')
-        self.app.gui.start_button.config(state='normal')
-        if hasattr(self.app.gui, 'persistence_button'):
-            self.app.gui.persistence_button.config(state='normal')
-            self.app.scheduler._update_persistence_button_text()
-
+        self.app.view.session_stopped()
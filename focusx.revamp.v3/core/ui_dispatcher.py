@@ -0,0 +1,153 @@
+# core/ui_dispatcher.py
+
+import socket
+import threading
+from core.metrics import Counter
+
+class UiDispatcher:
+    """
+    The one doorway into Tk for everyone who isn't the Tk thread (and for hot Tk-thread
+    writers that would rather batch). Updates can be posted from any thread; they are
+    applied together on the Tk thread, at most once per frame.
+
+    Updates posted under the same key coalesce: only the latest one survives until the
+    next drain, so a label written ten times in a frame is redrawn once. Keyless calls
+    never coalesce. Like a mail room that only delivers the newest memo for each desk.
+
+    Nothing polls: a drain is armed only while posts are pending. Posts from the Tk thread
+    itself (or to a root whose after() is thread-safe, like the daemon's EngineRoot) schedule
+    their drain directly. Other threads never call into Tcl, which would block them until Tk
+    got round to it - the first of their posts to find the queue idle writes one byte to a
+    socket pair Tk watches with createfilehandler, and Tk arms the drain when it wakes.
+    Where Tk can't watch sockets (Windows) that post queues a <<UiWake>> virtual event instead.
+    """
+    WAKE_EVENT = '<<UiWake>>'
+
+    def __init__(self, app_instance, frame_ms=16):
+        self.app = app_instance
+        self.frame_ms = frame_ms
+        self._pending = {} # key -> (callback, args), kept in first-posted order
+        self._lock = threading.Lock() # Held only for a dict write or swap, never around Tk calls.
+        self._drain_scheduled = False
+        self._closed = False
+        self._owner = threading.get_ident() # Built on the thread that runs the main loop.
+        self._wake_pair = None # (reader, writer) socket pair Tk watches, once started
+        self._wake_event = False # Wake Tk with WAKE_EVENT instead of the socket pair
+
+        self.posted = Counter("ui_updates_posted")
+        self.coalesced = Counter("ui_updates_coalesced")
+        self.dropped = Counter("ui_updates_dropped")
+        self.drains = Counter("ui_drains")
+
+    def call(self, callback, *args, key=None):
+        """Runs callback(*args) on the Tk thread within a frame. Safe from any thread."""
+        if key is None:
+            key = object() # A key nobody else can hold: this call never coalesces.
+        with self._lock:
+            if self._closed:
+                self.dropped.increment()
+                return
+            self.posted.increment()
+            if key in self._pending:
+                self.coalesced.increment()
+            self._pending[key] = (callback, args)
+            if self._drain_scheduled:
+                return # Already on its way.
+            self._drain_scheduled = True
+        # Only the post that finds the queue idle wakes the main loop; everyone else rides along.
+        try:
+            if self._may_schedule():
+                self.app.root.after(self.frame_ms, self._drain)
+            else:
+                self._wake()
+        except Exception as e:
+            # Tk is gone or refusing; don't leave the queue believing a drain is on its way.
+            with self._lock:
+                self._drain_scheduled = False
+            print(f"Could not schedule a UI drain: {e}")
+
+    def _may_schedule(self):
+        return threading.get_ident() == self._owner or getattr(self.app.root, 'threadsafe_after', False)
+
+    def start(self):
+        """Sets up the wakeup other threads use to reach Tk. Call on the Tk thread."""
+        if getattr(self.app.root, 'threadsafe_after', False):
+            return
+        import tkinter
+        reader, writer = socket.socketpair()
+        reader.setblocking(False)
+        writer.setblocking(False)
+        try:
+            self.app.root.tk.createfilehandler(reader, tkinter.READABLE, self._on_wake_socket)
+            self._wake_pair = (reader, writer)
+        except (AttributeError, tkinter.TclError, OSError):
+            # No file handlers on this platform's Tk: fall back to a virtual event.
+            reader.close()
+            writer.close()
+            self.app.root.bind(self.WAKE_EVENT, self._on_wake_event)
+            self._wake_event = True
+        # Posts that arrived before the wakeup existed still need their drain.
+        with self._lock:
+            waiting = self._drain_scheduled
+        if waiting:
+            self.app.root.after(self.frame_ms, self._drain)
+
+    def _wake(self):
+        # Runs on the posting thread, once per idle-to-busy transition.
+        if self._wake_pair is not None:
+            try:
+                self._wake_pair[1].send(b'\0')
+            except BlockingIOError:
+                pass # The buffer is full of unread wakeups; Tk is already on its way.
+        elif self._wake_event:
+            # Tk queues the event from any thread; Tcl does the thread hand-off.
+            self.app.root.event_generate(self.WAKE_EVENT, when='tail')
+        # Before start() there is nothing to wake; start() arms the drain itself.
+
+    def _on_wake_socket(self, reader, mask):
+        try:
+            while reader.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        self._on_wake_event()
+
+    def _on_wake_event(self, event=None):
+        if not self._closed:
+            self.app.root.after(self.frame_ms, self._drain)
+
+    def set_var(self, variable, value):
+        """Coalescing Tk variable write, e.g. ui.set_var(gui.time_var, "24:59")."""
+        self.call(variable.set, value, key=('var', str(variable)))
+
+    def _drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._drain_scheduled = False
+        self.drains.increment()
+        for callback, args in pending.values():
+            try:
+                callback(*args)
+            except Exception as e:
+                # Usually a widget that was destroyed while the update was in flight.
+                self.dropped.increment()
+                print(f"UI update {getattr(callback, '__qualname__', callback)} dropped: {e}")
+
+    def close(self):
+        """Stops accepting updates (on shutdown); anything still queued is counted as dropped."""
+        with self._lock:
+            self._closed = True
+            self.dropped.increment(len(self._pending))
+            self._pending = {}
+        if self._wake_pair is not None:
+            reader, writer = self._wake_pair
+            self._wake_pair = None
+            try:
+                self.app.root.tk.deletefilehandler(reader)
+            except Exception:
+                pass # Tk is already gone.
+            reader.close()
+            writer.close()
+
+    def stats(self):
+        return [counter.snapshot() for counter in (self.posted, self.coalesced, self.dropped, self.drains)]
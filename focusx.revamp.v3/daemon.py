@@ -0,0 +1,97 @@
+# daemon.py
+
+import argparse
+import os
+import signal
+import sys
+
+# Only core modules here: the daemon never imports tkinter or the gui package.
+from core.config import AppConfig
+from core.clock import NtpCorrectedClock, create_session_clock
+from core.control import ALREADY_RUNNING_EXIT_CODE, InstanceLock, positive_minutes
+from core.control_server import ControlServer
+from core.event_loop import EngineLoop, EngineRoot
+from core.ui_dispatcher import UiDispatcher
+from core.session_view import ConsoleView, ViewGroup
+from core.timer import Timer
+from core.history import SessionHistory
+from core.audio_control import AudioControl
+from core.input_blocker import InputBlocker
+from core.night_mode import NightMode
+from core.system_monitor import SystemMonitor
+from core.task_killer import TaskKiller
+
+class FocusXDaemon:
+    """
+    FocusX without a window: the same timer, night lockdown and task killer as main.py,
+    running on the engine loop with a ConsoleView in place of the GUI.
+    For servers, terminal-only machines and headless CI boxes - all of the enforcement,
+    none of the widgets.
+    """
+    def __init__(self, instance_lock):
+        self.config = AppConfig
+        self.instance_lock = instance_lock # Held by __main__ before anything is built.
+
+        self.session_clock = create_session_clock(self.config.COUNT_SUSPEND_TIME)
+        self.wall_clock = NtpCorrectedClock()
+
+        # The engine loop is the main loop here; EngineRoot gives the engines the after() they expect.
+        self.engine = EngineLoop(self)
+        self.root = EngineRoot(self.engine)
+        self.ui = UiDispatcher(self, self.config.UI_FRAME_MS)
+        self.control = ControlServer(self) # How focusctl.py and other front-ends reach us.
+        self.view = ViewGroup(ConsoleView(self), self.control)
+
+        # Same modules, same order as the GUI app (minus the GUI and the Task Scheduler prompts).
+        self.history = SessionHistory(
+            os.path.join(self.config.DATA_DIR, 'history.bin'),
+            self.engine,
+            self.config.HISTORY_RETENTION_DAYS,
+            self.config.HISTORY_COMPACT_INTERVAL_DAYS,
+        )
+        self.timer = Timer(self)
+        self.audio_control = AudioControl(self)
+        self.input_blocker = InputBlocker(self)
+        self.night_mode = NightMode(self)
+        self.system_monitor = SystemMonitor(self)
+        self.task_killer = TaskKiller(self)
+        self.control.start()
+
+    def run(self, start_session=False, work_minutes=None, rest_minutes=None):
+        """Runs until SIGINT/SIGTERM, optionally starting a work session straight away."""
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: self.root.quit())
+
+        if start_session:
+            self.ui.call(self.timer.start_timer, work_minutes, rest_minutes)
+        else:
+            # Respawned after a crash? Carry on with the session that was running.
+            self.ui.call(self.timer.restore_session)
+        print("FocusX daemon running. Press Ctrl+C to stop.")
+        try:
+            self.root.mainloop()
+        finally:
+            self.control.close()
+            self.ui.close()
+            # Pending checkpoint and history writes go through the engine, so flush them before stopping it.
+            self.timer.checkpoint.close()
+            self.history.close()
+            self.engine.stop()
+            self.task_killer.fingerprints.shutdown()
+            self.instance_lock.release()
+            print("FocusX daemon stopped.")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run FocusX headless, without the GUI.")
+    parser.add_argument('--start', action='store_true', help="start a work session immediately")
+    parser.add_argument('--work', type=positive_minutes, default=AppConfig.DEFAULT_WORK_MINUTES, help="work session length in minutes")
+    parser.add_argument('--rest', type=positive_minutes, default=AppConfig.DEFAULT_REST_MINUTES, help="break length in minutes")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    instance_lock = InstanceLock(AppConfig.DATA_DIR)
+    if not instance_lock.acquire():
+        print("FocusX is already running; use focusctl.py to talk to it.")
+        sys.exit(ALREADY_RUNNING_EXIT_CODE)
+    FocusXDaemon(instance_lock).run(args.start, args.work, args.rest)
@@ -0,0 +1,78 @@
+# focusctl.py
+
+import argparse
+import os
+import sys
+import time
+
+# A thin client: it only speaks the control protocol and never starts an engine itself.
+from core.config import AppConfig
+from core.control import ControlClient, ControlError, positive_minutes
+from core.history import SessionHistory
+
+def describe(state):
+    if state.lockdown:
+        if state.lockdown_until:
+            until = time.strftime('%H:%M', time.localtime(state.lockdown_until))
+            return f"Night lockdown until {until}."
+        return "Night lockdown."
+    if not state.running:
+        return "Idle."
+    minutes, seconds = divmod(state.remaining, 60)
+    phase = "Work session" if state.work_session else "Break"
+    return f"{phase}: {minutes:02d}:{seconds:02d} left ({state.work_minutes}/{state.rest_minutes} min cycle)."
+
+def describe_day(summary):
+    hours, minutes = divmod(summary.focus_seconds // 60, 60)
+    line = (f"{summary.day}: {hours}h{minutes:02d} focused, {summary.completed} sessions completed, "
+            f"{summary.stopped} stopped, {summary.kills} blocked programs killed")
+    if summary.interruptions:
+        line += f", resumed after {summary.interruptions} crash(es)"
+    return line + "."
+
+def show_stats(days):
+    # Straight from the history log: works whether or not an engine is running.
+    history = SessionHistory(os.path.join(AppConfig.DATA_DIR, 'history.bin')) # No engine: read-only.
+    recorded = history.days()[-days:]
+    if not recorded:
+        print("No sessions recorded yet.")
+    for day in recorded:
+        print(describe_day(history.summary(day)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Control a running FocusX engine.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help="show the current session")
+    start = commands.add_parser('start', help="start a work session")
+    start.add_argument('--work', type=positive_minutes, default=0, help="work minutes (default: the engine's)")
+    start.add_argument('--rest', type=positive_minutes, default=0, help="break minutes (default: the engine's)")
+    commands.add_parser('stop', help="stop the current session (only if the engine's CONTROL_ALLOW_STOP is on)")
+    commands.add_parser('watch', help="print every state change until interrupted")
+    stats = commands.add_parser('stats', help="summarise the recorded sessions, day by day")
+    stats.add_argument('--days', type=int, default=7, help="how many of the most recent days to show")
+    args = parser.parse_args(argv)
+
+    if args.command == 'stats':
+        show_stats(args.days)
+        return 0
+
+    try:
+        with ControlClient(AppConfig.DATA_DIR) as client:
+            if args.command == 'status':
+                print(describe(client.query()))
+            elif args.command == 'start':
+                print(describe(client.start(args.work, args.rest)))
+            elif args.command == 'stop':
+                print(describe(client.stop()))
+            else:
+                for state in client.subscribe():
+                    print(describe(state), flush=True)
+    except ControlError as e:
+        print(e, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
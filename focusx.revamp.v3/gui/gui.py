@@ -3,23 +3,32 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import random
+from core.session_view import SessionView
 
-class GUI:
+class GUI(SessionView):
+    """
+    The Tk window, and the app's SessionView: the engines in core/ report through the
+    hooks below and never touch a widget themselves.
+    """
     def __init__(self, app_instance):
         self.app = app_instance
         self.root = self.app.root
 
         self.time_var = tk.StringVar(value="00:00")
         self.status_var = tk.StringVar(value="Set your focus and break times!")
-        self.work_duration_minutes = tk.IntVar(value=50)
-        self.rest_duration_minutes = tk.IntVar(value=10)
+        self.work_duration_minutes = tk.IntVar(value=self.app.config.DEFAULT_WORK_MINUTES)
+        self.rest_duration_minutes = tk.IntVar(value=self.app.config.DEFAULT_REST_MINUTES)
 
         self.overlay = None
+        self.night_overlay_window = None
+        self._persistence_busy = False # A persistence job owns the button until it reports back.
 
     def setup_ui(self):
         self.root.configure(bg=self.app.config.COLORS['bg'])
         
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        # When the window comes back from the taskbar, have the timer repaint straight away.
+        self.root.bind('<Map>', self._on_map, add='+')
 
         main_frame = tk.Frame(self.root, bg=self.app.config.COLORS['bg'], bd=2, relief='flat')
         main_frame.pack(expand=True, fill='both', padx=30, pady=30)
@@ -65,7 +74,7 @@ class GUI:
         
         self.start_button = tk.Button(button_frame,
                                     text="Start Focus Session",
-                                    command=self.app.timer.start_timer,
+                                    command=self.start_session,
                                     bg=self.app.config.COLORS['primary'],
                                     fg='white',
                                     font=('Helvetica Neue', 14, 'bold'),
@@ -86,7 +95,7 @@ class GUI:
 
         self.persistence_button = tk.Button(main_frame,
                                             text="Enable Hardcore Persistence",
-                                            command=self.app.scheduler._toggle_persistence,
+                                            command=self.toggle_persistence,
                                             bg=self.app.config.COLORS['primary'],
                                             fg='white',
                                             font=('Helvetica Neue', 12),
@@ -103,11 +112,88 @@ class GUI:
 
         self.update_times_display()
 
+    def engines_ready(self):
+        # The window paints before the engines load (see main.py); until then, controls wait.
+        return hasattr(self.app, 'task_killer')
+
+    def start_session(self):
+        if not self.engines_ready():
+            return
+        self.app.timer.start_timer(self.work_duration_minutes.get(), self.rest_duration_minutes.get())
+
+    def _on_map(self, event):
+        # <Map> also fires for child widgets; only the main window matters here.
+        if event.widget is self.root and self.engines_ready():
+            self.app.timer.refresh_display()
+
+    def is_watching(self):
+        # The break overlay shows the countdown too, even with the main window minimized.
+        if self.overlay:
+            return True
+        try:
+            return self.root.state() != 'iconic'
+        except Exception:
+            return True
+
+    def show_time(self, text):
+        self.app.ui.set_var(self.time_var, text)
+
+    def show_status(self, text):
+        self.app.ui.set_var(self.status_var, text)
+
+    def session_started(self):
+        self.work_slider.config(state='disabled')
+        self.rest_slider.config(state='disabled')
+        self.start_button.config(state='disabled')
+        if hasattr(self, 'persistence_button'):
+            self.persistence_button.config(state='disabled')
+
+    def session_stopped(self):
+        self.work_slider.config(state='normal')
+        self.rest_slider.config(state='normal')
+        self.start_button.config(state='normal')
+        if hasattr(self, 'persistence_button'):
+            self.persistence_button.config(state='normal')
+            self.app.scheduler._update_persistence_button_text()
+
+    def set_persistence_available(self, available):
+        if hasattr(self, 'persistence_button'):
+            self.persistence_button.config(state='normal' if available else 'disabled')
+
+    def show_persistence_busy(self, description):
+        if hasattr(self, 'persistence_button'):
+            self._persistence_busy = True
+            self.persistence_button.config(text=description, bg=self.app.config.COLORS['warning'], state='disabled')
+
+    def show_persistence(self, enabled):
+        if hasattr(self, 'persistence_button'):
+            if self._persistence_busy:
+                # The job is done: hand the button back unless a session has it locked.
+                self._persistence_busy = False
+                if not (self.engines_ready() and self.app.timer.is_running):
+                    self.persistence_button.config(state='normal')
+            if enabled:
+                self.persistence_button.config(text="Disable Hardcore Persistence", bg=self.app.config.COLORS['danger'])
+            else:
+                self.persistence_button.config(text="Enable Hardcore Persistence", bg=self.app.config.COLORS['primary'])
+
     def update_times_display(self, *args):
         self.work_time_label.config(text=f"{self.work_duration_minutes.get()} min")
         self.rest_time_label.config(text=f"{self.rest_duration_minutes.get()} min")
-        if not self.app.timer.is_running:
-             self.time_var.set(f"{self.work_duration_minutes.get():02d}:00")
+        if not self.engines_ready() or not self.app.timer.is_running:
+             self.app.ui.set_var(self.time_var, f"{self.work_duration_minutes.get():02d}:00")
+
+    def toggle_persistence(self):
+        if self.engines_ready():
+            self.app.scheduler._toggle_persistence()
+
+    def show_break_overlay(self):
+        self.create_overlay()
+
+    def hide_break_overlay(self):
+        if self.overlay:
+            self.overlay.destroy()
+            self.overlay = None
 
     def create_overlay(self):
         if self.overlay:
@@ -134,28 +220,88 @@ class GUI:
                              bg='black')
         timer_label.pack(pady=30)
         
+        last_rotation = [None] # Remaining seconds at the last message change.
+
         def update_display():
             if self.overlay and self.overlay.winfo_exists():
-                try:
-                    minutes_str, seconds_str = self.time_var.get().split(':')
-                    remaining = int(minutes_str) * 60 + int(seconds_str)
-                except ValueError:
-                    remaining = 0
+                # Straight from the timer: time_var may be stale while the main window is minimized.
+                remaining = self.app.timer.remaining_seconds()
                 
                 mins, secs = divmod(remaining, 60)
                 timer_label.config(text=f"Break time remaining: {mins:02d}:{secs:02d}")
                 
-                if remaining % 5 == 0:
+                if remaining % 5 == 0 and remaining != last_rotation[0]:
+                    last_rotation[0] = remaining
                     message_label.config(text=random.choice(self.app.config.BREAK_ACTIVITIES))
                 
                 self.overlay.after(1000, update_display)
         
         update_display()
 
+    def show_lockdown(self, until):
+        """
+        Creates a full-screen, uncloseable black overlay for night-time blocking.
+        This visually enforces the "get rest" message, like pulling down a digital blackout curtain.
+        """
+        if self.night_overlay_window:
+            return # If the overlay is already active, do nothing.
+
+        night_mode = self.app.night_mode
+        self.night_overlay_window = tk.Toplevel(self.root)
+        # Set attributes for full-screen, always-on-top, and no window decorations (like close button).
+        self.night_overlay_window.attributes('-fullscreen', True, '-topmost', True, '-toolwindow', True)
+        self.night_overlay_window.configure(bg='black')
+        
+        # Prevent manual closing of the overlay window.
+        self.night_overlay_window.protocol("WM_DELETE_WINDOW", lambda: None)
+
+        # Message label: informing the user why the screen is blocked, and until when.
+        if until is not None:
+            hour, minute, _ = night_mode.time_of_day.hms(until)
+            text = f"Lockdown until {hour % 12 or 12}:{minute:02d} {'AM' if hour < 12 else 'PM'}.\nPlease get some rest."
+        else:
+            text = "It's lockdown time.\nPlease get some rest."
+        message = tk.Label(
+            self.night_overlay_window,
+            text=text,
+            font=('Arial', 28, 'bold'), # Larger and bolder for clear visibility.
+            fg='white',
+            bg='black',
+            justify='center',
+            wraplength=800 # Wraps text to fit within a certain width.
+        )
+        message.pack(expand=True)
+        
+        # Time display label: showing current time on the overlay.
+        time_label = tk.Label(
+            self.night_overlay_window,
+            font=('Arial', 22),
+            fg='white',
+            bg='black'
+        )
+        time_label.pack(pady=30)
+        
+        def update_time_display():
+            """Internal function to continuously update the time shown on the overlay."""
+            if self.night_overlay_window and self.night_overlay_window.winfo_exists():
+                now = night_mode.clock.now()
+                hour, minute, second = night_mode.time_of_day.hms(now)
+                suffix = 'AM' if hour < 12 else 'PM'
+                time_label.config(text=f"Current time: {hour % 12 or 12:02d}:{minute:02d}:{second:02d} {suffix}")
+                # Run again just after the next second boundary so the display never skips a beat.
+                self.night_overlay_window.after(1000 - int(now % 1 * 1000) + 1, update_time_display)
+        
+        update_time_display() # Start the time update loop.
+
+    def hide_lockdown(self):
+        if self.night_overlay_window:
+            self.night_overlay_window.destroy() # Close the overlay window.
+            self.night_overlay_window = None # Clear the reference.
+
     def on_closing(self):
         # Now, if any session is running (work or break), we prevent closing.
         # "Focus to the moon!" implies no stopping until the app is fully exited (e.g., system shutdown).
-        if self.app.timer.is_running:
+        if self.engines_ready() and self.app.timer.is_running:
             self.show_info(
                 "Hardcore Focus Active!",
                 "There's no stopping now! This app is designed for continuous focus.\n"
@@ -1,17 +1,18 @@
 # main.py
 
-import tkinter as tk
+import time
+STARTED = time.perf_counter() # Origin of the --profile-startup timeline.
+
 import os
 import sys
+import tkinter as tk
 
-# Import our custom modules from the 'core' and 'gui' packages.
+# Only what the first frame needs is imported up front. The engines (asyncio, psutil,
+# pycaw, pynput, tzlocal...) are imported in _start_engines(), once the window is on screen.
 from core.config import AppConfig
-from core.scheduler import Scheduler
-from core.timer import Timer
-from core.audio_control import AudioControl
-from core.input_blocker import InputBlocker
-from core.night_mode import NightMode
-from core.task_killer import TaskKiller
+from core.control import ALREADY_RUNNING_EXIT_CODE, InstanceLock
+from core.metrics import StartupTimeline
+from core.ui_dispatcher import UiDispatcher
 from gui.gui import GUI
 
 class PomodoroBlocker:
@@ -21,9 +22,13 @@ class PomodoroBlocker:
     of all the specialized modules (GUI, Timer, Scheduler, etc.).
     It's like the mission control center, coordinating all operations.
     """
-    def __init__(self):
+    def __init__(self, instance_lock, profile_startup=False):
         # Store a reference to the global configuration FIRST.
         self.config = AppConfig
+        self.instance_lock = instance_lock # Held by __main__ before anything is built.
+        self.startup = StartupTimeline(STARTED)
+        self.startup.add("python + ui imports", STARTED, time.perf_counter(), ("tkinter", "core", "gui"))
+        self.profile_startup = profile_startup
 
         # Initialize the Tkinter root window.
         self.root = tk.Tk()
@@ -45,24 +50,98 @@ class PomodoroBlocker:
         
         self.root.attributes('-topmost', True) # Keep window on top for focus.
 
-        # Initialize core functionalities by passing 'self' (the main app instance).
-        # The order here is important! Initialize all functional modules first.
-        self.gui = GUI(self) # Initialize GUI instance
-        self.timer = Timer(self)
-        self.scheduler = Scheduler(self)
-        self.audio_control = AudioControl(self)
-        self.input_blocker = InputBlocker(self)
-        self.night_mode = NightMode(self)
-        self.task_killer = TaskKiller(self)
+        # Every widget/variable update from another thread (or a hot loop) goes through here.
+        self.ui = UiDispatcher(self, self.config.UI_FRAME_MS)
+        self.ui.start()
 
-        # NOW call setup_ui on the gui instance, AFTER all its dependencies (like self.timer, self.scheduler) are ready.
-        # This is like plugging in all the components before flipping the power switch on the control panel.
-        self.gui.setup_ui()
+        # Paint first, load later: the window is up before a single engine is imported.
+        with self.startup.phase("build window"):
+            self.gui = GUI(self)
+            self.view = self.gui # Until the control API joins in (see _start_engines).
+            self.gui.setup_ui()
+            self.root.update()
+        self.startup.mark("first paint")
+        paint_ms = self.startup.elapsed_ms()
+        if paint_ms > self.config.STARTUP_BUDGET_MS:
+            print(f"Slow startup: first paint after {paint_ms:.0f} ms, budget is {self.config.STARTUP_BUDGET_MS} ms.")
+
+        self._start_engines()
 
         # Initial check for admin privileges and prompt for persistence setup.
         # This is delayed slightly to allow the GUI to fully initialize.
         self.root.after(100, self.scheduler._check_admin_and_prompt_persistence)
 
+        if self.profile_startup:
+            self._dump_startup_profile()
+
+    def _start_engines(self):
+        """
+        Imports and builds everything behind the window, phase by phase on the startup timeline.
+        The order here is important! Each module may rely on the ones before it.
+        """
+        startup = self.startup
+        with startup.phase("import engines"):
+            from core.clock import NtpCorrectedClock, create_session_clock
+            from core.control_server import ControlServer
+            from core.event_loop import EngineLoop
+            from core.scheduler import Scheduler
+            from core.session_view import ViewGroup
+            from core.timer import Timer
+            from core.history import SessionHistory
+            from core.audio_control import AudioControl
+            from core.input_blocker import InputBlocker
+            from core.night_mode import NightMode
+            from core.system_monitor import SystemMonitor
+            from core.task_killer import TaskKiller
+
+        with startup.phase("clocks + engine loop"):
+            # Shared time sources: one for measuring sessions, one for "what time is it really?".
+            # Every module reads these instead of keeping its own notion of now.
+            self.session_clock = create_session_clock(self.config.COUNT_SUSPEND_TIME)
+            self.wall_clock = NtpCorrectedClock()
+            # One asyncio loop for all background work (NTP, process events); Tk keeps the main thread.
+            self.engine = EngineLoop(self)
+
+        with startup.phase("control API"):
+            # Local clients (focusctl.py, tray icons) attach to this engine through the control API.
+            self.control = ControlServer(self)
+            # What the engines report to; the headless daemon uses a ConsoleView instead of the GUI.
+            self.view = ViewGroup(self.gui, self.control)
+        with startup.phase("timer + scheduler"):
+            self.history = SessionHistory(
+                os.path.join(self.config.DATA_DIR, 'history.bin'),
+                self.engine,
+                self.config.HISTORY_RETENTION_DAYS,
+                self.config.HISTORY_COMPACT_INTERVAL_DAYS,
+            )
+            self.timer = Timer(self)
+            self.scheduler = Scheduler(self)
+        with startup.phase("audio + input"):
+            self.audio_control = AudioControl(self) # pycaw itself loads on the first mute.
+            self.input_blocker = InputBlocker(self) # pynput itself loads on the first block.
+        with startup.phase("night mode"):
+            self.night_mode = NightMode(self)
+        with startup.phase("process monitoring"):
+            self.system_monitor = SystemMonitor(self) # Shared process watcher; consumers plug into it.
+            self.task_killer = TaskKiller(self)
+        self.control.start()
+        with startup.phase("restore session"):
+            # Respawned after a crash? Carry on with the session that was running.
+            self.timer.restore_session()
+        startup.mark("engines ready")
+
+    def _dump_startup_profile(self):
+        report = self.startup.report()
+        print(report)
+        # pythonw has no console, so keep a copy next to the other state files.
+        path = os.path.join(self.config.DATA_DIR, 'startup-profile.txt')
+        try:
+            os.makedirs(self.config.DATA_DIR, exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(report + "\n")
+        except OSError as e:
+            print(f"Could not save {path}: {e}")
+
     # Removed _get_center_x and _get_center_y as they are now in __init__ for clarity
     # and to ensure winfo_screenwidth/height are called after root is fully set up.
     
@@ -73,12 +152,28 @@ class PomodoroBlocker:
         """
         # Initial check for night-time blocking before the main loop starts.
         if self.night_mode.is_night_time():
-            self.night_mode.create_night_overlay()
-        self.root.mainloop()
+            self.night_mode.start_lockdown()
+        try:
+            self.root.mainloop()
+        finally:
+            self.control.close()
+            self.ui.close()
+            # Pending checkpoint and history writes go through the engine, so flush them before stopping it.
+            self.timer.checkpoint.close()
+            self.history.close()
+            self.engine.stop()
+            self.task_killer.fingerprints.shutdown()
+            self.instance_lock.release()
 
 if __name__ == "__main__":
     # The entry point of our application.
     # When you run main.py, a PomodoroBlocker instance is created, and its main loop starts.
-    app = PomodoroBlocker()
+    # One engine per user: if FocusX is already running, a second copy would only duplicate it.
+    # The lock is taken before the window is built, so two launches racing each other can't both start.
+    instance_lock = InstanceLock(AppConfig.DATA_DIR)
+    if not instance_lock.acquire():
+        print("FocusX is already running; use focusctl.py to talk to it.")
+        sys.exit(ALREADY_RUNNING_EXIT_CODE)
+    app = PomodoroBlocker(instance_lock, profile_startup='--profile-startup' in sys.argv[1:])
     app.run()
 
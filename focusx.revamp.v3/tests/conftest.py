@@ -0,0 +1,8 @@
+# tests/conftest.py
+#
+# FocusX isn't an installed package: make `core` importable the way main.py sees it.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
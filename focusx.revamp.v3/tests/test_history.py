@@ -0,0 +1,100 @@
+# tests/test_history.py
+
+import os
+import time
+import pytest
+from core.event_loop import EngineLoop
+from core.history import (
+    HEADER, MAGIC, OUTCOME_COMPLETED, OUTCOME_STOPPED, PHASE_BREAK, PHASE_WORK, RECORD,
+    HistoryRecord, SessionHistory, day_of
+)
+
+DAY = 86400
+NOW = time.time()
+
+def record(start, length=1500, phase=PHASE_WORK, outcome=OUTCOME_COMPLETED, kills=0):
+    return HistoryRecord(start, start + length, length, length, 0, kills, phase, outcome)
+
+def write_log(path, records, tail=b''):
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, RECORD.size))
+        f.write(b''.join(RECORD.pack(*r) for r in records))
+        f.write(tail)
+
+@pytest.fixture
+def engine():
+    engine = EngineLoop(None)
+    yield engine
+    engine.stop()
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'history.bin')
+
+def test_torn_tail_is_ignored_by_readers(path):
+    records = [record(NOW - 3 * DAY), record(NOW - DAY)]
+    write_log(path, records, tail=RECORD.pack(*record(NOW))[:20])
+    assert SessionHistory(path).records() == records
+
+def test_engine_compacts_a_torn_tail_before_appending(path, engine):
+    records = [record(NOW - 3 * DAY), record(NOW - DAY)]
+    write_log(path, records, tail=b'\x01' * 20)
+
+    history = SessionHistory(path, engine)
+    history.append(record(NOW))
+    history.close()
+
+    assert (os.path.getsize(path) - HEADER.size) % RECORD.size == 0
+    assert history.records() == records + [record(NOW)]
+
+def test_compaction_drops_corrupt_records_prunes_and_sorts(path, engine):
+    old = record(NOW - 40 * DAY)
+    late, early = record(NOW - DAY), record(NOW - 2 * DAY)
+    corrupt = HistoryRecord(NOW, NOW - 10, 0, 0, 0, 0, 7, 0) # Unknown phase, ends before it starts.
+    write_log(path, [old, late, corrupt, early])
+
+    history = SessionHistory(path, engine, retention_days=30)
+    engine.write(history.compact)
+    history.close()
+
+    assert history.records() == [early, late]
+    assert os.path.getsize(path) == HEADER.size + 2 * RECORD.size
+
+def test_index_follows_appends_and_compaction(path, engine):
+    history = SessionHistory(path, engine)
+    first, second = record(NOW - DAY), record(NOW)
+    history.append(second)
+    history.append(first) # Out of order on purpose; compaction sorts.
+    history.close()
+    assert history.days() == sorted({day_of(first.start), day_of(second.start)})
+
+    engine.write(history.compact)
+    history.close()
+    assert history.records(day_of(first.start)) == [first]
+    assert history.records(day_of(second.start)) == [second]
+
+def test_readers_never_write_the_index(path, engine):
+    writer = SessionHistory(path, engine)
+    writer.append(record(NOW))
+    writer.close()
+    assert not os.path.exists(writer.index_path) # Appending alone doesn't index.
+
+    reader = SessionHistory(path) # No engine: read-only, like focusctl.py stats.
+    assert reader.days() == [day_of(NOW)]
+    assert not os.path.exists(reader.index_path)
+
+    assert writer.days() == [day_of(NOW)]
+    writer.close()
+    assert os.path.exists(writer.index_path)
+
+def test_summary_adds_up_a_day(path, engine):
+    start = time.mktime((2026, 3, 10, 12, 0, 0, 0, 0, -1)) # Local noon: the whole day fits.
+    history = SessionHistory(path, engine)
+    history.append(record(start, 1500, kills=2))
+    history.append(record(start + 1500, 300, phase=PHASE_BREAK))
+    history.append(record(start + 1800, 600, outcome=OUTCOME_STOPPED, kills=1))
+    history.close()
+
+    summary = history.summary(day_of(start))
+    assert (summary.focus_seconds, summary.break_seconds) == (2100, 300)
+    assert (summary.completed, summary.stopped, summary.kills) == (1, 1, 3)
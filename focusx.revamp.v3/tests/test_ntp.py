@@ -0,0 +1,107 @@
+# tests/test_ntp.py
+
+import asyncio
+import socket
+import time
+import pytest
+from core.ntp import (
+    MODE_SERVER, NTP_PACKET, NtpSample, _build_request, _parse_reply, _to_ntp,
+    median_offset, query_servers
+)
+
+def server_reply(request, offset, stratum=1, echo=True):
+    """What an NTP server `offset` seconds ahead of us would send back."""
+    fields = list(NTP_PACKET.unpack_from(request))
+    fields[0] = MODE_SERVER | (3 << 3)
+    fields[1] = stratum
+    if echo:
+        fields[9:11] = fields[13:15] # Origin timestamp = the client's transmit timestamp.
+    now = _to_ntp(time.time() + offset)
+    fields[11:13] = now
+    fields[13:15] = now
+    return NTP_PACKET.pack(*fields)
+
+class Responder(asyncio.DatagramProtocol):
+    def __init__(self, offset, delay, **reply_options):
+        self.offset = offset
+        self.delay = delay
+        self.reply_options = reply_options
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        reply = server_reply(data, self.offset, **self.reply_options)
+        asyncio.get_running_loop().call_later(self.delay, self.transport.sendto, reply, addr)
+
+async def start_responder(offset=0.0, delay=0.0, **reply_options):
+    transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+        lambda: Responder(offset, delay, **reply_options), local_addr=('127.0.0.1', 0)
+    )
+    return transport, f"127.0.0.1:{transport.get_extra_info('sockname')[1]}"
+
+@pytest.fixture
+def dead_server():
+    """A bound UDP port that never answers (so no ICMP 'unreachable' gives it away early)."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    yield f"127.0.0.1:{sock.getsockname()[1]}"
+    sock.close()
+
+def run_query(servers_spec, dead=(), quorum=3, deadline=1.0):
+    async def scenario():
+        transports, servers = [], list(dead)
+        for spec in servers_spec:
+            transport, address = await start_responder(**spec)
+            transports.append(transport)
+            servers.append(address)
+        started = time.monotonic()
+        try:
+            samples = await query_servers(servers, quorum=quorum, deadline=deadline)
+        finally:
+            for transport in transports:
+                transport.close()
+        return samples, time.monotonic() - started
+    return asyncio.run(scenario())
+
+def test_quorum_returns_as_soon_as_enough_servers_answer(dead_server):
+    samples, elapsed = run_query(
+        [{'offset': 1.0}, {'offset': 1.1}, {'offset': 1.2}, {'offset': 9.0, 'delay': 0.5}],
+        dead=[dead_server], quorum=3, deadline=2.0
+    )
+    assert len(samples) == 3
+    assert elapsed < 0.4 # Neither the dead server nor the slow one is waited for.
+    assert median_offset(samples) == pytest.approx(1.1, abs=0.05)
+
+def test_dead_servers_cannot_stretch_the_deadline(dead_server):
+    samples, elapsed = run_query([], dead=[dead_server], quorum=3, deadline=0.3)
+    assert samples == []
+    assert 0.25 <= elapsed < 0.6
+
+def test_short_of_quorum_returns_what_arrived_by_the_deadline(dead_server):
+    samples, elapsed = run_query([{'offset': 0.5}], dead=[dead_server], quorum=3, deadline=0.3)
+    assert [round(sample.offset, 1) for sample in samples] == [0.5]
+    assert 0.25 <= elapsed < 0.6
+
+def test_unusable_and_unsolicited_replies_are_not_samples():
+    samples, _ = run_query([{'offset': 1.0, 'stratum': 0}, {'offset': 1.0, 'echo': False}], deadline=0.3)
+    assert samples == []
+
+def test_parse_reply_measures_offset_and_delay():
+    t1 = time.time()
+    request, tx_stamp = _build_request(t1)
+    sample = _parse_reply(server_reply(request, 2.0), tx_stamp, t1, t1 + 0.01, 'test')
+    assert sample.server == 'test'
+    assert sample.offset == pytest.approx(2.0 - 0.005, abs=0.01)
+    assert sample.delay == pytest.approx(0.01, abs=0.01)
+
+def test_parse_reply_rejects_kiss_of_death():
+    t1 = time.time()
+    request, tx_stamp = _build_request(t1)
+    with pytest.raises(ValueError):
+        _parse_reply(server_reply(request, 0.0, stratum=0), tx_stamp, t1, t1, 'test')
+
+def test_median_ignores_one_confused_server():
+    samples = [NtpSample('a', 0.10, 0.02), NtpSample('b', 0.12, 0.02), NtpSample('c', 3600.0, 0.02)]
+    assert median_offset(samples) == 0.12
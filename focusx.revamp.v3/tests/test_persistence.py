@@ -0,0 +1,106 @@
+# tests/test_persistence.py
+
+import os
+import queue
+import time
+import pytest
+from core.config import AppConfig
+from core.event_loop import EngineLoop
+from core.persistence import FakePersistenceBackend, SystemdUserBackend, create_persistence_backend
+from core.scheduler import Scheduler
+
+class FakeConfig(AppConfig):
+    PERSISTENCE_BACKEND = 'fake'
+
+class RecordingView:
+    """Remembers every view call, in order, as (method name, args)."""
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+class QueuedUi:
+    """The main loop's UiDispatcher, reduced to a queue the test drains on its own thread."""
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def call(self, callback, *args, key=None):
+        self.queue.put((callback, args))
+
+class FakeApp:
+    def __init__(self):
+        self.config = FakeConfig
+        self.view = RecordingView()
+        self.ui = QueuedUi()
+        self.engine = EngineLoop(self)
+
+    def run_main_loop(self, until, timeout=5.0):
+        """Runs main-loop callbacks as they arrive until `until()` holds."""
+        deadline = time.monotonic() + timeout
+        while not until():
+            callback, args = self.ui.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            callback(*args)
+
+@pytest.fixture
+def app():
+    app = FakeApp()
+    yield app
+    app.engine.stop()
+
+@pytest.fixture
+def scheduler(app, tmp_path):
+    scheduler = Scheduler(app)
+    scheduler.script_path = str(tmp_path / 'main.py') # The wrapper is written next to it.
+    return scheduler
+
+def test_fake_backend_is_chosen_by_config():
+    assert isinstance(create_persistence_backend(FakeConfig), FakePersistenceBackend)
+
+def test_state_is_checked_once_then_served_from_cache(app, scheduler):
+    scheduler.backend.installed = True
+    assert scheduler.persistence_enabled() is None # Not known until the background check lands.
+    scheduler.refresh_persistence_state()
+    app.run_main_loop(lambda: scheduler.persistence_enabled() is not None)
+    assert scheduler.persistence_enabled() is True
+
+    for _ in range(10):
+        scheduler._update_persistence_button_text()
+    assert scheduler.backend.calls['exists'] == 1
+    assert app.view.calls[-1] == ('show_persistence', (True,))
+
+def test_enabling_installs_the_wrapper_without_asking_the_os_again(app, scheduler, tmp_path):
+    scheduler._set_persistence_state(False)
+    scheduler._toggle_persistence()
+    assert ('show_persistence_busy', ("Enabling Hardcore Persistence...",)) in app.view.calls
+    app.run_main_loop(lambda: scheduler.persistence_enabled())
+
+    backend = scheduler.backend
+    wrapper = str(tmp_path / 'focusx_wrapper.py')
+    assert backend.installed and backend.command == [scheduler.python_executable_silent, wrapper]
+    assert os.path.exists(wrapper)
+    assert backend.calls == {'exists': 0, 'install': 1, 'remove': 0}
+
+def test_disabling_removes_the_entry(app, scheduler):
+    scheduler.backend.installed = True
+    scheduler._set_persistence_state(True)
+    scheduler._toggle_persistence()
+    app.run_main_loop(lambda: scheduler.persistence_enabled() is False)
+    assert not scheduler.backend.installed
+    assert scheduler.backend.calls['remove'] == 1
+
+def test_slow_backend_never_blocks_the_main_loop(app, scheduler):
+    scheduler.backend.latency = 0.5
+    scheduler._set_persistence_state(False)
+    started = time.monotonic()
+    scheduler._toggle_persistence()
+    scheduler._toggle_persistence() # A double-click while the install is running.
+    assert time.monotonic() - started < 0.1
+    app.run_main_loop(lambda: scheduler.persistence_enabled())
+    assert scheduler.backend.calls['install'] == 1
+
+def test_systemd_state_is_a_file_lookup(tmp_path):
+    backend = SystemdUserBackend('focusx-test.service', unit_dir=str(tmp_path))
+    assert not backend.exists()
+    (tmp_path / 'focusx-test.service').write_text("[Unit]\n")
+    assert backend.exists()
@@ -0,0 +1,142 @@
+# tests/test_process_watcher.py
+
+import asyncio
+import pytest
+from core.process_watcher import (
+    CN_IDX_PROC, CN_MSG_HEADER, CN_VAL_PROC, EXEC_EVENT, NLMSG_DONE, NLMSG_HEADER,
+    PROC_EVENT_EXEC, PROC_EVENT_EXIT, PROC_EVENT_HEADER,
+    NetlinkProcessWatcher, PollingProcessWatcher, create_process_watcher
+)
+
+class FakeIdentities:
+    """Stands in for ProcessIdentityCache: remembers what the watcher evicted."""
+    def __init__(self):
+        self.evicted = set()
+
+    def evict(self, pids):
+        self.evicted.update(pids)
+
+    def retain(self, live_pids):
+        pass
+
+class FakeSpawner:
+    """A process table we control: PIDs come and go, and each has a creation time."""
+    def __init__(self, *pids):
+        self.create_times = {pid: 1000.0 + pid for pid in pids}
+        self.reads = []
+
+    def spawn(self, pid, create_time=None):
+        self.create_times[pid] = create_time if create_time is not None else 2000.0 + pid
+
+    def exit(self, pid):
+        del self.create_times[pid]
+
+    def pids(self):
+        return list(self.create_times)
+
+    def create_time(self, pid):
+        self.reads.append(pid)
+        return self.create_times.get(pid)
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+def make_poller(spawner, loop, spawned, **kwargs):
+    watcher = PollingProcessWatcher(
+        spawned.append, loop, pid_source=spawner.pids, identities=FakeIdentities(),
+        create_time_source=spawner.create_time, **kwargs
+    )
+    watcher._open() # The baseline, without starting the poll task.
+    return watcher
+
+def test_polling_reports_only_new_processes(loop):
+    spawner = FakeSpawner(1, 2, 3)
+    spawned = []
+    watcher = make_poller(spawner, loop, spawned)
+
+    assert watcher.poll_once() == set() # The baseline is never reported.
+    spawner.spawn(4)
+    spawner.spawn(5)
+    assert watcher.poll_once() == {4, 5}
+    assert watcher.poll_once() == set()
+    assert sorted(spawned) == [4, 5]
+
+def test_polling_reads_creation_times_of_new_pids_only(loop):
+    spawner = FakeSpawner(1, 2, 3)
+    watcher = make_poller(spawner, loop, [])
+    watcher.poll_once()
+    spawner.spawn(4)
+    watcher.poll_once()
+    watcher.poll_once()
+    assert spawner.reads == [4]
+
+def test_polling_evicts_exited_processes(loop):
+    spawner = FakeSpawner(1, 2, 3)
+    watcher = make_poller(spawner, loop, [])
+    spawner.exit(2)
+    watcher.poll_once()
+    assert watcher.identities.evicted == {2}
+
+def test_polling_skips_processes_gone_before_their_first_look(loop):
+    spawner = FakeSpawner(1)
+    spawned = []
+    watcher = make_poller(spawner, loop, spawned)
+    spawner.spawn(7)
+    spawner.create_times[7] = None # Exited between the PID listing and the creation-time read.
+    assert watcher.poll_once() == set()
+    assert spawned == []
+
+def test_polling_backs_off_and_snaps_back_on_activity(loop):
+    watcher = make_poller(FakeSpawner(1), loop, [], min_interval=0.25, max_interval=2.0)
+    intervals = []
+    for _ in range(5):
+        watcher.cadence.set(watcher._next_interval())
+        intervals.append(watcher.interval)
+    assert intervals == [0.5, 1.0, 2.0, 2.0, 2.0]
+
+    watcher.notify_activity()
+    assert watcher.interval == 0.25
+    watcher.cadence.set(watcher._next_interval())
+    assert watcher.interval == 0.25 # The pass right after activity stays fast.
+
+def test_polling_callback_errors_do_not_stop_the_watcher(loop):
+    spawner = FakeSpawner(1)
+    watcher = make_poller(spawner, loop, [])
+    watcher.on_spawn = lambda pid: 1 / 0
+    spawner.spawn(2)
+    assert watcher.poll_once() == {2}
+
+def netlink_event(what, pid, tgid):
+    event = PROC_EVENT_HEADER.pack(what, 0, 0) + EXEC_EVENT.pack(pid, tgid)
+    cn_msg = CN_MSG_HEADER.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(event), 0) + event
+    message = NLMSG_HEADER.pack(NLMSG_HEADER.size + len(cn_msg), NLMSG_DONE, 0, 0, 0) + cn_msg
+    return message + b'\0' * (-len(message) % 4) # Netlink pads every message to 4 bytes.
+
+def test_netlink_parses_exec_and_exit_events():
+    data = netlink_event(PROC_EVENT_EXEC, 100, 100) + netlink_event(PROC_EVENT_EXIT, 200, 200)
+    assert list(NetlinkProcessWatcher.parse_events(data)) == [(PROC_EVENT_EXEC, 100), (PROC_EVENT_EXIT, 200)]
+
+def test_netlink_skips_threads_and_other_events():
+    fork_event = 0x00000001
+    data = (
+        netlink_event(PROC_EVENT_EXEC, 101, 100) # A thread of process 100.
+        + netlink_event(fork_event, 300, 300)
+        + netlink_event(PROC_EVENT_EXEC, 400, 400)
+    )
+    assert list(NetlinkProcessWatcher.parse_events(data)) == [(PROC_EVENT_EXEC, 400)]
+
+def test_netlink_ignores_truncated_datagrams():
+    data = netlink_event(PROC_EVENT_EXEC, 100, 100)
+    assert list(NetlinkProcessWatcher.parse_events(data[:-12])) == []
+    assert list(NetlinkProcessWatcher.parse_events(data[:NLMSG_HEADER.size - 1])) == []
+
+def test_falls_back_to_polling_without_an_event_source(monkeypatch, loop):
+    for watcher_class in ('NetlinkProcessWatcher', 'WmiProcessWatcher'):
+        monkeypatch.setattr(f'core.process_watcher.{watcher_class}.is_supported', staticmethod(lambda: False))
+    monkeypatch.setattr(PollingProcessWatcher, '_attach', lambda self: None) # No loop running here.
+    watcher = create_process_watcher(lambda pid: None, loop)
+    assert isinstance(watcher, PollingProcessWatcher)
+    assert watcher.is_active
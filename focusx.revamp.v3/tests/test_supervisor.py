@@ -0,0 +1,72 @@
+# tests/test_supervisor.py
+
+import os
+import sys
+import threading
+import time
+import pytest
+from core.supervisor import Supervisor
+
+CRASH = [sys.executable, '-c', 'raise SystemExit(1)']
+
+def test_crash_loop_backs_off_exponentially(tmp_path):
+    supervisor = Supervisor(CRASH, str(tmp_path), healthy_uptime=30.0, backoff_min=0.1, backoff_max=1.0)
+    assert [supervisor._respawn_delay(0.5) for _ in range(6)] == [0.1, 0.2, 0.4, 0.8, 1.0, 1.0]
+
+def test_healthy_run_resets_the_backoff(tmp_path):
+    supervisor = Supervisor(CRASH, str(tmp_path), healthy_uptime=30.0, backoff_min=0.1, backoff_max=1.0)
+    supervisor._respawn_delay(0.5)
+    supervisor._respawn_delay(0.5)
+    assert supervisor._respawn_delay(60.0) == 0.0 # Respawned straight away.
+    assert supervisor._respawn_delay(0.5) == 0.1
+
+def test_crashing_child_is_respawned_with_growing_delays(tmp_path):
+    supervisor = Supervisor(CRASH, str(tmp_path), healthy_uptime=30.0, backoff_min=0.1, backoff_max=1.0)
+    launches = []
+    launch = supervisor._launch
+
+    def recording_launch():
+        launches.append(time.monotonic())
+        if len(launches) == 4:
+            supervisor.stop()
+        return launch()
+    supervisor._launch = recording_launch
+
+    runner = threading.Thread(target=supervisor.run, daemon=True)
+    runner.start()
+    runner.join(10)
+    assert not runner.is_alive()
+    assert len(launches) == 4
+    assert supervisor.restarts.value == 3
+
+    # Each gap is the child's own (short) run plus the backoff: 0.1, 0.2, 0.4 s.
+    gaps = [later - earlier for earlier, later in zip(launches, launches[1:])]
+    for gap, backoff in zip(gaps, (0.1, 0.2, 0.4)):
+        assert backoff <= gap < backoff + 2.0
+    assert gaps[0] < gaps[1] < gaps[2]
+
+def test_stop_interrupts_the_backoff_wait(tmp_path):
+    supervisor = Supervisor(CRASH, str(tmp_path), healthy_uptime=30.0, backoff_min=60.0, backoff_max=60.0)
+    runner = threading.Thread(target=supervisor.run, daemon=True)
+    runner.start()
+    time.sleep(1.0) # The child has crashed; the supervisor now waits out a 60 s backoff.
+    started = time.monotonic()
+    supervisor.stop()
+    runner.join(5)
+    assert not runner.is_alive()
+    assert time.monotonic() - started < 1.0
+
+@pytest.mark.skipif(not hasattr(os, 'pidfd_open'), reason="needs a pidfd to stop mid-wait")
+def test_stop_while_the_child_runs_leaves_it_alone(tmp_path):
+    supervisor = Supervisor([sys.executable, '-c', 'import time; time.sleep(30)'], str(tmp_path))
+    runner = threading.Thread(target=supervisor.run, daemon=True)
+    runner.start()
+    time.sleep(0.5)
+    supervisor.stop()
+    runner.join(5)
+    try:
+        assert not runner.is_alive()
+        assert supervisor.process.poll() is None # Still running: stop() only stops supervising.
+    finally:
+        supervisor.process.kill()
+        supervisor.process.wait()